@@ -0,0 +1,302 @@
+"""
+Run one robotspeak program against many mazes in parallel.
+
+Mazes come either from a range of seeds (each seed generates the maze the
+program's LOAD line asks for, as `robotspeak --seed` would, or picks a
+child stream of a root seed), from ready-made mazes, or from a corpus file,
+which every worker opens itself and reads maze by maze. Work is spread
+over a ProcessPoolExecutor; every worker compiles the program once in its
+initializer and then only builds mazes and runs code.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List
+
+from robotspeak.errors import SyntaxErrorException, RuntimeErrorException
+from robotspeak.maze import MazeValidationError
+from robotspeak.syntax import parse_program
+from robotspeak.vm import compile_program, Limits
+from robotspeak.optimizer import optimize, MAX_LEVEL
+from robotspeak.compiler import Interpreter
+from robotspeak.grid import GridMaze
+from robotspeak.sinks import NullSink
+from robotspeak.trace import TraceRecorder
+from robotspeak.generator import SeedSequence, parse_seed_range
+from robotspeak.corpus import Corpus
+from robotspeak.stats import RunStats
+
+# a batch must finish, so runs are bounded unless the caller says otherwise
+DEFAULT_MAX_STATEMENTS = 1_000_000
+
+# per-worker state, set up once by _init_worker
+_code = None
+_limits = None
+_detect_cycles = False
+_trace_dir = None
+_corpus = None
+_collect_stats = False
+
+def _init_worker(robotspeak_program: str, limits: Limits, detect_cycles: bool, trace_dir: str,
+                 corpus_path: str, optimize_level: int, collect_stats: bool) -> None:
+    global _code, _limits, _detect_cycles, _trace_dir, _corpus, _collect_stats
+    _code = compile_program(optimize(parse_program(robotspeak_program), optimize_level))
+    _limits = limits
+    _detect_cycles = detect_cycles
+    _trace_dir = trace_dir
+    _corpus = None if corpus_path is None else Corpus(corpus_path, GridMaze)
+    _collect_stats = collect_stats
+
+def _run_one(task) -> tuple:
+    """
+    Run the worker's program on one maze.
+
+    task is ("seed", int seed or SeedSequence, label), ("maze", maze, label)
+    or ("corpus", index, label).
+    """
+    kind, value, label = task
+    stats = RunStats() if _collect_stats else None
+    if kind == "seed":
+        session = Interpreter(rng = value, maze_class = GridMaze, sink = NullSink())
+    else:
+        if kind == "corpus":
+            value = _corpus[value]
+        try:
+            value.create_initial_map()
+        except MazeValidationError:
+            # as a seed whose maze fails validation, one bad record must not stop the batch
+            return (False, "invalid maze", None, None, stats)
+        session = Interpreter(maze = value, sink = NullSink())
+
+    recorder = None
+    if _trace_dir is not None:
+        recorder = TraceRecorder(os.path.join(_trace_dir, f"{label}.trace"))
+    try:
+        result = session.run_code(_code, _limits, _detect_cycles, recorder, stats)
+    except RuntimeErrorException:
+        return (session.maze.is_maze_solved(), "runtime error", None, None, stats)
+    finally:
+        if recorder is not None:
+            recorder.close()
+    return (session.maze.is_maze_solved(), result.reason.value, result.statements, result.actions, stats)
+
+def _distribution(values: List[int]) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+    def percentile(p):
+        return values[min(len(values) - 1, int(p * len(values)))]
+    return {
+        "min": values[0],
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "p90": percentile(0.90),
+        "p99": percentile(0.99),
+        "max": values[-1],
+    }
+
+class BatchReport:
+    """
+    Aggregated outcome of a batch.
+
+    Attributes:
+        runs: Number of mazes run
+        solved: Number of mazes whose maze ended up solved
+        statements: Distribution (min/mean/median/p90/p99/max) of statements executed per run
+        actions: Same, for robot actions
+        failures: Counter of termination reasons for runs that did not solve their maze
+        stats: RunStats totalled over every run, or None if they were not collected
+    """
+    def __init__(self, runs: int, solved: int, statements: dict, actions: dict, failures: Counter,
+                 stats: RunStats = None):
+        self.runs = runs
+        self.solved = solved
+        self.statements = statements
+        self.actions = actions
+        self.failures = failures
+        self.stats = stats
+
+    @property
+    def success_rate(self) -> float:
+        return self.solved / self.runs if self.runs else 0.0
+
+    def to_dict(self) -> dict:
+        report = {
+            "runs": self.runs,
+            "solved": self.solved,
+            "success_rate": self.success_rate,
+            "statements": self.statements,
+            "actions": self.actions,
+            "failures": dict(self.failures),
+        }
+        if self.stats is not None:
+            report["stats"] = self.stats.to_dict()
+        return report
+
+    def summary(self) -> str:
+        lines = [f"Runs: {self.runs}  Solved: {self.solved}  Success rate: {self.success_rate:.2%}"]
+        for name, dist in (("Statements", self.statements), ("Actions", self.actions)):
+            if dist:
+                lines.append(f"{name}: min {dist['min']}  median {dist['median']}  mean {dist['mean']:.1f}  "
+                             f"p90 {dist['p90']}  p99 {dist['p99']}  max {dist['max']}")
+        for reason, count in self.failures.most_common():
+            lines.append(f"Unsolved ({reason}): {count}")
+        if self.stats is not None:
+            lines.append(f"Totals over all runs:\n{self.stats.summary()}")
+        return '\n'.join(lines)
+
+def run_batch(robotspeak_program: str,
+              seeds: Iterable[int] = None,
+              mazes: Iterable = None,
+              workers: int = None,
+              limits: Limits = None,
+              detect_cycles: bool = False,
+              trace_dir: str = None,
+              root_seed: int = None,
+              corpus: str = None,
+              optimize_level: int = 0,
+              stats: bool = False) -> BatchReport:
+    """
+    Run a program on every maze of a batch and aggregate the results.
+
+    Args:
+        robotspeak_program: Program source
+        seeds: Seeds to generate mazes from, using the program's LOAD environment;
+            with root_seed, indices of child streams of SeedSequence(root_seed) instead
+        mazes: Ready-made mazes (not yet created) to use instead of seeds; a maze that
+            fails validation, here or in a corpus, counts as an "invalid maze" failure
+        corpus: Path of a corpus file (see robotspeak.corpus) to use instead of seeds
+        workers: Worker processes; defaults to the CPU count. 0 runs in this process
+        limits: Limits per run; defaults to DEFAULT_MAX_STATEMENTS statements
+        detect_cycles: Stop runs that provably loop forever, as CYCLE failures. This
+            fingerprints the maze and variables at every loop back-edge and turns off
+            the JIT and the MOVE_WHILE wall jump, which makes runs that do finish
+            up to twice as slow on large rooms. Without it, a run that loops
+            forever goes on until limits stop it
+        trace_dir: If given, record each run's trace to seed-N.trace or maze-N.trace in this directory
+        root_seed: See seeds
+        optimize_level: robotspeak.optimizer level to run the program at
+        stats: Collect robotspeak.stats counters for every run and total them in the report;
+            the program is compiled once per worker, so parse and compile times are not included
+
+    Raises:
+        SyntaxErrorException: If the program does not parse, before anything is run
+    """
+    optimize(parse_program(robotspeak_program), optimize_level)
+    if sum(source is not None for source in (seeds, mazes, corpus)) != 1:
+        raise ValueError("Give exactly one of seeds, mazes or corpus")
+    if limits is None:
+        limits = Limits(max_statements = DEFAULT_MAX_STATEMENTS)
+    if seeds is not None:
+        if root_seed is None:
+            tasks = [("seed", seed, f"seed-{seed}") for seed in seeds]
+        else:
+            root = SeedSequence(root_seed)
+            tasks = [("seed", root.child(seed), f"seed-{seed}") for seed in seeds]
+    elif mazes is not None:
+        tasks = [("maze", maze, f"maze-{i}") for i, maze in enumerate(mazes)]
+    else:
+        with Corpus(corpus) as opened:
+            tasks = [("corpus", i, f"maze-{i}") for i in range(len(opened))]
+    if trace_dir is not None:
+        os.makedirs(trace_dir, exist_ok = True)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 0:
+        _init_worker(robotspeak_program, limits, detect_cycles, trace_dir, corpus, optimize_level, stats)
+        results = [_run_one(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 8))
+        with ProcessPoolExecutor(max_workers = workers,
+                                 initializer = _init_worker,
+                                 initargs = (robotspeak_program, limits, detect_cycles, trace_dir,
+                                             corpus, optimize_level, stats)) as executor:
+            results = list(executor.map(_run_one, tasks, chunksize = chunksize))
+
+    solved = sum(1 for result in results if result[0])
+    failures = Counter(reason for is_solved, reason, _, _, _ in results if not is_solved)
+    totals = None
+    if stats:
+        totals = RunStats()
+        for result in results:
+            totals.merge(result[4])
+    return BatchReport(runs = len(results),
+                       solved = solved,
+                       statements = _distribution([r[2] for r in results if r[2] is not None]),
+                       actions = _distribution([r[3] for r in results if r[3] is not None]),
+                       failures = failures,
+                       stats = totals)
+
+def main(argv: List[str] = None) -> None:
+    """Entry point for `robotspeak batch`."""
+    parser = argparse.ArgumentParser(
+        prog="robotspeak batch",
+        description="Run a Robotspeak program against many mazes in parallel and summarise the results.",
+    )
+    parser.add_argument("filepath", type=str, help="The path to the Robotspeak source file (.txt).")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--seeds", type=parse_seed_range,
+                        help="Seeds to generate mazes from, as START:STOP or a count N.")
+    source.add_argument("--corpus", type=str,
+                        help="A corpus file, as written by `robotspeak corpus build`.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: all cores; 0 runs in-process).")
+    parser.add_argument("--max-statements", type=int, default=DEFAULT_MAX_STATEMENTS,
+                        help="Stop each run after this many statements.")
+    parser.add_argument("--max-actions", type=int, default=None,
+                        help="Stop each run after this many robot actions.")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Stop each run after this many seconds.")
+    parser.add_argument("--detect-cycles", action="store_true",
+                        help="Stop runs that provably loop forever instead of running them to "
+                             "--max-statements. Slows every run down, up to 2x on large rooms.")
+    parser.add_argument("--root-seed", type=int, default=None,
+                        help="Treat --seeds as indices of independent streams derived from this seed.")
+    parser.add_argument("--trace-dir", type=str, default=None,
+                        help="Record a binary trace of every run into this directory.")
+    parser.add_argument("-O", dest="optimize", type=int, nargs="?", const=1, default=0,
+                        choices=range(MAX_LEVEL + 1), metavar="LEVEL",
+                        help="Optimisation level, as for `robotspeak -O`.")
+    parser.add_argument("--stats", action="store_true",
+                        help="Count statements, actions, sensor reads, ... over every run and report the totals.")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.filepath, "r") as f:
+            source_code = f.read()
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    limits = Limits(max_statements=args.max_statements,
+                    max_actions=args.max_actions,
+                    max_seconds=args.timeout)
+    try:
+        report = run_batch(source_code,
+                           seeds=args.seeds,
+                           corpus=args.corpus,
+                           workers=args.workers,
+                           limits=limits,
+                           detect_cycles=args.detect_cycles,
+                           trace_dir=args.trace_dir,
+                           root_seed=args.root_seed,
+                           optimize_level=args.optimize,
+                           stats=args.stats)
+    except (SyntaxErrorException, RuntimeErrorException) as e:
+        print(f"\n--- ERROR ---\n{e}", file=sys.stderr)
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print(report.summary())
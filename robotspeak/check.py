@@ -0,0 +1,125 @@
+"""
+Static checks that run without loading a maze.
+
+check_program reports every syntax error in a program at once, plus a
+warning for every variable read that may happen before the variable is
+assigned. Such a read is only a runtime error if execution reaches it, so
+warnings do not make a program invalid unless the caller asks for that
+(`robotspeak check --strict`).
+"""
+import argparse
+import sys
+from typing import List, Tuple
+from robotspeak.syntax import Program, Assign, If, While, Const, Var, check_syntax
+from robotspeak.predicates import fold_condition, names_in
+from robotspeak.optimizer import assigned_variables
+
+def unassigned_reads(stmts: list, assigned: set, found: list) -> bool:
+    """
+    Walk a block, collecting (name, line) for every read of a variable that is not definitely assigned.
+
+    Args:
+        stmts: The block's statements
+        assigned: Variables definitely assigned when the block starts; updated
+            to those definitely assigned when it ends
+        found: List the reads are appended to
+
+    Returns:
+        False if the block never falls through (it ends in WHILE TRUE), else True
+    """
+    def read(expr, line):
+        for name in names_in(fold_condition(expr), Var):
+            if name not in assigned:
+                found.append((name, line))
+
+    for stmt in stmts:
+        match stmt:
+            case Assign():
+                read(stmt.expr, stmt.line)
+                assigned.add(stmt.name)
+            case If():
+                read(stmt.cond, stmt.line)
+                cond = fold_condition(stmt.cond)
+                then_assigned, else_assigned = set(assigned), set(assigned)
+                then_falls = not (isinstance(cond, Const) and not cond.value) and \
+                    unassigned_reads(stmt.body, then_assigned, found)
+                else_falls = not (isinstance(cond, Const) and cond.value) and \
+                    unassigned_reads(stmt.orelse or [], else_assigned, found)
+                if not then_falls and not else_falls:
+                    return False
+                if then_falls and else_falls:
+                    assigned |= then_assigned & else_assigned
+                else:
+                    assigned |= then_assigned if then_falls else else_assigned
+            case While():
+                read(stmt.cond, stmt.line)
+                cond = fold_condition(stmt.cond)
+                if isinstance(cond, Const) and not cond.value:
+                    continue
+                # later iterations start with at least what the first did, so one walk finds every read;
+                # the loop may run zero times, so nothing it assigns counts afterwards
+                unassigned_reads(stmt.body, set(assigned), found)
+                if isinstance(cond, Const):
+                    return False
+    return True
+
+def variable_warnings(program: Program) -> List[str]:
+    """Return a warning for every variable read that may come before the variable is assigned."""
+    found = []
+    unassigned_reads(program.body, set(), found)
+    ever_assigned = assigned_variables(program.body)
+    warnings = []
+    seen = set()
+    for name, line in sorted(found, key = lambda read: read[1]):
+        if (name, line) in seen:
+            continue
+        seen.add((name, line))
+        if name in ever_assigned:
+            warnings.append(f"Warning at line {line}: {name} may be read before it is assigned")
+        else:
+            warnings.append(f"Warning at line {line}: {name} is never assigned")
+    return warnings
+
+def check_program(robotspeak_program: str) -> Tuple[list, List[str]]:
+    """
+    Check a program without running it.
+
+    Returns:
+        The errors (SyntaxErrorException, or RuntimeErrorException for a bad
+        LOAD line), in line order, and the warnings; warnings are only
+        looked for when there are no errors
+    """
+    program, errors = check_syntax(robotspeak_program)
+    if errors:
+        return errors, []
+    return [], variable_warnings(program)
+
+def main(argv: List[str] = None) -> None:
+    """Entry point for `robotspeak check`."""
+    parser = argparse.ArgumentParser(
+        prog="robotspeak check",
+        description="Report every syntax error in robotspeak programs, and variables "
+                    "that may be read before they are assigned, without running them.",
+    )
+    parser.add_argument("filepaths", type=str, nargs="+", help="The Robotspeak source files to check.")
+    parser.add_argument("--strict", action="store_true",
+                        help="Treat warnings as errors.")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for filepath in args.filepaths:
+        try:
+            with open(filepath, "r") as f:
+                source_code = f.read()
+        except OSError as e:
+            print(f"{filepath}: Error: Could not read the file: {e}", file=sys.stderr)
+            failed = True
+            continue
+        errors, warnings = check_program(source_code)
+        for message in [str(e) for e in errors] + warnings:
+            print(f"{filepath}: {message}")
+        if errors or (args.strict and warnings):
+            failed = True
+        elif not warnings:
+            print(f"{filepath}: ok")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,192 @@
+"""
+Indexed corpus files: many mazes in one file, each readable on its own.
+
+Layout (little-endian):
+    header      magic, version, maximum key count per maze, record count
+    records     one fixed-width record per maze: width, length, robot
+                direction, true key index (1-based), key count, then the
+                door, exit and robot coordinates and max_keys key slots
+                (unused slots are zero)
+
+Records are all the same size, so the index is arithmetic: maze i starts
+at HEADER.size + i * record size. A worker opens the file (memory-mapped)
+and reads any maze without touching the others.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from typing import Iterable, Iterator, List
+from robotspeak.maze import Maze
+from robotspeak.grid import DIRECTIONS
+from robotspeak.generator import SeedSequence, generate_maze, parse_seed_range
+
+MAGIC = b"RSCP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+
+# most keys a maze from each LOAD environment can have
+ENV_MAX_KEYS = {"1": 1, "2": 1, "3": 5}
+
+def record_struct(max_keys: int) -> struct.Struct:
+    return struct.Struct(f"<IIBBBxIIIIII{2 * max_keys}I")
+
+def pack_maze(record: struct.Struct, max_keys: int, maze) -> bytes:
+    """Pack the fields Maze.__init__ takes into one record."""
+    keys = maze.key_locations
+    if len(keys) > max_keys:
+        raise ValueError(f"A maze has {len(keys)} keys but the corpus holds at most {max_keys}")
+    flat = [c for key in keys for c in key] + [0] * (2 * (max_keys - len(keys)))
+    return record.pack(maze.width, maze.length,
+                       DIRECTIONS.index(maze.robot_direction), maze.true_key_idx + 1, len(keys),
+                       *maze.door_location, *maze.exit_location, *maze.robot_location,
+                       *flat)
+
+def write_corpus(path: str, mazes: Iterable, max_keys: int) -> int:
+    """
+    Write mazes (not yet created, or created: only their constructor fields are stored) to a corpus file.
+
+    mazes is consumed lazily, so a generator of millions of mazes is fine.
+
+    Returns:
+        The number of mazes written
+
+    Raises:
+        ValueError: If a maze has more than max_keys keys
+    """
+    record = record_struct(max_keys)
+    count = 0
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, max_keys, 0))
+        for maze in mazes:
+            f.write(pack_maze(record, max_keys, maze))
+            count += 1
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, max_keys, count))
+    return count
+
+def build_corpus(path: str, env: str, seeds: Iterable[int], root_seed: int = None) -> int:
+    """
+    Generate the LOAD env maze for every seed and write them to a corpus file, in order.
+
+    Seeds map to mazes as in `robotspeak --seed` and `robotspeak batch --seeds`;
+    with root_seed they are indices of child streams of SeedSequence(root_seed).
+    """
+    root = None if root_seed is None else SeedSequence(root_seed)
+    mazes = (generate_maze(env, Maze, seed if root is None else root.child(seed)) for seed in seeds)
+    return write_corpus(path, mazes, ENV_MAX_KEYS[env])
+
+class Corpus:
+    """
+    A memory-mapped corpus file.
+
+    Supports len(), indexing (corpus[i] builds maze i, not yet created)
+    and lazy iteration. Use as a context manager, or call close().
+
+    Args:
+        path: Corpus file
+        maze_class: Class to build mazes with
+
+    Raises:
+        ValueError: If the file is not a corpus file, or is shorter than its header says
+    """
+    def __init__(self, path: str, maze_class: type = Maze):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size:
+                raise ValueError(f"{path} is too short to be a corpus file")
+            magic, version, self.max_keys, self._count = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} corpus file")
+            self._record = record_struct(self.max_keys)
+            end = HEADER.size + self._count * self._record.size
+            size = os.fstat(f.fileno()).st_size
+            if size < end:
+                raise ValueError(f"{path} is truncated: its {self._count} records need {end} bytes, the file has {size}")
+            self._buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        self.maze_class = maze_class
+
+    def __len__(self) -> int:
+        return self._count
+
+    def fields(self, index: int) -> dict:
+        """Return maze index's constructor arguments."""
+        if not 0 <= index < self._count:
+            raise IndexError(f"maze {index} is not in a corpus of {self._count}")
+        (width, length, direction, true_key_idx, num_keys,
+         door_x, door_y, exit_x, exit_y, robot_x, robot_y,
+         *keys) = self._record.unpack_from(self._buffer, HEADER.size + index * self._record.size)
+        return {
+            "width": width,
+            "length": length,
+            "key_locations": [[keys[2 * i], keys[2 * i + 1]] for i in range(num_keys)],
+            "door_location": [door_x, door_y],
+            "exit_location": [exit_x, exit_y],
+            "robot_location": [robot_x, robot_y],
+            "robot_direction": DIRECTIONS[direction],
+            "true_key_idx": true_key_idx,
+        }
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._count
+        return self.maze_class(**self.fields(index))
+
+    def __iter__(self) -> Iterator:
+        return self.mazes()
+
+    def mazes(self, start: int = 0, stop: int = None) -> Iterator:
+        """Yield mazes start to stop - 1 (to the end by default), building each only when reached."""
+        stop = self._count if stop is None else min(stop, self._count)
+        for index in range(start, stop):
+            yield self[index]
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def main(argv: List[str] = None) -> None:
+    """Entry point for `robotspeak corpus`."""
+    parser = argparse.ArgumentParser(
+        prog="robotspeak corpus",
+        description="Build or inspect indexed maze corpus files.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Generate mazes from a seed range into a corpus file.")
+    build.add_argument("path", type=str, help="The corpus file to write.")
+    build.add_argument("--env", choices=sorted(ENV_MAX_KEYS), required=True,
+                       help="The LOAD environment to generate mazes for.")
+    build.add_argument("--seeds", type=parse_seed_range, required=True,
+                       help="Seeds to generate mazes from, as START:STOP or a count N.")
+    build.add_argument("--root-seed", type=int, default=None,
+                       help="Treat --seeds as indices of independent streams derived from this seed.")
+
+    show = commands.add_parser("show", help="Print the size of a corpus file, or one of its mazes.")
+    show.add_argument("path", type=str, help="The corpus file to read.")
+    show.add_argument("--index", type=int, default=None, help="Draw this maze.")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "build":
+            count = build_corpus(args.path, args.env, args.seeds, args.root_seed)
+            print(f"Wrote {count} mazes to {args.path}")
+            return
+        with Corpus(args.path) as corpus:
+            if args.index is None:
+                print(f"{args.path}: {len(corpus)} mazes, up to {corpus.max_keys} keys each")
+                return
+            maze = corpus[args.index]
+            maze.create_initial_map()
+            print(corpus.fields(args.index))
+            maze.print_map()
+    except (OSError, ValueError, IndexError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,19 @@
+class SyntaxErrorException(Exception):
+    def __init__(self, description, lineNumber):
+        self.description = description
+        self.lineNumber = lineNumber
+        super().__init__(f"What ARE YOU DOING?!?!?!? SyntaxError: {description} at line {lineNumber} !!!!!")
+
+class RuntimeErrorException(Exception):
+    def __init__(self, description, lineNumber):
+        self.description = description
+        self.lineNumber = lineNumber
+        super().__init__(f"YOOOOOOOO!!!!! What are you doing at line {lineNumber} with this RuntimeError!!!?!?!?! {description}")
+
+class SyntaxErrors(SyntaxErrorException):
+    """Every error found in a program that has more than one; description and lineNumber are the first's."""
+    def __init__(self, errors: list):
+        self.errors = errors
+        self.description = errors[0].description
+        self.lineNumber = errors[0].lineNumber
+        Exception.__init__(self, "\n".join(str(e) for e in errors))
@@ -0,0 +1,145 @@
+"""
+Seeded, reproducible maze generation.
+
+Every maze is drawn from an explicit random.Random, never from the global
+random module. For bulk generation a SeedSequence derives an independent
+stream for each maze from a root seed and the maze's index alone, so
+maze i is the same whichever process generates it, in whatever order.
+"""
+import hashlib
+import random
+from typing import Iterator, List, Tuple
+from robotspeak.maze import Maze
+
+DIRECTIONS = ['north', 'west', 'south', 'east']
+
+class SeedSequence:
+    """
+    A root seed plus a spawn key, hashed into seeds for independent streams.
+
+    Children are addressed by index, so spawning is O(1) and needs no
+    coordination between processes: SeedSequence(7).child(3) is the same
+    everywhere.
+
+    Args:
+        entropy: Root seed; None draws one from the operating system
+        spawn_key: Path of child indices from the root
+    """
+    __slots__ = ("entropy", "spawn_key")
+
+    def __init__(self, entropy: int = None, spawn_key: Tuple[int, ...] = ()):
+        if entropy is None:
+            entropy = random.SystemRandom().getrandbits(128)
+        self.entropy = entropy
+        self.spawn_key = tuple(spawn_key)
+
+    def child(self, index: int) -> "SeedSequence":
+        """Return the index-th child sequence."""
+        return SeedSequence(self.entropy, self.spawn_key + (index,))
+
+    def spawn(self, count: int, start: int = 0) -> List["SeedSequence"]:
+        """Return children start to start + count - 1."""
+        return [self.child(index) for index in range(start, start + count)]
+
+    def generate_state(self) -> int:
+        """Return a 256-bit seed for this sequence's stream."""
+        text = ",".join(str(part) for part in (self.entropy,) + self.spawn_key)
+        return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=32).digest(), "little")
+
+    def rng(self) -> random.Random:
+        """Return a new random.Random seeded with this sequence's stream."""
+        return random.Random(self.generate_state())
+
+    def __repr__(self):
+        return f"SeedSequence({self.entropy}, spawn_key={self.spawn_key})"
+
+def parse_seed_range(text: str) -> range:
+    """Parse START:STOP (STOP exclusive) or a single count N meaning 0:N."""
+    if ":" in text:
+        start, stop = text.split(":", 1)
+        return range(int(start), int(stop))
+    return range(int(text))
+
+def make_rng(seed = None) -> random.Random:
+    """
+    Return a random.Random for seed: an int (used directly), a SeedSequence,
+    an existing random.Random (returned as is) or None (seeded from the OS).
+    """
+    if isinstance(seed, SeedSequence):
+        return seed.rng()
+    if seed is None or isinstance(seed, int):
+        return random.Random(seed)
+    return seed
+
+def sample_cells(rng: random.Random, width: int, length: int, count: int) -> List[List[int]]:
+    """
+    Return count distinct cells of a width x length room as [x, y] in 1-based coordinates.
+
+    Samples cell indices without replacement, so there is no rejection
+    loop however full the room is.
+    """
+    return [[index % width + 1, index // width + 1] for index in rng.sample(range(width * length), count)]
+
+def random_maze(rng: random.Random, num_keys: int, is_program1: bool = False, maze_class: type = Maze,
+                max_size: int = 20) -> Maze:
+    """Build a random room (a one-row corridor for program 1); create_initial_map is left to the caller."""
+    num_points = num_keys + 3 # number of keys + door + exit + robot
+
+    width = rng.randint(num_points + 1, max_size)
+    if is_program1:
+        length = 1
+    else:
+        length = rng.randint(num_points + 1, max_size)
+
+    locations = sample_cells(rng, width, length, num_points)
+    key_locations = locations[:-3]
+    door_location, exit_location, robot_location = locations[-3:]
+
+    robot_direction = rng.choice(DIRECTIONS)
+
+    return maze_class(width = width,
+                      length = length,
+                      key_locations = key_locations,
+                      door_location = door_location,
+                      exit_location = exit_location,
+                      robot_location = robot_location,
+                      robot_direction = robot_direction)
+
+def generate_maze(env: str, maze_class: type = Maze, rng = None) -> Maze:
+    """
+    Build a random maze of the kind LOAD <env> uses; create_initial_map is left to the caller.
+
+    Args:
+        env: "1", "2" or "3"
+        maze_class: Class to build
+        rng: Anything make_rng accepts
+    """
+    rng = make_rng(rng)
+    match env:
+        case "1":
+            return random_maze(rng, num_keys = 1, is_program1 = True, maze_class = maze_class)
+        case "2":
+            return random_maze(rng, num_keys = 1, maze_class = maze_class)
+        case "3":
+            return random_maze(rng, num_keys = rng.randint(2, 5), maze_class = maze_class)
+
+class MazeGenerator:
+    """
+    Deterministic bulk generator: maze i of a root seed comes from its own stream.
+
+    Args:
+        seed: Root seed (an int or a SeedSequence); None draws one from the OS
+        maze_class: Class to build
+    """
+    def __init__(self, seed = None, maze_class: type = Maze):
+        self.seed_sequence = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+        self.maze_class = maze_class
+
+    def maze(self, env: str, index: int) -> Maze:
+        """Return maze number index for LOAD env."""
+        return generate_maze(env, self.maze_class, self.seed_sequence.child(index))
+
+    def mazes(self, env: str, count: int, start: int = 0) -> Iterator[Maze]:
+        """Yield mazes start to start + count - 1 for LOAD env, lazily."""
+        for index in range(start, start + count):
+            yield self.maze(env, index)
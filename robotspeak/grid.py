@@ -0,0 +1,463 @@
+from typing import Tuple, List
+from robotspeak.maze import (
+    Maze,
+    MazeActionError,
+    ActionStatus,
+    ACTION_ERRORS,
+    MazeValidationError,
+    KEY_SYMBOL,
+    TRUE_KEY_SYMBOL,
+    DOOR_SYMBOL,
+    EXIT_SYMBOL,
+    WALL_SYMBOL,
+    EMPTY_SYMBOL,
+    ROBOT_SYMBOL,
+    ON_KEY_BIT,
+    AT_DOOR_BIT,
+    AT_EXIT_BIT,
+)
+from robotspeak.sinks import STDOUT
+
+# per-cell flag bits; KEY, DOOR and EXIT are the matching sensor_bits() flags
+KEY = ON_KEY_BIT
+DOOR = AT_DOOR_BIT
+EXIT = AT_EXIT_BIT
+TRUE_KEY = 16
+WALL = 32
+
+# directions are small ints; turning left adds 1, turning right subtracts 1 (mod 4)
+NORTH, WEST, SOUTH, EAST = range(4)
+DIRECTIONS = ('north', 'west', 'south', 'east')
+DIRECTION_ARROWS = ('▲', '◄', '▼', '►')
+DIRECTION_COORDINATES = ((0, -1), (-1, 0), (0, 1), (1, 0))
+
+class GridMaze:
+    """
+    A Maze with compact array-backed storage.
+
+    Offers the same sensors, actions and getters as Maze, but keeps the
+    whole grid (border walls included) in one bytearray of per-cell flag
+    bits instead of a list of lists of strings. Keys are additionally
+    indexed by cell so stacked keys are counted, the robot is a single
+    cell index and its direction a small int, so every sensor and action
+    is a handful of integer operations.
+
+    Cells are addressed by index = y * (width + 2) + x, using the same
+    1-based coordinates as Maze with the border at 0 and width + 1.
+    """
+    __slots__ = (
+        "width", "length", "key_locations", "true_key_idx", "true_key_location",
+        "door_location", "exit_location", "has_key", "has_true_key", "has_opened_door",
+        "sink", "_stride", "_cells", "_keys", "_start", "_pos", "_dir", "_steps", "_distances",
+    )
+
+    def __init__(self,
+                 width: int,
+                 length: int,
+                 key_locations: List[Tuple[int, int]],
+                 door_location: Tuple[int, int],
+                 exit_location: Tuple[int, int],
+                 robot_location: Tuple[int, int],
+                 robot_direction: str = 'north',
+                 true_key_idx: int = 1):
+        """Takes the same arguments as Maze.__init__."""
+        self.width = width
+        self.length = length
+        self.key_locations = key_locations
+        self.true_key_idx = true_key_idx - 1 # Convert to 0-based index
+        self.true_key_location = []
+        self.door_location = door_location
+        self.exit_location = exit_location
+
+        self._stride = width + 2
+        self._cells = bytearray()
+        self._keys = {} # cell index -> number of keys lying there
+        self.robot_location = robot_location
+        if robot_direction.lower() not in DIRECTIONS:
+            raise MazeValidationError(f"Direction must be one of: {list(DIRECTIONS)}")
+        self._dir = DIRECTIONS.index(robot_direction.lower())
+        self._steps = (-self._stride, -1, self._stride, 1)
+        self._distances = None # per-direction free cells ahead of each cell, built when first needed
+
+        self.has_key = False
+        self.has_true_key = False
+        self.has_opened_door = False
+
+        self.sink = None # where messages go; None means standard output
+
+    # robot state, exposed the way Maze exposes it
+    @property
+    def robot_location(self) -> List[int]:
+        return [self._pos % self._stride, self._pos // self._stride]
+
+    @robot_location.setter
+    def robot_location(self, location: List[int]) -> None:
+        # kept as given for validate_initial_inputs: an out-of-range location would wrap around once flattened
+        self._start = location
+        try:
+            self._pos = location[1] * self._stride + location[0]
+        except (TypeError, IndexError):
+            self._pos = None # not a location; validate_initial_inputs rejects it
+
+    @property
+    def robot_direction(self) -> str:
+        return DIRECTIONS[self._dir]
+
+    @robot_direction.setter
+    def robot_direction(self, direction: str) -> None:
+        self._dir = DIRECTIONS.index(direction)
+
+    @property
+    def robot_direction_coordinate(self) -> List[int]:
+        return list(DIRECTION_COORDINATES[self._dir])
+
+    # getters
+    def get_width(self) -> int:
+        """Return the maze width."""
+        return self.width
+
+    def get_length(self) -> int:
+        """Return the maze length."""
+        return self.length
+
+    def get_key_locations(self) -> List[Tuple[int, int]]:
+        """Return the list of key locations as [(x, y), ...]"""
+        return self.key_locations
+
+    def get_true_key_location(self) -> Tuple[int, int]:
+        """Return the true key location as (x, y)"""
+        return self.true_key_location
+
+    def get_door_location(self) -> Tuple[int, int]:
+        """Return the door location as (x, y)"""
+        return self.door_location
+
+    def get_exit_location(self) -> Tuple[int, int]:
+        """Return the exit location as (x, y)"""
+        return self.exit_location
+
+    def get_robot_location(self) -> Tuple[int, int]:
+        """Return the robot location as (x, y)"""
+        return self.robot_location
+
+    def get_robot_direction(self) -> str:
+        """Return the current robot direction as a string."""
+        return self.robot_direction
+
+    def get_map_matrix(self) -> list:
+        """Build and return a Maze-style map matrix (list of lists of symbol strings)."""
+        return [[self._cell_text(y * self._stride + x) for x in range(self._stride)]
+                for y in range(self.length + 2)]
+
+    def get_status(self) -> str:
+        """Return a descriptive status of the robot's state."""
+        if not self.has_key:
+            return ""
+        if self.has_true_key:
+            return "(Holding the TRUE key)"
+        return "(Holding a false key)"
+
+    # initial setup
+    def validate_initial_inputs(self) -> None:
+        """Validate all initial maze parameters with the same rules as Maze."""
+        Maze(width = self.width,
+             length = self.length,
+             key_locations = self.key_locations,
+             door_location = self.door_location,
+             exit_location = self.exit_location,
+             robot_location = self._start,
+             robot_direction = self.robot_direction,
+             true_key_idx = self.true_key_idx + 1).validate_initial_inputs()
+
+    def _index(self, location: List[int]) -> int:
+        return location[1] * self._stride + location[0]
+
+    def _add_key(self, index: int, true_key: bool) -> None:
+        self._keys[index] = self._keys.get(index, 0) + 1
+        self._cells[index] |= KEY
+        if true_key:
+            self._cells[index] |= TRUE_KEY
+
+    def _build_cells(self):
+        """Return the cell storage: border walls around empty floor."""
+        stride = self._stride
+        cells = bytearray([WALL]) * (stride * (self.length + 2))
+        for y in range(1, self.length + 1):
+            cells[y * stride + 1:y * stride + 1 + self.width] = bytes(self.width)
+        return cells
+
+    def create_initial_map(self) -> None:
+        """
+        Create the wall grid and place all objects.
+
+        Raises:
+            MazeValidationError: If any parameter is invalid
+        """
+        self.validate_initial_inputs()
+
+        self._cells = self._build_cells()
+        self._distances = None
+        self._keys = {}
+        for loc in self.key_locations:
+            self._add_key(self._index(loc), False)
+        self.true_key_location = self.key_locations[self.true_key_idx]
+        self._cells[self._index(self.true_key_location)] |= TRUE_KEY
+        self._cells[self._index(self.door_location)] |= DOOR
+        self._cells[self._index(self.exit_location)] |= EXIT
+
+    # sensors
+    def is_front_clear(self) -> bool:
+        """Check if the space directly in front of the robot is not a wall."""
+        return not self._cells[self._pos + self._steps[self._dir]] & WALL
+
+    def on_key(self) -> bool:
+        """Check if the robot is currently on any key location."""
+        return bool(self._cells[self._pos] & KEY)
+
+    def at_door(self) -> bool:
+        """Check if the robot is currently at the door location."""
+        return bool(self._cells[self._pos] & DOOR)
+
+    def at_exit(self) -> bool:
+        """Check if the robot is currently at the exit location."""
+        return bool(self._cells[self._pos] & EXIT)
+
+    def sensor_bits(self) -> int:
+        """Return every sensor at once (see Maze.sensor_bits): the robot's cell flags plus the front bit."""
+        cells = self._cells
+        pos = self._pos
+        return cells[pos] & (KEY | DOOR | EXIT) | (not cells[pos + self._steps[self._dir]] & WALL)
+
+    def wall_distance(self) -> int:
+        """Return how many cells the robot can move forward before a wall stops it (see Maze.wall_distance)."""
+        if self._distances is None:
+            self._distances = self._build_distances()
+        return self._distances[self._dir][self._pos]
+
+    def _build_distances(self) -> list:
+        """Return, for each direction, the free cells ahead of every cell index."""
+        cells = self._cells
+        size = len(cells)
+        tables = []
+        for step in self._steps:
+            table = [0] * size
+            # visit every cell after the cell in front of it; floor cells always have one
+            for index in (range(size) if step < 0 else range(size - 1, -1, -1)):
+                if not cells[index] & WALL and not cells[index + step] & WALL:
+                    table[index] = table[index + step] + 1
+            tables.append(table)
+        return tables
+
+    # actions; as on Maze, try_* returns an ActionStatus and the plain method raises
+    def move_forward(self) -> None:
+        """Move the robot one step forward in its current direction."""
+        status = self.try_move_forward()
+        if status:
+            raise MazeActionError(ACTION_ERRORS[status])
+
+    def try_move_forward(self) -> ActionStatus:
+        front = self._pos + self._steps[self._dir]
+        if self._cells[front] & WALL:
+            return ActionStatus.FRONT_BLOCKED
+        self._pos = front
+        return ActionStatus.OK
+
+    def advance(self, steps: int) -> None:
+        """
+        Move the robot steps cells forward at once, as that many move_forward calls would.
+
+        Raises:
+            MazeActionError: If a wall is fewer than steps cells ahead
+        """
+        if steps > self.wall_distance():
+            raise MazeActionError("Front is not clear, not moving forward")
+        self._pos += self._steps[self._dir] * steps
+
+    def turn_right(self) -> None:
+        """Turn the robot 90 degrees clockwise (right)."""
+        self._dir = (self._dir - 1) & 3
+
+    def turn_left(self) -> None:
+        """Turn the robot 90 degrees counter-clockwise (left)."""
+        self._dir = (self._dir + 1) & 3
+
+    def pick_key(self) -> None:
+        """Pick up a key if the robot is on one and not already holding one."""
+        status = self.try_pick_key()
+        if status:
+            raise MazeActionError(ACTION_ERRORS[status])
+
+    def try_pick_key(self) -> ActionStatus:
+        if self.has_key:
+            return ActionStatus.ALREADY_HOLDING_KEY
+        pos = self._pos
+        if not self._cells[pos] & KEY:
+            return ActionStatus.NOT_ON_KEY
+
+        self.has_key = True
+        remaining = self._keys[pos] - 1
+        if remaining:
+            self._keys[pos] = remaining
+        else:
+            del self._keys[pos]
+            self._cells[pos] &= ~KEY
+
+        if self._cells[pos] & TRUE_KEY or len(self.key_locations) == 1:
+            self.has_true_key = True
+            self._cells[pos] &= ~TRUE_KEY
+        else: # Must be a regular key
+            self.has_true_key = False
+        return ActionStatus.OK
+
+    def throw_away_key(self) -> None:
+        """Drops the currently held key at the robot's current location."""
+        status = self.try_throw_away_key()
+        if status:
+            raise MazeActionError(ACTION_ERRORS[status])
+
+    def try_throw_away_key(self) -> ActionStatus:
+        if not self.has_key:
+            return ActionStatus.NO_KEY_TO_THROW
+
+        sink = STDOUT if self.sink is None else self.sink
+        if sink.level:
+            sink.write(f"Throwing away key at {self.robot_location}.")
+
+        self._add_key(self._pos, self.has_true_key)
+        self.has_key = False
+        self.has_true_key = False
+        return ActionStatus.OK
+
+    def open_door(self) -> None:
+        """Open the door if at the door location and holding the true key."""
+        status = self.try_open_door()
+        if status:
+            raise MazeActionError(ACTION_ERRORS[status])
+
+    def try_open_door(self) -> ActionStatus:
+        cell = self._cells[self._pos]
+        if cell & EXIT:
+            self.has_opened_door = True
+            return ActionStatus.OK
+
+        if not cell & DOOR:
+            return ActionStatus.NOT_AT_DOOR
+        if not self.has_key:
+            return ActionStatus.NO_KEY
+        if not self.has_true_key:
+            return ActionStatus.WRONG_KEY
+        self.has_opened_door = True
+        sink = STDOUT if self.sink is None else self.sink
+        if sink.level:
+            sink.write("Door opened successfully!")
+        return ActionStatus.OK
+
+    # utilities
+    def _cell_text(self, index: int, robot: str = ROBOT_SYMBOL) -> str:
+        """Return the Maze-style symbol string for one cell."""
+        cell = self._cells[index]
+        if cell & WALL:
+            return WALL_SYMBOL
+        text = ""
+        if cell & KEY:
+            text += KEY_SYMBOL * self._keys[index]
+        if cell & TRUE_KEY:
+            text += TRUE_KEY_SYMBOL
+        if cell & DOOR:
+            text += DOOR_SYMBOL
+        if cell & EXIT:
+            text += EXIT_SYMBOL
+        if index == self._pos:
+            text += robot
+        return text or EMPTY_SYMBOL
+
+    def print_map(self, delimiter: str = ' ') -> None:
+        """
+        Print the current map to console, with the robot drawn as a direction arrow.
+
+        Args:
+            delimiter: Character to separate cells (default: space)
+        """
+        print(self.render(delimiter))
+
+    def render(self, delimiter: str = ' ') -> str:
+        """Return the current map as text, the way print_map shows it."""
+        arrow = DIRECTION_ARROWS[self._dir]
+        stride = self._stride
+        return '\n'.join(
+            delimiter.join(self._cell_text(y * stride + x, arrow) for x in range(stride))
+            for y in range(self.length + 2)
+        )
+
+    def render_cell(self, x: int, y: int) -> str:
+        """Return the text render shows for the cell at (x, y), robot drawn as a direction arrow."""
+        return self._cell_text(y * self._stride + x, DIRECTION_ARROWS[self._dir])
+
+    def state_key(self) -> tuple:
+        """Return a hashable snapshot of everything actions can change (see Maze.state_key)."""
+        cells = self._cells
+        return (
+            self._pos,
+            self._dir,
+            self.has_key,
+            self.has_true_key,
+            self.has_opened_door,
+            tuple(sorted((index, count, cells[index] & TRUE_KEY) for index, count in self._keys.items())),
+        )
+
+    def is_maze_solved(self) -> bool:
+        """Return True if robot is at exit, or has opened the door."""
+        return bool(self._cells[self._pos] & EXIT) or self.has_opened_door
+
+
+class SparseCells:
+    """
+    Cell flags for a rectangular room whose only walls are its border.
+
+    Supports the indexing GridMaze does on its bytearray, but walls are
+    computed from the coordinates and only cells holding objects are
+    stored, so memory is O(objects) instead of O(area).
+    """
+    __slots__ = ("_stride", "_width", "_length", "_objects")
+
+    def __init__(self, width: int, length: int):
+        self._stride = width + 2
+        self._width = width
+        self._length = length
+        self._objects = {} # cell index -> flags, for non-empty floor cells only
+
+    def __len__(self) -> int:
+        return self._stride * (self._length + 2)
+
+    def __getitem__(self, index: int) -> int:
+        flags = self._objects.get(index)
+        if flags is not None:
+            return flags
+        y, x = divmod(index, self._stride)
+        if 0 < x <= self._width and 0 < y <= self._length:
+            return 0
+        return WALL
+
+    def __setitem__(self, index: int, flags: int) -> None:
+        if flags:
+            self._objects[index] = flags
+        else:
+            self._objects.pop(index, None)
+
+class SparseMaze(GridMaze):
+    """
+    A GridMaze for very large rectangular rooms with no interior walls.
+
+    The border is implicit and keys, door and exit live in a dictionary
+    keyed by cell index, so a 100000 x 100000 room costs no more memory
+    than a 5 x 5 one. Sensors and actions behave exactly like Maze.
+    """
+    __slots__ = ()
+
+    def _build_cells(self) -> SparseCells:
+        return SparseCells(self.width, self.length)
+
+    def wall_distance(self) -> int:
+        """Return how many cells the robot can move forward before a wall stops it, from its coordinates alone."""
+        y, x = divmod(self._pos, self._stride)
+        return (y - 1, x - 1, self.length - y, self.width - x)[self._dir]
@@ -0,0 +1,178 @@
+"""
+Event hooks for robotspeak sessions.
+
+Callbacks are registered on an Interpreter with add_hook(event, callback):
+
+    on_statement(line)              after every statement: condition test, assignment or action
+    on_action(name, line)           after every action, whether or not it succeeded
+    on_sensor(name, value, line)    for every sensor a condition reads
+    on_solved(result)               when a run stops because the maze is solved
+    on_halt(result)                 when a run stops, for any reason (after on_solved)
+
+Statement, action and sensor hooks are applied when the code is linked,
+by wrapping only the callables they watch; a session with none of them
+links its code exactly as one without hooks. on_solved and on_halt are
+called from the run's result, so they cost nothing while it runs. The
+engine itself stops when OPEN_DOOR solves the maze, and with
+Limits(stop_when_solved=True) as soon as any move does, so these need
+not poll is_maze_solved().
+
+A condition evaluated as a truth-table lookup reads every sensor at once,
+and on_sensor sees all of them.
+"""
+from typing import Callable, List
+from robotspeak.maze import MazeStandIn
+from robotspeak.predicates import SENSOR_METHODS, SENSOR_BITS
+from robotspeak.vm import Termination, RunResult
+
+EVENTS = ("on_statement", "on_action", "on_sensor", "on_solved", "on_halt")
+
+def fan_out(callbacks: List[Callable]):
+    """Return one callable that calls every callback in turn, or None if there are none."""
+    if not callbacks:
+        return None
+    if len(callbacks) == 1:
+        return callbacks[0]
+    callbacks = tuple(callbacks)
+    def call_all(*args):
+        for callback in callbacks:
+            callback(*args)
+    return call_all
+
+class Hooks:
+    """The callbacks registered for each event."""
+    def __init__(self):
+        self.callbacks = {event: [] for event in EVENTS}
+
+    def add(self, event: str, callback: Callable) -> None:
+        """
+        Register callback for event.
+
+        Raises:
+            ValueError: If event is not one of EVENTS
+        """
+        if event not in self.callbacks:
+            raise ValueError(f"Unknown hook {event!r}; expected one of {', '.join(EVENTS)}")
+        self.callbacks[event].append(callback)
+
+    def remove(self, event: str, callback: Callable) -> None:
+        """Unregister callback for event; does nothing if it is not registered."""
+        if callback in self.callbacks.get(event, ()):
+            self.callbacks[event].remove(callback)
+
+    def recorder(self, inner = None):
+        """
+        Return the recorder a run should link with: inner itself (None
+        included) if no statement, action or sensor hooks are registered,
+        else a HookRecorder around it.
+        """
+        callbacks = self.callbacks
+        if not (callbacks["on_statement"] or callbacks["on_action"] or callbacks["on_sensor"]):
+            return inner
+        return HookRecorder(callbacks, inner)
+
+    def finished(self, result: RunResult) -> None:
+        """Call the on_solved and on_halt hooks for a run that ended with result."""
+        if result.reason == Termination.SOLVED:
+            for callback in self.callbacks["on_solved"]:
+                callback(result)
+        for callback in self.callbacks["on_halt"]:
+            callback(result)
+
+class HookedMaze(MazeStandIn):
+    """Sensors read through it are reported to on_sensor."""
+    def __init__(self, maze, recorder: "HookRecorder"):
+        super().__init__(maze)
+        on_sensor = recorder.on_sensor
+        for name, method_name in SENSOR_METHODS.items():
+            setattr(self, method_name, self._reported(getattr(maze, method_name), name, recorder, on_sensor))
+        if hasattr(maze, "sensor_bits"):
+            bits = maze.sensor_bits
+            sensors = tuple(SENSOR_BITS.items())
+            def sensor_bits():
+                value = bits()
+                line = recorder.line
+                for name, bit in sensors:
+                    on_sensor(name, bool(value & bit), line)
+                return value
+            self.sensor_bits = sensor_bits
+
+    @staticmethod
+    def _reported(method, name: str, recorder: "HookRecorder", on_sensor):
+        def read():
+            value = method()
+            on_sensor(name, value, recorder.line)
+            return value
+        return read
+
+class HookRecorder:
+    """
+    Recorder that calls a session's statement, action and sensor hooks.
+
+    Args:
+        callbacks: Event name -> list of callbacks, as in Hooks.callbacks
+        inner: Another recorder (a trace recorder or profiler) to run
+            inside this one, or None
+    """
+    def __init__(self, callbacks: dict, inner = None):
+        self.on_statement = fan_out(callbacks["on_statement"])
+        self.on_action = fan_out(callbacks["on_action"])
+        self.on_sensor = fan_out(callbacks["on_sensor"])
+        self.inner = inner
+        self.line = 0 # line of the condition being evaluated, for on_sensor
+
+    def start(self, maze, sink) -> tuple:
+        if self.inner is not None:
+            maze, sink = self.inner.start(maze, sink)
+        if self.on_sensor is not None:
+            maze = HookedMaze(maze, self)
+        return maze, sink
+
+    def condition(self, op: int, predicate, line: int):
+        if self.inner is not None:
+            predicate = self.inner.condition(op, predicate, line)
+        on_statement = self.on_statement
+        if self.on_sensor is not None:
+            def hooked():
+                self.line = line
+                result = predicate()
+                if on_statement is not None:
+                    on_statement(line)
+                return result
+            return hooked
+        if on_statement is not None:
+            def hooked():
+                result = predicate()
+                on_statement(line)
+                return result
+            return hooked
+        return predicate
+
+    def action(self, act, maze, name: str, line: int):
+        if self.inner is not None:
+            act = self.inner.action(act, maze, name, line)
+        on_statement, on_action = self.on_statement, self.on_action
+        if on_action is not None and on_statement is not None:
+            def hooked():
+                halt = act()
+                on_action(name, line)
+                on_statement(line)
+                return halt
+            return hooked
+        if on_action is not None:
+            def hooked():
+                halt = act()
+                on_action(name, line)
+                return halt
+            return hooked
+        if on_statement is not None:
+            def hooked():
+                halt = act()
+                on_statement(line)
+                return halt
+            return hooked
+        return act
+
+    def finish(self, result: RunResult) -> None:
+        if self.inner is not None:
+            self.inner.finish(result)
@@ -0,0 +1,262 @@
+"""
+Trace compilation of hot loops.
+
+vm.run counts the taken back-edges of every loop. Once a loop has come
+round JIT_THRESHOLD times, its next iteration is run by a recorder here
+that notes the path it takes: which way every condition went, and the
+actions and assignments in between. That path is compiled into a Python
+function that runs the iteration straight through, with no dispatch,
+for as long as every condition goes the same way again and no limit is
+due; the first condition that does not is a side exit, and the VM
+carries on from wherever it leads.
+
+Conditions evaluated back to back, with no action or assignment in
+between, see the same sensors and variables. Where the maze's
+sensor_bits() can be trusted (see predicates.compile_condition), such a
+run of conditions becomes one guard: a table lookup on sensor_bits() and
+the variables they read, which holds only for the values observed when
+the trace was recorded. When it fails, the conditions are tested one by
+one to find the exit.
+
+Traces are only used when nothing watches the run: no recorder (trace,
+profile, hooks or stats) and no cycle detection.
+
+Neither a trace's code nor its guard tables depend on the maze, only on
+the program, so both are kept across runs: a batch that runs one program
+on many mazes records the same traces in every run, and only compiles
+them once.
+"""
+import sys
+from robotspeak.maze import is_kept_in_step
+from robotspeak.predicates import (
+    SENSOR_METHODS,
+    SENSOR_DEPENDENCIES,
+    VARIABLE_SHIFT,
+    MAX_TABLE_VARIABLES,
+    evaluate,
+    variables_in,
+)
+from robotspeak.vm import LOAD_ENV, ACTION, JUMP_IF_FALSE, JUMP, STORE, LOOP_IF_TRUE, LOOP, HALT, MOVE_WHILE
+
+# taken back-edges before a loop's next iteration is recorded
+JIT_THRESHOLD = 32
+
+# instructions a recorded iteration may execute; longer ones are not traced
+MAX_TRACE_LENGTH = 256
+
+# a trace that side-exits within MIN_ITERATIONS iterations MAX_MISSES times in a row is recorded again,
+# and a loop recorded MAX_RECORDINGS times without a trace that sticks is left to the VM
+MIN_ITERATIONS = 2
+MAX_MISSES = 8
+MAX_RECORDINGS = 4
+
+# instructions a recording stops in front of, leaving them to the VM
+UNTRACEABLE = (LOAD_ENV, HALT, MOVE_WHILE)
+
+# compiled traces and guard tables kept across runs, by source and by conditions;
+# a cache that fills up is emptied
+CACHE_SIZE = 1024
+_compiled = {}
+_tables = {}
+
+def cached(cache: dict, key, build):
+    """Return cache[key], calling build() for it if it is not there yet."""
+    value = cache.get(key)
+    if value is None:
+        if len(cache) >= CACHE_SIZE:
+            cache.clear()
+        value = cache[key] = build()
+    return value
+
+class LoopJit:
+    """
+    The traces of one run's loops.
+
+    Args:
+        code: The code as compiled, for the conditions' expression trees
+        linked: The same code linked against maze
+        maze: The loaded maze
+        slots: The run's variable slots
+    """
+    def __init__(self, code: list, linked: list, maze, slots: list):
+        self.code = code
+        self.linked = linked
+        self.maze = maze
+        self.slots = slots
+        self.heat = [0] * len(linked)     # taken back-edges to each pc since it was last recorded
+        self.traces = [None] * len(linked)
+        self.recordings = [0] * len(linked)
+        self.misses = [0] * len(linked)
+        self.merge = hasattr(maze, "sensor_bits") and is_kept_in_step(
+            maze, "sensor_bits", *SENSOR_METHODS.values(), *SENSOR_DEPENDENCIES)
+
+    def enter(self, header: int, statements: int, actions: int, checkpoint: int, max_actions: int) -> tuple:
+        """
+        Called by the VM after a taken back-edge to header: run the loop's
+        trace if it has one, or record one if the loop has become hot.
+
+        Statements and actions are executed exactly as the VM would, and
+        none past checkpoint or max_actions.
+
+        Returns:
+            (pc, statements, actions, solved): where and with what counts
+            the VM carries on, and whether an action solved the maze (pc is
+            then just past it)
+        """
+        trace = self.traces[header]
+        if trace is not None:
+            pc, after, actions, solved = trace(statements, actions, checkpoint, max_actions)
+            if pc == header or solved:
+                return pc, after, actions, solved
+            if after - statements < MIN_ITERATIONS * trace.statements:
+                self.misses[header] += 1
+                if self.misses[header] >= MAX_MISSES:
+                    self.traces[header] = None
+                    self._cool(header)
+            else:
+                self.misses[header] = 0
+            return pc, after, actions, False
+
+        heat = self.heat[header] + 1
+        self.heat[header] = heat
+        if heat < JIT_THRESHOLD:
+            return header, statements, actions, False
+        return self.record(header, statements, actions, checkpoint, max_actions)
+
+    def _cool(self, header: int) -> None:
+        """Start counting the loop's back-edges again, unless it has been recorded too often."""
+        self.heat[header] = 0 if self.recordings[header] < MAX_RECORDINGS else -sys.maxsize
+
+    def record(self, header: int, statements: int, actions: int, checkpoint: int, max_actions: int) -> tuple:
+        """Run one iteration from header, as the VM would, and compile the path it takes; returns as enter."""
+        self.recordings[header] += 1
+        self._cool(header)
+        linked = self.linked
+        path = [] # (pc, outcome) for every statement; outcome is None for actions and assignments
+        pc = header
+        while len(path) < MAX_TRACE_LENGTH:
+            op, arg, dest, _ = linked[pc]
+            if op == JUMP:
+                pc = dest
+                continue
+            if op in UNTRACEABLE or statements == checkpoint:
+                break
+            if op == ACTION:
+                if actions == max_actions:
+                    break
+                statements += 1
+                actions += 1
+                if arg():
+                    return pc + 1, statements, actions, True
+                path.append((pc, None))
+                pc += 1
+            elif op == STORE:
+                statements += 1
+                self.slots[dest] = arg()
+                path.append((pc, None))
+                pc += 1
+            elif op == JUMP_IF_FALSE:
+                statements += 1
+                outcome = bool(arg())
+                path.append((pc, outcome))
+                pc = pc + 1 if outcome else dest
+            else: # LOOP_IF_TRUE or LOOP
+                statements += 1
+                outcome = op == LOOP or bool(arg())
+                path.append((pc, outcome))
+                if not outcome:
+                    pc += 1
+                    continue
+                pc = dest
+                if dest == header:
+                    self.traces[header] = compile_trace(self, header, path)
+                    self.misses[header] = 0
+                    break
+        return pc, statements, actions, False
+
+def compile_trace(jit: LoopJit, header: int, path: list):
+    """
+    Compile a recorded iteration into a function taking and returning the
+    VM's counts as LoopJit.enter does. Its statements attribute is the
+    number of statements in one iteration.
+    """
+    code, linked = jit.code, jit.linked
+    namespace = {"slots": jit.slots, "bits": getattr(jit.maze, "sensor_bits", None)}
+    body = []
+    group = [] # conditions since the last action or assignment: (pc, outcome, exit, statements before)
+    guards = 0 # guard tables so far; a pc the trace passes twice may need a different table each time
+    statements = actions = 0
+
+    def exit_line(pc, outcome, exit, done):
+        namespace[f"c{pc}"] = linked[pc][1]
+        test = f"not c{pc}()" if outcome else f"c{pc}()"
+        return f"if {test}: return {exit}, statements + {done + 1}, actions + {actions}, False"
+
+    def flush():
+        nonlocal guards
+        tests = [entry for entry in group if entry[0] is not None]
+        reads = {}
+        for pc, _, _, _ in tests:
+            for var in variables_in(code[pc][1]):
+                reads.setdefault(var.name, var)
+        if (len(tests) < 2 or not jit.merge or len(reads) > MAX_TABLE_VARIABLES
+                or any(var.guarded for var in reads.values())):
+            body.extend(exit_line(*entry) for entry in tests)
+        else:
+            names = list(reads)
+            def build():
+                return tuple(
+                    all(evaluate(code[pc][1], index & ((1 << VARIABLE_SHIFT) - 1),
+                                 {name: bool(index >> (VARIABLE_SHIFT + i) & 1) for i, name in enumerate(names)})
+                        == outcome for pc, outcome, _, _ in tests)
+                    for index in range(1 << (VARIABLE_SHIFT + len(names)))
+                )
+            # the conditions' reprs name their sensors and variables, so they decide the table
+            key = tuple((repr(code[pc][1]), outcome) for pc, outcome, _, _ in tests)
+            guard = f"g{guards}"
+            guards += 1
+            namespace[guard] = cached(_tables, key, build)
+            index = "bits()" + "".join(f" | slots[{reads[name].slot}] << {VARIABLE_SHIFT + i}"
+                                       for i, name in enumerate(names))
+            body.append(f"if not {guard}[{index}]:")
+            # only reached if a condition went the other way; find the first
+            body.extend("    " + exit_line(*entry) for entry in tests)
+        group.clear()
+
+    for pc, outcome in path:
+        op, _, dest, _ = linked[pc]
+        if op == ACTION:
+            flush()
+            namespace[f"a{pc}"] = linked[pc][1]
+            body.append(f"if a{pc}(): return {pc + 1}, statements + {statements + 1}, "
+                        f"actions + {actions + 1}, True")
+            actions += 1
+        elif op == STORE:
+            flush()
+            namespace[f"c{pc}"] = linked[pc][1]
+            body.append(f"slots[{dest}] = c{pc}()")
+        elif op == LOOP:
+            group.append((None, outcome, None, statements))
+        else:
+            # the exit is wherever the other outcome leads
+            taken_when_true = op == LOOP_IF_TRUE
+            exit = (pc + 1 if outcome else dest) if taken_when_true else (dest if outcome else pc + 1)
+            group.append((pc, outcome, exit, statements))
+        statements += 1
+    flush()
+
+    test = f"statements <= checkpoint - {statements}"
+    if actions:
+        test += f" and actions <= max_actions - {actions}"
+    lines = ["def trace(statements, actions, checkpoint, max_actions):",
+             f"    while {test}:"]
+    lines.extend("        " + line for line in body)
+    lines.append(f"        statements += {statements}")
+    if actions:
+        lines.append(f"        actions += {actions}")
+    lines.append(f"    return {header}, statements, actions, False")
+    source = '\n'.join(lines)
+    exec(cached(_compiled, source, lambda: compile(source, f"<trace of loop at {header}>", "exec")), namespace)
+    trace = namespace["trace"]
+    trace.statements = statements
+    return trace
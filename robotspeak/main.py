@@ -1,10 +1,17 @@
 import argparse
+import random
 import sys
 from robotspeak.compiler import (
-    compiler,
+    Interpreter,
     SyntaxErrorException,
     RuntimeErrorException,
 )
+from robotspeak.vm import Limits
+from robotspeak.sinks import QUIET, ACTIONS, MAPS, TerminalSink, FileSink, AnsiSink
+from robotspeak.trace import TraceRecorder
+from robotspeak.profiler import LineProfiler
+from robotspeak.stats import RunStats
+from robotspeak.optimizer import MAX_LEVEL
 
 
 def main():
@@ -12,7 +19,29 @@ def main():
     The main entry point for the Robotspeak CLI.
     Parses command-line arguments, reads the source file,
     and executes the compiler.
+
+    `robotspeak batch ...` is handed to robotspeak.batch.main,
+    `robotspeak replay ...` to robotspeak.trace.main,
+    `robotspeak corpus ...` to robotspeak.corpus.main and
+    `robotspeak check ...` to robotspeak.check.main.
     """
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from robotspeak.batch import main as batch_main
+        batch_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        from robotspeak.trace import main as replay_main
+        replay_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "corpus":
+        from robotspeak.corpus import main as corpus_main
+        corpus_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        from robotspeak.check import main as check_main
+        check_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Robotspeak Interpreter: Executes a .txt file containing Robotspeak code."
     )
@@ -21,8 +50,135 @@ def main():
         type=str,
         help="The path to the Robotspeak source file (.txt).",
     )
+    parser.add_argument(
+        "--max-statements",
+        type=int,
+        default=None,
+        help="Stop after this many executed statements.",
+    )
+    parser.add_argument(
+        "--max-actions",
+        type=int,
+        default=None,
+        help="Stop after this many robot actions.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Stop after this many seconds of execution.",
+    )
+
+    parser.add_argument(
+        "--stop-when-solved",
+        action="store_true",
+        help="Stop as soon as the maze is solved, e.g. when the robot moves onto the exit, "
+             "instead of only when OPEN_DOOR solves it.",
+    )
+    parser.add_argument(
+        "--detect-cycles",
+        action="store_true",
+        help="Stop as soon as the program provably loops forever.",
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Report nothing while the program runs.",
+    )
+    verbosity.add_argument(
+        "--actions-only",
+        action="store_true",
+        help="Report actions and warnings, but do not draw the maze.",
+    )
+    verbosity.add_argument(
+        "--live",
+        action="store_true",
+        help="Redraw the maze in place in the terminal instead of printing every step.",
+    )
+    parser.add_argument(
+        "--fps",
+        type=float,
+        default=30.0,
+        help="With --live, draw at most this many frames per second (0 for no limit).",
+    )
+    parser.add_argument(
+        "--render-every",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Draw the maze only after every Nth move or turn (not with --live).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for the maze LOAD generates, to make the run reproducible.",
+    )
+    parser.add_argument(
+        "-O",
+        dest="optimize",
+        type=int,
+        nargs="?",
+        const=1,
+        default=0,
+        choices=range(MAX_LEVEL + 1),
+        metavar="LEVEL",
+        help="Optimise the program first: -O1 folds constants and drops dead code, "
+             "-O2 also merges turns (fewer turns in the output) and unswitches loops. -O alone means -O1.",
+    )
+    parser.add_argument(
+        "--no-jit",
+        dest="jit",
+        action="store_false",
+        help="Do not compile hot loops into straight-line code; run every instruction through the VM.",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Record a binary trace of the run to this file (see `robotspeak replay`).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="After the run, report for every line how often it ran, the time it took and "
+             "the sensor calls, actions and maps it made.",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="After the run, summarise its counters (statements, actions, sensor reads, ...) "
+             "and the time spent parsing, compiling, loading and executing.",
+    )
+    parser.add_argument(
+        "--stats-json",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Write the same counters and timings to this file as JSON.",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write the run's report to this file instead of the terminal (not with --live).",
+    )
 
     args = parser.parse_args()
+    if args.render_every < 1:
+        parser.error("--render-every must be at least 1")
+    if args.profile and args.trace:
+        parser.error("--profile and --trace cannot be used together")
+    if args.live and args.output:
+        parser.error("--live draws in the terminal and cannot be used with --output")
+    if args.live and args.render_every != 1:
+        parser.error("--live redraws only changed cells; use --fps instead of --render-every to draw fewer frames")
+    level = QUIET if args.quiet else ACTIONS if args.actions_only else MAPS
+    limits = Limits(max_statements=args.max_statements,
+                    max_actions=args.max_actions,
+                    max_seconds=args.timeout,
+                    stop_when_solved=args.stop_when_solved)
 
     try:
         with open(args.filepath, "r") as f:
@@ -34,9 +190,46 @@ def main():
         print(f"Error: Could not read the file '{args.filepath}': {e}", file=sys.stderr)
         sys.exit(1)
 
+    try:
+        if args.live:
+            sink = AnsiSink(max_fps=args.fps)
+        elif args.output:
+            sink = FileSink(args.output, level, args.render_every)
+        else:
+            sink = TerminalSink(level=level, render_every=args.render_every)
+    except OSError as e:
+        print(f"Error: Could not open the output file '{args.output}': {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # without --seed, mazes come from the shared random module as before
+    session = Interpreter(rng=random if args.seed is None else args.seed, sink=sink, jit=args.jit)
+
+    stats = RunStats() if args.stats or args.stats_json else None
+
     print(f"--- Starting Robotspeak Interpreter for {args.filepath} ---")
     try:
-        compiler(source_code)
+        with sink:
+            if args.trace:
+                with TraceRecorder(args.trace) as recorder:
+                    result = session.run(source_code, limits, args.detect_cycles, recorder, args.optimize, stats)
+            else:
+                profiler = LineProfiler() if args.profile else None
+                result = session.run(source_code, limits, args.detect_cycles, profiler, args.optimize, stats)
+        if args.profile:
+            print(f"\n--- Profile ---\n{profiler.report(source_code)}")
+        if args.stats:
+            print(f"\n--- Stats ---\n{stats.summary()}")
+        if args.stats_json:
+            with open(args.stats_json, "w") as f:
+                f.write(stats.to_json(indent=2) + "\n")
+        if result.cycle_length is not None:
+            print(f"\n--- Program stopped: it loops forever (a cycle of {result.cycle_length} statements "
+                  f"through the WHILE at line {result.line}). ---", file=sys.stderr)
+            sys.exit(2)
+        if not result.finished:
+            print(f"\n--- Program stopped: {result.reason.value} reached at line {result.line} "
+                  f"after {result.statements} statements and {result.actions} actions. ---", file=sys.stderr)
+            sys.exit(2)
         print("\n--- Program finished successfully. ---")
     except (SyntaxErrorException, RuntimeErrorException) as e:
         # Your custom exceptions already print nicely formatted messages
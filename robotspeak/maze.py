@@ -1,5 +1,7 @@
+from enum import IntEnum
 from typing import Tuple, List
 from itertools import combinations
+from robotspeak.sinks import STDOUT
 
 KEY_SYMBOL = "K"
 TRUE_KEY_SYMBOL = "˖"
@@ -9,6 +11,12 @@ WALL_SYMBOL = "*"
 EMPTY_SYMBOL = "."
 ROBOT_SYMBOL = "R"
 
+# sensor_bits() flags, one per sensor
+FRONT_IS_CLEAR_BIT = 1
+ON_KEY_BIT = 2
+AT_DOOR_BIT = 4
+AT_EXIT_BIT = 8
+
 class MazeValidationError(Exception):
     """Custom exception for maze validation errors"""
     pass
@@ -17,6 +25,62 @@ class MazeActionError(Exception):
     """Custom exception for maze action errors"""
     pass
 
+class ActionStatus(IntEnum):
+    """Outcome of a try_* action. OK is 0, so any failure is true."""
+    OK = 0
+    FRONT_BLOCKED = 1
+    ALREADY_HOLDING_KEY = 2
+    NOT_ON_KEY = 3
+    NO_KEY_TO_THROW = 4
+    NOT_AT_DOOR = 5
+    NO_KEY = 6
+    WRONG_KEY = 7
+
+# the MazeActionError message for each failure
+ACTION_ERRORS = {
+    ActionStatus.FRONT_BLOCKED: "Front is not clear, not moving forward",
+    ActionStatus.ALREADY_HOLDING_KEY: "Already holding a key.",
+    ActionStatus.NOT_ON_KEY: "Not on an available key.",
+    ActionStatus.NO_KEY_TO_THROW: "Not holding any key to throw away.",
+    ActionStatus.NOT_AT_DOOR: "Not at the door.",
+    ActionStatus.NO_KEY: "Not holding any key.",
+    ActionStatus.WRONG_KEY: "Wrong key! Cannot open the door.",
+}
+
+def is_kept_in_step(maze, shortcut: str, *methods: str) -> bool:
+    """
+    Return True if maze's shortcut method can stand in for methods: none of
+    them is overridden by a subclass of the class that defines shortcut.
+
+    A subclass that changes what a sensor or action does without also
+    changing the shortcut is not trusted to keep the two consistent.
+    """
+    # __class__ rather than type(), so that a MazeStandIn answers for the maze it wraps
+    mro = maze.__class__.__mro__
+    def owner(name):
+        return next(i for i, cls in enumerate(mro) if name in cls.__dict__)
+    home = owner(shortcut)
+    return all(owner(name) >= home for name in methods if hasattr(maze, name))
+
+class MazeStandIn:
+    """
+    Base for objects that stand in for a maze when code is linked, to watch the calls made to it.
+
+    Subclasses set wrapped methods on the instance; everything else is read
+    from the maze. __class__ is the maze's, so is_kept_in_step and
+    isinstance answer as they would for the maze, and linking makes the
+    same choices.
+    """
+    def __init__(self, maze):
+        self._maze = maze
+
+    @property
+    def __class__(self):
+        return self._maze.__class__
+
+    def __getattr__(self, name):
+        return getattr(self._maze, name)
+
 class Maze:
     """
     A maze environment with a robot that can navigate, collect keys, and reach exits.
@@ -75,6 +139,14 @@ class Maze:
         self.has_key = False
         self.has_true_key = False
         self.has_opened_door = False
+
+        self.sink = None # where messages go; None means standard output
+
+        # per-direction tables of free cells ahead, built from map_matrix when first needed
+        self._wall_distances = None
+        self._wall_distance_map = None
+        self._cell_bits = {} # cell text -> its sensor_bits() object bits
+        self._sensor_bits = None # sensor_bits() until the map or robot changes
     
     # getters
     def get_width(self) -> int:
@@ -136,6 +208,7 @@ class Maze:
         Note: If location already has content, symbol is appended.
         """
         x_coordinate, y_coordinate = location
+        self._sensor_bits = None
 
         if self.map_matrix[y_coordinate][x_coordinate] == self.empty_symbol:
             self.map_matrix[y_coordinate][x_coordinate] = symbol
@@ -147,6 +220,7 @@ class Maze:
         """Update robot_direction_coordinate based on current robot_direction."""
         direction_idx = self._all_directions.index(self.robot_direction)
         self.robot_direction_coordinate = self._all_direction_coordinates[direction_idx]
+        self._sensor_bits = None
     
     def set_true_key_location(self):
         self.true_key_location = self.key_locations[self.true_key_idx]
@@ -297,8 +371,80 @@ class Maze:
             True if robot's current position contains the exit symbol
         """
         return self.exit_symbol in self.map_matrix[self.robot_location[1]][self.robot_location[0]]
+
+    def wall_distance(self) -> int:
+        """
+        Return how many cells the robot can move forward before a wall stops it.
+
+        Looked up in per-cell, per-direction tables. Walls never change once
+        the map is made, so the tables are built the first time they are
+        needed and again only if map_matrix is replaced.
+        """
+        if self._wall_distance_map is not self.map_matrix:
+            self._wall_distances = self._build_wall_distances()
+            self._wall_distance_map = self.map_matrix
+        x, y = self.robot_location
+        direction_idx = self._all_direction_coordinates.index(self.robot_direction_coordinate)
+        return self._wall_distances[direction_idx][y][x]
+
+    def sensor_bits(self) -> int:
+        """
+        Return every sensor at once: FRONT_IS_CLEAR_BIT, ON_KEY_BIT,
+        AT_DOOR_BIT and AT_EXIT_BIT are set when the matching sensor is true.
+
+        The value is kept until an action or set_location changes the map or
+        the robot, so conditions tested between two actions share it. The
+        object bits of a cell depend only on its text and are looked up in a
+        table keyed by it, filled in as new cell texts turn up.
+        """
+        bits = self._sensor_bits
+        if bits is not None:
+            return bits
+        x, y = self.robot_location
+        dx, dy = self.robot_direction_coordinate
+        current_cell = self.map_matrix[y][x]
+        bits = self._cell_bits.get(current_cell)
+        if bits is None:
+            bits = self._cell_bits[current_cell] = self._object_bits(current_cell)
+        if self.map_matrix[y + dy][x + dx] != self.wall_symbol:
+            bits |= FRONT_IS_CLEAR_BIT
+        self._sensor_bits = bits
+        return bits
+
+    def _object_bits(self, cell: str) -> int:
+        bits = 0
+        if self.key_symbol in cell or self.true_key_symbol in cell:
+            bits |= ON_KEY_BIT
+        if self.door_symbol in cell:
+            bits |= AT_DOOR_BIT
+        if self.exit_symbol in cell:
+            bits |= AT_EXIT_BIT
+        return bits
+
+    def _build_wall_distances(self) -> list:
+        """Return, for each direction, a matrix of the free cells ahead of every cell."""
+        matrix = self.map_matrix
+        tables = []
+        for dx, dy in self._all_direction_coordinates:
+            table = [[0] * len(row) for row in matrix]
+            # visit every cell after the cell in front of it
+            rows = range(len(matrix)) if dy <= 0 else range(len(matrix) - 1, -1, -1)
+            for y in rows:
+                front_y = y + dy
+                if not 0 <= front_y < len(matrix):
+                    continue
+                columns = range(len(matrix[y])) if dx <= 0 else range(len(matrix[y]) - 1, -1, -1)
+                for x in columns:
+                    front_x = x + dx
+                    if (0 <= front_x < len(matrix[front_y])
+                            and matrix[y][x] != self.wall_symbol
+                            and matrix[front_y][front_x] != self.wall_symbol):
+                        table[y][x] = table[front_y][front_x] + 1
+            tables.append(table)
+        return tables
     
-    # actions
+    # actions; each try_* method does the work and returns an ActionStatus,
+    # and the method of the same name without try_ raises MazeActionError instead
     def move_forward(self) -> None:
         """
         Move the robot one step forward in its current direction.
@@ -306,9 +452,31 @@ class Maze:
         Does nothing if the front is blocked. Updates robot position
         and map matrix accordingly.
         """
+        status = self.try_move_forward()
+        if status:
+            raise MazeActionError(ACTION_ERRORS[status])
+
+    def try_move_forward(self) -> ActionStatus:
         if not self.is_front_clear():
+            return ActionStatus.FRONT_BLOCKED
+        self._move_robot(1)
+        return ActionStatus.OK
+
+    def advance(self, steps: int) -> None:
+        """
+        Move the robot steps cells forward at once, leaving the maze exactly
+        as that many move_forward calls would.
+
+        Raises:
+            MazeActionError: If a wall is fewer than steps cells ahead
+        """
+        if steps > self.wall_distance():
             raise MazeActionError("Front is not clear, not moving forward")
-        
+        if steps:
+            self._move_robot(steps)
+
+    def _move_robot(self, steps: int) -> None:
+        self._sensor_bits = None
         # removing previous robot
         robot_place = self.map_matrix[self.robot_location[1]][self.robot_location[0]]
         if robot_place == self.robot_symbol:
@@ -317,8 +485,8 @@ class Maze:
             self.map_matrix[self.robot_location[1]][self.robot_location[0]] = robot_place.replace(self.robot_symbol, "")
         
         # moving the robot
-        robot_x_new = self.robot_location[0] + self.robot_direction_coordinate[0]
-        robot_y_new = self.robot_location[1] + self.robot_direction_coordinate[1]
+        robot_x_new = self.robot_location[0] + self.robot_direction_coordinate[0] * steps
+        robot_y_new = self.robot_location[1] + self.robot_direction_coordinate[1] * steps
         self.robot_location = [robot_x_new, robot_y_new]
         self.set_location(self.robot_location, self.robot_symbol)
     
@@ -328,6 +496,7 @@ class Maze:
 
         self.robot_direction = self._all_directions[current_idx - 1]
         self.robot_direction_coordinate = self._all_direction_coordinates[current_idx - 1]
+        self._sensor_bits = None
 
     def turn_left(self) -> None:
         """Turn the robot 90 degrees counter-clockwise (left)."""
@@ -335,16 +504,23 @@ class Maze:
 
         self.robot_direction = self._all_directions[(current_idx + 1) % 4]
         self.robot_direction_coordinate = self._all_direction_coordinates[(current_idx + 1) % 4]
+        self._sensor_bits = None
 
     def pick_key(self) -> None:
         """Pick up a key if the robot is on one and not already holding one."""
+        status = self.try_pick_key()
+        if status:
+            raise MazeActionError(ACTION_ERRORS[status])
+
+    def try_pick_key(self) -> ActionStatus:
         if self.has_key:
-            raise MazeActionError("Already holding a key.")
+            return ActionStatus.ALREADY_HOLDING_KEY
         if not self.on_key():
-            raise MazeActionError("Not on an available key.")
+            return ActionStatus.NOT_ON_KEY
         
         x, y = self.robot_location
         current_cell = self.map_matrix[y][x]
+        self._sensor_bits = None
 
         self.has_key = True
         current_cell = current_cell.replace(self.key_symbol, "", 1)
@@ -360,13 +536,21 @@ class Maze:
             self.map_matrix[y][x] = self.robot_symbol
         else:
             self.map_matrix[y][x] = current_cell
+        return ActionStatus.OK
 
     def throw_away_key(self) -> None:
         """Drops the currently held key at the robot's current location."""
+        status = self.try_throw_away_key()
+        if status:
+            raise MazeActionError(ACTION_ERRORS[status])
+
+    def try_throw_away_key(self) -> ActionStatus:
         if not self.has_key:
-            raise MazeActionError("Not holding any key to throw away.")
+            return ActionStatus.NO_KEY_TO_THROW
         
-        print(f"Throwing away key at {self.robot_location}.")
+        sink = STDOUT if self.sink is None else self.sink
+        if sink.level:
+            sink.write(f"Throwing away key at {self.robot_location}.")
         
         # Add key back to map and update state
         self.set_location(self.robot_location, self.key_symbol)
@@ -375,22 +559,30 @@ class Maze:
         if self.has_true_key:
             self.set_location(self.robot_location, self.true_key_symbol)
             self.has_true_key = False
+        return ActionStatus.OK
 
     def open_door(self) -> None:
         """Open the door if at the door location and holding the true key."""
+        status = self.try_open_door()
+        if status:
+            raise MazeActionError(ACTION_ERRORS[status])
+
+    def try_open_door(self) -> ActionStatus:
         if self.at_exit():
             self.has_opened_door = True
-            return
+            return ActionStatus.OK
 
         if not self.at_door():
-            raise MazeActionError("Not at the door.")
+            return ActionStatus.NOT_AT_DOOR
         if not self.has_key:
-            raise MazeActionError("Not holding any key.")
-        if self.has_true_key:
-            self.has_opened_door = True
-            print("Door opened successfully!")
-        else:
-            raise MazeActionError("Wrong key! Cannot open the door.")
+            return ActionStatus.NO_KEY
+        if not self.has_true_key:
+            return ActionStatus.WRONG_KEY
+        self.has_opened_door = True
+        sink = STDOUT if self.sink is None else self.sink
+        if sink.level:
+            sink.write("Door opened successfully!")
+        return ActionStatus.OK
 
     # utilities
     def print_map(self, delimiter: str = ' ') -> None:
@@ -400,24 +592,57 @@ class Maze:
         Args:
             delimiter: Character to separate matrix elements (default: space)
         """
-        display_matrix = [row[:] for row in self.map_matrix]
-    
-        # Replace robot symbol with direction arrow
+        print(self.render(delimiter))
+
+    def render(self, delimiter: str = ' ') -> str:
+        """
+        Return the current map matrix as text, the way print_map shows it.
+
+        Args:
+            delimiter: Character to separate matrix elements (default: space)
+        """
+        # Only the robot's row needs copying, to draw the direction arrow in it
         robot_x, robot_y = self.robot_location
-        current_cell = display_matrix[robot_y][robot_x]
-        
+        rows = []
+        for y, map_row in enumerate(self.map_matrix):
+            if y == robot_y:
+                map_row = map_row[:]
+                map_row[robot_x] = self.render_cell(robot_x, robot_y)
+            rows.append(delimiter.join(map_row))
+        return '\n'.join(rows)
+
+    def render_cell(self, x: int, y: int) -> str:
+        """Return the text render shows for the cell at (x, y), robot drawn as a direction arrow."""
+        current_cell = self.map_matrix[y][x]
+        robot_x, robot_y = self.robot_location
+        if x != robot_x or y != robot_y:
+            return current_cell
+
         # Get direction arrow
         direction_idx = self._all_directions.index(self.robot_direction)
         direction_arrow = self._all_direction_str[direction_idx]
-        
+
         # Replace robot symbol with direction arrow
         if current_cell == self.robot_symbol:
-            display_matrix[robot_y][robot_x] = direction_arrow
-        else:
-            # If robot is on another object, replace R with arrow
-            display_matrix[robot_y][robot_x] = current_cell.replace(self.robot_symbol, direction_arrow)
-        
-        print('\n'.join([delimiter.join(map_row) for map_row in display_matrix]))
+            return direction_arrow
+        # If robot is on another object, replace R with arrow
+        return current_cell.replace(self.robot_symbol, direction_arrow)
+
+    def state_key(self) -> tuple:
+        """
+        Return a hashable snapshot of everything actions can change.
+
+        Two mazes with equal state keys respond identically to every
+        sensor and action from then on.
+        """
+        return (
+            tuple(self.robot_location),
+            self.robot_direction,
+            self.has_key,
+            self.has_true_key,
+            self.has_opened_door,
+            '\n'.join(''.join(row) for row in self.map_matrix),
+        )
 
     def is_maze_solved(self) -> bool:
         """
@@ -0,0 +1,237 @@
+"""
+Binary on-disk format for large mazes with interior walls.
+
+Layout (little-endian):
+    header      magic, version, robot direction, width, length,
+                true key index, key count, robot/door/exit coordinates,
+                offset of the wall bitmap
+    keys        key count * (x, y) pairs of uint32
+    bitmap      one bit per cell of the bordered grid, row-major, set for
+                walls; cell index = y * (width + 2) + x, bit (index & 7)
+                of byte (index >> 3)
+
+open_maze_file() reads only the header and key table and memory-maps the
+rest, so opening is constant time whatever the maze size, and the bitmap
+is paged in lazily and shared through the page cache by every process
+that maps the same file.
+"""
+import mmap
+import os
+import struct
+from typing import Iterable, List, Tuple
+from robotspeak.maze import MazeValidationError, WALL_SYMBOL, ON_KEY_BIT, AT_DOOR_BIT, AT_EXIT_BIT
+from robotspeak.grid import GridMaze, DIRECTIONS, WALL
+
+MAGIC = b"RSMZ"
+VERSION = 1
+HEADER = struct.Struct("<4sHBxIIIIIIIIIIQ")
+KEY = struct.Struct("<II")
+
+def _bitmap_offset(num_keys: int) -> int:
+    end = HEADER.size + num_keys * KEY.size
+    return (end + 7) // 8 * 8
+
+def write_maze_file(path: str,
+                    width: int,
+                    length: int,
+                    key_locations: List[Tuple[int, int]],
+                    door_location: Tuple[int, int],
+                    exit_location: Tuple[int, int],
+                    robot_location: Tuple[int, int],
+                    robot_direction: str = 'north',
+                    true_key_idx: int = 1,
+                    walls: Iterable[Tuple[int, int]] = ()) -> None:
+    """
+    Write a maze file.
+
+    Takes the same arguments as Maze.__init__ plus walls, an iterable of
+    interior wall cells as (x, y) in 1-based coordinates. The border is
+    always written as wall.
+    """
+    stride = width + 2
+    rows = length + 2
+    bitmap = bytearray((stride * rows + 7) // 8)
+
+    def set_wall(index):
+        bitmap[index >> 3] |= 1 << (index & 7)
+
+    for x in range(stride):
+        set_wall(x)
+        set_wall((rows - 1) * stride + x)
+    for y in range(1, rows - 1):
+        set_wall(y * stride)
+        set_wall(y * stride + stride - 1)
+    for x, y in walls:
+        set_wall(y * stride + x)
+
+    offset = _bitmap_offset(len(key_locations))
+    header = HEADER.pack(MAGIC, VERSION, DIRECTIONS.index(robot_direction),
+                         width, length, true_key_idx, len(key_locations),
+                         robot_location[0], robot_location[1],
+                         door_location[0], door_location[1],
+                         exit_location[0], exit_location[1],
+                         offset)
+    keys = b"".join(KEY.pack(x, y) for x, y in key_locations)
+
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(keys)
+        f.write(bytes(offset - len(header) - len(keys)))
+        f.write(bitmap)
+
+def save_maze(maze, path: str) -> None:
+    """Write an existing Maze or GridMaze (after create_initial_map) to a maze file."""
+    matrix = maze.get_map_matrix()
+    walls = [(x, y)
+             for y in range(1, maze.length + 1)
+             for x in range(1, maze.width + 1)
+             if matrix[y][x] == WALL_SYMBOL]
+    write_maze_file(path, maze.width, maze.length, maze.key_locations,
+                    maze.door_location, maze.exit_location, maze.robot_location,
+                    maze.robot_direction, maze.true_key_idx + 1, walls)
+
+class MappedCells:
+    """
+    Cell flags whose walls are read straight from a memory-mapped bitmap.
+
+    Object flags (keys, door, exit) are kept in a small dictionary, as in
+    SparseCells; nothing proportional to the maze area is copied into
+    Python objects. The border is wall by coordinate, as in SparseCells,
+    whatever the file's bitmap says, so a robot can never walk off it.
+    """
+    __slots__ = ("_buffer", "_offset", "_stride", "_width", "_length", "_objects")
+
+    def __init__(self, buffer, offset: int, width: int, length: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._stride = width + 2
+        self._width = width
+        self._length = length
+        self._objects = {} # cell index -> flags, for non-empty floor cells only
+
+    def __len__(self) -> int:
+        return self._stride * (self._length + 2)
+
+    def __getitem__(self, index: int) -> int:
+        flags = self._objects.get(index)
+        if flags is not None:
+            return flags
+        return WALL if self.is_wall(index) else 0
+
+    def is_wall(self, index: int) -> bool:
+        """Return whether a cell is border or has its bit set in the bitmap, ignoring objects."""
+        y, x = divmod(index, self._stride)
+        if 0 < x <= self._width and 0 < y <= self._length:
+            return bool(self._buffer[self._offset + (index >> 3)] >> (index & 7) & 1)
+        return True
+
+    def __setitem__(self, index: int, flags: int) -> None:
+        if flags:
+            self._objects[index] = flags
+        else:
+            self._objects.pop(index, None)
+
+class MappedMaze(GridMaze):
+    """
+    A GridMaze backed by a memory-mapped maze file.
+
+    Use open_maze_file() to create one. is_front_clear reads the wall bit
+    directly from the mapped buffer.
+    """
+    __slots__ = ("_buffer", "_bitmap_offset")
+
+    def _build_cells(self) -> MappedCells:
+        return MappedCells(self._buffer, self._bitmap_offset, self.width, self.length)
+
+    def create_initial_map(self) -> None:
+        """
+        Place all objects on the mapped walls.
+
+        Raises:
+            MazeValidationError: If any parameter is invalid, or the robot or an object is on a wall
+        """
+        super().create_initial_map()
+        cells = self._cells
+        for name, location in ([(f"key[{i}]", location) for i, location in enumerate(self.key_locations)]
+                               + [("door", self.door_location), ("exit", self.exit_location), ("robot", self._start)]):
+            if cells.is_wall(self._index(location)):
+                raise MazeValidationError(f"{name} location {list(location)} is on a wall")
+
+    def is_front_clear(self) -> bool:
+        """Check if the space directly in front of the robot is not a wall."""
+        return not self._cells.is_wall(self._pos + self._steps[self._dir])
+
+    def sensor_bits(self) -> int:
+        """Return every sensor at once (see Maze.sensor_bits), reading the front bit from the mapped buffer."""
+        cells = self._cells
+        return (cells[self._pos] & (ON_KEY_BIT | AT_DOOR_BIT | AT_EXIT_BIT)
+                | (not cells.is_wall(self._pos + self._steps[self._dir])))
+
+    def wall_distance(self) -> int:
+        """
+        Return how many cells the robot can move forward before a wall stops it.
+
+        A table would be as large as the maze, so this walks the wall bitmap
+        along the robot's row or column instead, no further than the border.
+        """
+        buffer, offset = self._buffer, self._bitmap_offset
+        y, x = divmod(self._pos, self._stride)
+        limit = (y - 1, x - 1, self.length - y, self.width - x)[self._dir]
+        step = self._steps[self._dir]
+        front = self._pos + step
+        distance = 0
+        while distance < limit and not buffer[offset + (front >> 3)] >> (front & 7) & 1:
+            distance += 1
+            front += step
+        return distance
+
+    def close(self) -> None:
+        """Release the memory mapping."""
+        self._cells = None
+        self._buffer.close()
+
+def open_maze_file(path: str) -> MappedMaze:
+    """
+    Open a maze file as a MappedMaze, ready to use (create_initial_map already called).
+
+    Raises:
+        MazeValidationError: If the file is not a maze file or its contents are invalid
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise MazeValidationError(f"{path} is too short to be a maze file")
+        (magic, version, direction, width, length, true_key_idx, num_keys,
+         robot_x, robot_y, door_x, door_y, exit_x, exit_y, offset) = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise MazeValidationError(f"{path} is not a version {VERSION} maze file")
+        if direction >= len(DIRECTIONS):
+            raise MazeValidationError(f"{path} has an invalid robot direction ({direction})")
+        keys = f.read(num_keys * KEY.size)
+        if len(keys) != num_keys * KEY.size:
+            raise MazeValidationError(f"{path} is truncated: its header lists {num_keys} keys")
+        key_locations = [list(KEY.unpack_from(keys, i * KEY.size)) for i in range(num_keys)]
+        if offset < HEADER.size + len(keys):
+            raise MazeValidationError(f"{path} has an invalid wall bitmap offset ({offset})")
+        end = offset + ((width + 2) * (length + 2) + 7) // 8
+        size = os.fstat(f.fileno()).st_size
+        if size < end:
+            raise MazeValidationError(f"{path} is truncated: the wall bitmap needs {end} bytes, the file has {size}")
+        buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+
+    maze = MappedMaze(width = width,
+                      length = length,
+                      key_locations = key_locations,
+                      door_location = [door_x, door_y],
+                      exit_location = [exit_x, exit_y],
+                      robot_location = [robot_x, robot_y],
+                      robot_direction = DIRECTIONS[direction],
+                      true_key_idx = true_key_idx)
+    maze._buffer = buffer
+    maze._bitmap_offset = offset
+    try:
+        maze.create_initial_map()
+    except MazeValidationError:
+        buffer.close()
+        raise
+    return maze
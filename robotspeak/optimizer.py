@@ -0,0 +1,243 @@
+"""
+Optimisation passes over a parsed Program, run between parsing and compiling.
+
+Levels:
+    0   None.
+    1   Constant folding and dead code removal. IF TRUE / IF FALSE blocks are
+        replaced by the branch taken, WHILE FALSE loops and code after a
+        WHILE TRUE loop in the same block are dropped, and so are IF blocks
+        with nothing in them and assignments to variables that are never
+        read. Only statements that can neither move the robot nor raise are
+        removed, so the actions a run performs are unchanged; statement
+        counts (and so statement limits) can drop.
+    2   Level 1, plus:
+        - turn canonicalisation: a run of consecutive turns is replaced by
+          its net rotation, at most two turns (TURN_LEFT TURN_RIGHT is
+          dropped, three TURN_LEFTs become one TURN_RIGHT). The robot ends
+          up facing the same way, but traces, action counts and the maps
+          drawn after each turn show fewer turns. A WHILE whose body
+          would be left without any action (WHILE TRUE TURN_LEFT
+          TURN_RIGHT END) is only optimised at level 1, so that
+          Limits.max_actions can still stop it.
+        - loop unswitching: an IF at the top of a WHILE body whose
+          condition reads only variables the loop never assigns is hoisted
+          out, leaving one copy of the loop for each branch. Its condition
+          is tested once instead of on every iteration; actions are
+          unchanged.
+
+optimize() returns a new tree and leaves the one it is given untouched.
+"""
+from robotspeak.syntax import Program, Action, Assign, If, While, Const, Sensor, Var, And, Or
+from robotspeak.predicates import fold_condition, names_in
+
+MAX_LEVEL = 2
+
+# passes are repeated until no more variables become unread, at most this many times
+MAX_PASSES = 8
+
+# loops with more statements than this (nested ones included) are not unswitched,
+# since unswitching copies the body
+MAX_UNSWITCH_SIZE = 64
+
+TURNS = {"TURN_LEFT": 1, "TURN_RIGHT": -1}
+
+# tree queries
+def statement_count(stmts: list) -> int:
+    """Return the number of statements in stmts, nested ones included."""
+    count = 0
+    for stmt in stmts:
+        count += 1
+        if isinstance(stmt, (If, While)):
+            count += statement_count(stmt.body)
+        if isinstance(stmt, If) and stmt.orelse:
+            count += statement_count(stmt.orelse)
+    return count
+
+def contains_action(stmts: list) -> bool:
+    """Return True if stmts has an action anywhere, nested ones included."""
+    for stmt in stmts:
+        match stmt:
+            case Action():
+                return True
+            case If():
+                if contains_action(stmt.body) or (stmt.orelse and contains_action(stmt.orelse)):
+                    return True
+            case While():
+                if contains_action(stmt.body):
+                    return True
+    return False
+
+def read_variables(stmts: list) -> set:
+    """Return the names of the variables any condition or assignment in stmts reads."""
+    names = set()
+    for stmt in stmts:
+        match stmt:
+            case Assign():
+                names.update(names_in(stmt.expr, Var))
+            case If():
+                names.update(names_in(stmt.cond, Var))
+                names |= read_variables(stmt.body)
+                if stmt.orelse:
+                    names |= read_variables(stmt.orelse)
+            case While():
+                names.update(names_in(stmt.cond, Var))
+                names |= read_variables(stmt.body)
+    return names
+
+def assigned_variables(stmts: list) -> set:
+    """Return the names of the variables assigned anywhere in stmts."""
+    names = set()
+    for stmt in stmts:
+        match stmt:
+            case Assign():
+                names.add(stmt.name)
+            case If():
+                names |= assigned_variables(stmt.body)
+                if stmt.orelse:
+                    names |= assigned_variables(stmt.orelse)
+            case While():
+                names |= assigned_variables(stmt.body)
+    return names
+
+def can_raise(expr, assigned: set) -> bool:
+    """Return True if evaluating expr may read a variable that is not definitely assigned."""
+    return any(name not in assigned for name in names_in(expr, Var))
+
+# node builders; optimised trees share unchanged subtrees, so nodes are never modified in place
+def make_if(cond, body: list, orelse: list, like: If) -> If:
+    node = If(cond, like.line)
+    node.body = body
+    node.orelse = orelse or None
+    node.else_line = like.else_line if like.else_line is not None else like.line
+    node.end_line = like.end_line
+    return node
+
+def make_while(cond, body: list, like: While) -> While:
+    node = While(cond, like.line)
+    node.body = body
+    node.end_line = like.end_line
+    return node
+
+# passes
+def canonicalise_turns(stmts: list) -> list:
+    """Replace every run of consecutive turns in stmts by its net rotation."""
+    out = []
+    run = []
+
+    def flush():
+        rotation = sum(TURNS[turn.name] for turn in run) % 4
+        names = ([], ["TURN_LEFT"], ["TURN_LEFT", "TURN_LEFT"], ["TURN_RIGHT"])[rotation]
+        # the turns kept take the lines of the first turns of the run
+        out.extend(Action(name, turn.line) for name, turn in zip(names, run))
+        run.clear()
+
+    for stmt in stmts:
+        if isinstance(stmt, Action) and stmt.name in TURNS:
+            run.append(stmt)
+            continue
+        if run:
+            flush()
+        out.append(stmt)
+    if run:
+        flush()
+    return out
+
+def unswitch(loop: While, assigned: set):
+    """
+    Hoist the first loop-invariant IF out of loop's body.
+
+    An IF qualifies if its condition reads only variables, all of them
+    definitely assigned before the loop and none assigned inside it, so
+    testing it once up front gives the same answer as every test inside
+    and cannot raise. Returns an If holding one copy of the loop per
+    branch, or loop itself.
+    """
+    if statement_count(loop.body) > MAX_UNSWITCH_SIZE:
+        return loop
+    changed = None
+    for index, stmt in enumerate(loop.body):
+        if not isinstance(stmt, If) or names_in(stmt.cond, Sensor):
+            continue
+        names = names_in(stmt.cond, Var)
+        if changed is None:
+            changed = assigned_variables(loop.body)
+        if all(name in assigned and name not in changed for name in names):
+            before, after = loop.body[:index], loop.body[index + 1:]
+            return make_if(stmt.cond,
+                           [make_while(loop.cond, before + stmt.body + after, loop)],
+                           [make_while(loop.cond, before + (stmt.orelse or []) + after, loop)],
+                           stmt)
+    return loop
+
+def optimize_block(stmts: list, assigned: set, reads: set, level: int) -> list:
+    """
+    Return an optimised copy of a block.
+
+    Args:
+        stmts: The block's statements
+        assigned: Variables definitely assigned when the block starts; updated
+            to those definitely assigned when it ends
+        reads: Variables read anywhere in the program
+        level: Optimisation level, 1 or more
+    """
+    out = []
+    for stmt in stmts:
+        match stmt:
+            case Action():
+                out.append(stmt)
+            case Assign():
+                expr = fold_condition(stmt.expr)
+                if stmt.name not in reads and not can_raise(expr, assigned):
+                    continue
+                out.append(Assign(stmt.name, expr, stmt.line))
+                assigned.add(stmt.name)
+            case If():
+                cond = fold_condition(stmt.cond)
+                if isinstance(cond, Const):
+                    out.extend(optimize_block(stmt.body if cond.value else stmt.orelse or [], assigned, reads, level))
+                    continue
+                then_assigned, else_assigned = set(assigned), set(assigned)
+                body = optimize_block(stmt.body, then_assigned, reads, level)
+                orelse = optimize_block(stmt.orelse or [], else_assigned, reads, level)
+                if body or orelse or can_raise(cond, assigned):
+                    out.append(make_if(cond, body, orelse, stmt))
+                assigned |= then_assigned & else_assigned
+            case While():
+                cond = fold_condition(stmt.cond)
+                if isinstance(cond, Const) and not cond.value:
+                    continue
+                body = optimize_block(stmt.body, set(assigned), reads, level)
+                if level >= 2 and not contains_action(body):
+                    # cancelled turns must not leave a loop that max_actions cannot stop
+                    plain = optimize_block(stmt.body, set(assigned), reads, 1)
+                    if contains_action(plain):
+                        body = plain
+                loop = make_while(cond, body, stmt)
+                if level >= 2:
+                    loop = unswitch(loop, assigned)
+                out.append(loop)
+                if isinstance(cond, Const):
+                    break # WHILE TRUE only ends the program, never falls through
+    if level >= 2:
+        out = canonicalise_turns(out)
+    return out
+
+def optimize(program: Program, level: int = 1) -> Program:
+    """
+    Return an optimised copy of program (see the module docstring for the levels).
+
+    Raises:
+        ValueError: If level is not between 0 and MAX_LEVEL
+    """
+    if not 0 <= level <= MAX_LEVEL:
+        raise ValueError(f"Optimisation level must be between 0 and {MAX_LEVEL}")
+    if level == 0:
+        return program
+    body = program.body
+    reads = None
+    for _ in range(MAX_PASSES):
+        # dropping a dead assignment can leave the variables it read unread too
+        if reads == (reads := read_variables(body)):
+            break
+        body = optimize_block(body, set(), reads, level)
+    return Program(program.env, program.load_line, body, program.end_line)
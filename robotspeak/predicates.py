@@ -0,0 +1,288 @@
+"""
+Compilation of boolean conditions into predicates.
+
+A condition is folded once when the program is compiled, then turned into
+a zero-argument callable once the maze is known. Sensors become the bound
+Maze methods themselves, and AND/OR stop at the first term that decides
+the result, so later terms (sensors or variables) are never evaluated.
+
+Compound conditions are instead tabulated over every combination of the
+maze's sensor_bits() and the variables they read, and evaluated with a
+single lookup (see compile_condition).
+
+Variables are read from a list of slots, one per variable, that
+compile_program numbers and resolve_variables writes into each Var. A
+slot holds None until its variable is assigned; only reads that may
+come first check for that.
+"""
+from robotspeak.errors import RuntimeErrorException
+from robotspeak.syntax import Const, Sensor, Var, And, Or
+from robotspeak.maze import FRONT_IS_CLEAR_BIT, ON_KEY_BIT, AT_DOOR_BIT, AT_EXIT_BIT, is_kept_in_step
+
+SENSOR_METHODS = {
+    "FRONT_IS_CLEAR": "is_front_clear",
+    "ON_KEY": "on_key",
+    "AT_DOOR": "at_door",
+    "AT_EXIT": "at_exit",
+}
+
+SENSOR_BITS = {
+    "FRONT_IS_CLEAR": FRONT_IS_CLEAR_BIT,
+    "ON_KEY": ON_KEY_BIT,
+    "AT_DOOR": AT_DOOR_BIT,
+    "AT_EXIT": AT_EXIT_BIT,
+}
+
+# variable values are packed into a truth table index above the sensor bits
+VARIABLE_SHIFT = 4
+
+# conditions reading more variables than this keep their closure; a table has 16 << n entries
+MAX_TABLE_VARIABLES = 4
+
+# one sensor_bits() call only pays for itself over this many separate sensor calls
+MIN_TABLE_SENSORS = 2
+
+# a subclass overriding any of these is not trusted to keep sensor_bits() in step with them
+SENSOR_DEPENDENCIES = ("move_forward", "turn_left", "turn_right", "pick_key", "throw_away_key", "set_location",
+                       "try_move_forward", "try_pick_key", "try_throw_away_key")
+
+TRUE = Const(True)
+FALSE = Const(False)
+
+def is_pure(expr) -> bool:
+    """Return True if evaluating expr can never raise (no variable reads)."""
+    match expr:
+        case Const() | Sensor():
+            return True
+        case Var():
+            return False
+        case And() | Or():
+            return all(is_pure(term) for term in expr.terms)
+
+def requires_front_clear(expr) -> bool:
+    """Return True if expr can only be true while FRONT_IS_CLEAR is."""
+    match expr:
+        case Sensor():
+            return expr.name == "FRONT_IS_CLEAR"
+        case And():
+            return any(requires_front_clear(term) for term in expr.terms)
+        case Or():
+            return all(requires_front_clear(term) for term in expr.terms)
+    return False
+
+def fold_condition(expr):
+    """
+    Fold TRUE/FALSE literals out of a condition.
+
+    Terms that can no longer be reached are dropped. Variable reads in
+    front of a deciding literal are kept, because reading an unassigned
+    variable is still a runtime error.
+    """
+    if not isinstance(expr, (And, Or)):
+        return expr
+
+    # neutral literal is skipped, absorbing literal decides the result
+    absorbing = isinstance(expr, Or)
+    terms = []
+    for term in expr.terms:
+        term = fold_condition(term)
+        if isinstance(term, Const):
+            if term.value != absorbing:
+                continue
+            if all(is_pure(kept) for kept in terms):
+                return term
+            terms.append(term)
+            break
+        terms.append(term)
+
+    if not terms:
+        return FALSE if absorbing else TRUE
+    if len(terms) == 1:
+        return terms[0]
+    return type(expr)(terms)
+
+def _always_true():
+    return True
+
+def _always_false():
+    return False
+
+def resolve_variables(expr, slots: dict, assigned: set):
+    """
+    Return a copy of a condition with every Var given its slot.
+
+    Args:
+        expr: Condition tree
+        slots: Variable name -> slot; names not in it yet get the next slot
+        assigned: Variables definitely assigned where expr is evaluated;
+            reads of the others keep their unassigned check
+    """
+    match expr:
+        case Var():
+            slot = slots.setdefault(expr.name, len(slots))
+            return Var(expr.name, slot, expr.name not in assigned)
+        case And() | Or():
+            return type(expr)([resolve_variables(term, slots, assigned) for term in expr.terms])
+    return expr
+
+def compile_variable(var: Var, slots: list, lineNumber: int):
+    slot = var.slot
+    if not var.guarded:
+        return lambda: slots[slot]
+    def read():
+        value = slots[slot]
+        if value is None:
+            raise RuntimeErrorException("assigning something undeclared", lineNumber)
+        return value
+    return read
+
+def compile_predicate(expr, maze, slots: list, lineNumber: int):
+    """
+    Turn a folded condition into a zero-argument callable.
+
+    Args:
+        expr: Condition tree, usually already passed through fold_condition,
+            with its variables resolved to slots
+        maze: The loaded maze; sensors are bound to its methods
+        slots: The run's variable slots
+        lineNumber: Line reported if a variable is read before assignment
+    """
+    match expr:
+        case Const():
+            return _always_true if expr.value else _always_false
+        case Sensor():
+            return getattr(maze, SENSOR_METHODS[expr.name])
+        case Var():
+            return compile_variable(expr, slots, lineNumber)
+
+    parts = [compile_predicate(term, maze, slots, lineNumber) for term in expr.terms]
+    if isinstance(expr, And):
+        if len(parts) == 2:
+            first, second = parts
+            return lambda: first() and second()
+        def conjunction():
+            for part in parts:
+                if not part():
+                    return False
+            return True
+        return conjunction
+
+    if len(parts) == 2:
+        first, second = parts
+        return lambda: first() or second()
+    def disjunction():
+        for part in parts:
+            if part():
+                return True
+        return False
+    return disjunction
+
+def evaluate(expr, bits: int, values: dict) -> bool:
+    """Return the value of expr for the sensors set in bits and the given variable values."""
+    match expr:
+        case Const():
+            return expr.value
+        case Sensor():
+            return bool(bits & SENSOR_BITS[expr.name])
+        case Var():
+            return values[expr.name]
+        case And():
+            return all(evaluate(term, bits, values) for term in expr.terms)
+        case Or():
+            return any(evaluate(term, bits, values) for term in expr.terms)
+
+def variables_in(expr) -> list:
+    """Return the Var nodes in expr, one for each name, in order of appearance."""
+    match expr:
+        case Var():
+            return [expr]
+        case And() | Or():
+            found = {}
+            for term in expr.terms:
+                for var in variables_in(term):
+                    found.setdefault(var.name, var)
+            return list(found.values())
+    return []
+
+def names_in(expr, kind: type) -> list:
+    """Return the names of the Sensor or Var nodes in expr, each once, in order of appearance."""
+    match expr:
+        case Sensor() | Var():
+            return [expr.name] if isinstance(expr, kind) else []
+        case And() | Or():
+            names = []
+            for term in expr.terms:
+                names.extend(name for name in names_in(term, kind) if name not in names)
+            return names
+    return []
+
+def truth_table(expr, names: list) -> tuple:
+    """
+    Tabulate expr. Entry bits | values << VARIABLE_SHIFT holds its value for
+    sensor_bits() == bits, where bit i of values is the value of names[i].
+    """
+    return tuple(
+        evaluate(expr, index & ((1 << VARIABLE_SHIFT) - 1),
+                 {name: bool(index >> (VARIABLE_SHIFT + i) & 1) for i, name in enumerate(names)})
+        for index in range(1 << (VARIABLE_SHIFT + len(names)))
+    )
+
+def compile_condition(expr, maze, slots: list, lineNumber: int):
+    """
+    Turn a folded condition into a zero-argument callable, as a truth table lookup where possible.
+
+    A compound condition is tabulated once, so each evaluation is one
+    sensor_bits() call, a read of each variable's slot and an index. If one
+    of the variables is not assigned yet, that evaluation falls back to the
+    compile_predicate closure, which raises (or short-circuits past the
+    read) exactly as before. Conditions reading fewer than
+    MIN_TABLE_SENSORS sensors or more than MAX_TABLE_VARIABLES variables,
+    and mazes whose sensors or actions a subclass overrides, keep the
+    closure.
+
+    Takes the same arguments as compile_predicate.
+    """
+    closure = compile_predicate(expr, maze, slots, lineNumber)
+    if not isinstance(expr, (And, Or)):
+        return closure
+    reads = variables_in(expr)
+    names = [var.name for var in reads]
+    sensors = [SENSOR_METHODS[name] for name in names_in(expr, Sensor)]
+    if (len(sensors) < MIN_TABLE_SENSORS or len(names) > MAX_TABLE_VARIABLES
+            or not is_kept_in_step(maze, "sensor_bits", *sensors, *SENSOR_DEPENDENCIES)):
+        return closure
+
+    table = truth_table(expr, names)
+    bits = maze.sensor_bits
+    if not names:
+        return lambda: table[bits()]
+
+    guarded = any(var.guarded for var in reads)
+    if len(reads) == 1:
+        slot = reads[0].slot
+        if not guarded:
+            return lambda: table[bits() | slots[slot] << VARIABLE_SHIFT]
+        def lookup():
+            value = slots[slot]
+            if value is None:
+                return closure()
+            return table[bits() | value << VARIABLE_SHIFT]
+        return lookup
+
+    shifts = [(var.slot, VARIABLE_SHIFT + i) for i, var in enumerate(reads)]
+    if not guarded:
+        def lookup():
+            index = bits()
+            for slot, shift in shifts:
+                index |= slots[slot] << shift
+            return table[index]
+        return lookup
+    def lookup():
+        index = bits()
+        for slot, shift in shifts:
+            value = slots[slot]
+            if value is None:
+                return closure()
+            index |= value << shift
+        return table[index]
+    return lookup
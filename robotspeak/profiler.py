@@ -0,0 +1,179 @@
+"""
+Line-level profiling of robotspeak runs.
+
+A LineProfiler is passed to vm.run (or Interpreter.run_code) as the
+recorder. At link time it binds the program's conditions and actions to
+stand-ins for the maze and sink that count and time every call made
+through them, and wraps each condition and action to charge its time to
+its source line. A run without a profiler pays nothing.
+
+For every line the report gives how often its statement ran, the wall
+time spent in it, and the sensor calls, actions and maps it made. For the
+whole run it splits the time between the maze (sensors and actions),
+drawing maps, other output and the interpreter, which is everything else:
+dispatch, jumps, variables and linking.
+"""
+from time import perf_counter_ns
+from robotspeak.maze import MazeStandIn
+from robotspeak.predicates import SENSOR_METHODS
+from robotspeak.sinks import SinkStandIn
+from robotspeak.vm import ACTION_METHODS, ATTEMPT_METHODS
+
+# maze methods linked code calls besides the actions; sensor_bits is what truth-table conditions read
+SENSOR_CALLS = tuple(SENSOR_METHODS.values()) + ("sensor_bits",)
+MAZE_CALLS = tuple(ACTION_METHODS.values()) + tuple(ATTEMPT_METHODS.values()) + ("is_maze_solved",)
+
+class LineStats:
+    """What one source line did over a run. Times are in nanoseconds."""
+    __slots__ = ("count", "ns", "sensors", "actions", "maps")
+
+    def __init__(self):
+        self.count = 0
+        self.ns = 0
+        self.sensors = 0
+        self.actions = 0
+        self.maps = 0
+
+    def __repr__(self):
+        return (f"LineStats(count={self.count}, ns={self.ns}, sensors={self.sensors}, "
+                f"actions={self.actions}, maps={self.maps})")
+
+class ProfiledMaze(MazeStandIn):
+    """Sensors and actions called through it are counted and timed."""
+    def __init__(self, maze, profiler: "LineProfiler"):
+        super().__init__(maze)
+        for name in SENSOR_CALLS:
+            if hasattr(maze, name):
+                setattr(self, name, profiler.sensor(getattr(maze, name)))
+        for name in MAZE_CALLS:
+            if hasattr(maze, name):
+                setattr(self, name, profiler.maze_call(getattr(maze, name)))
+
+class ProfiledSink(SinkStandIn):
+    """Maps and writes made through it are counted and timed."""
+    def __init__(self, sink, profiler: "LineProfiler"):
+        super().__init__(sink)
+        self.write = profiler.output(sink.write)
+        self.map = profiler.map(sink.map)
+
+class LineProfiler:
+    """
+    Per-line profile of a run. Pass one to vm.run (or Interpreter.run_code) as recorder.
+
+    Attributes:
+        lines: Source line -> LineStats, for every line holding a statement
+        maze_ns: Time spent in the maze's sensors and actions
+        map_ns: Time spent drawing maps
+        write_ns: Time spent writing other output
+        result: The run's RunResult, once it has finished
+    """
+    def __init__(self):
+        self.lines = {}
+        self.maze_ns = 0
+        self.map_ns = 0
+        self.write_ns = 0
+        self.result = None
+        self._current = LineStats() # the statement running; a throwaway until the first one does
+
+    def start(self, maze, sink) -> tuple:
+        return ProfiledMaze(maze, self), ProfiledSink(sink, self)
+
+    def _stats(self, line: int) -> LineStats:
+        stats = self.lines.get(line)
+        if stats is None:
+            stats = self.lines[line] = LineStats()
+        return stats
+
+    def condition(self, op: int, predicate, line: int):
+        """Wrap a linked predicate so that its evaluations are counted and timed."""
+        stats = self._stats(line)
+        clock = perf_counter_ns
+        def profiled():
+            self._current = stats
+            begin = clock()
+            result = predicate()
+            stats.ns += clock() - begin
+            stats.count += 1
+            return result
+        return profiled
+
+    def action(self, act, maze, name: str, line: int):
+        """Wrap a linked action so that its executions are counted and timed."""
+        stats = self._stats(line)
+        clock = perf_counter_ns
+        def profiled():
+            self._current = stats
+            begin = clock()
+            halt = act()
+            stats.ns += clock() - begin
+            stats.count += 1
+            stats.actions += 1
+            return halt
+        return profiled
+
+    # wrappers for the stand-ins' methods
+    def sensor(self, method):
+        clock = perf_counter_ns
+        def timed(*args):
+            begin = clock()
+            result = method(*args)
+            self.maze_ns += clock() - begin
+            self._current.sensors += 1
+            return result
+        return timed
+
+    def maze_call(self, method):
+        clock = perf_counter_ns
+        def timed(*args):
+            begin = clock()
+            result = method(*args)
+            self.maze_ns += clock() - begin
+            return result
+        return timed
+
+    def map(self, method):
+        clock = perf_counter_ns
+        def timed(maze):
+            begin = clock()
+            method(maze)
+            self.map_ns += clock() - begin
+            self._current.maps += 1
+        return timed
+
+    def output(self, method):
+        clock = perf_counter_ns
+        def timed(text):
+            begin = clock()
+            method(text)
+            self.write_ns += clock() - begin
+        return timed
+
+    def finish(self, result) -> None:
+        self.result = result
+
+    def report(self, robotspeak_program: str = None) -> str:
+        """
+        Return the profile as a table, one row per statement line, run or not.
+
+        Args:
+            robotspeak_program: The program's source, to show each line's text
+        """
+        source = robotspeak_program.strip().split('\n') if robotspeak_program is not None else []
+        total_ns = sum(stats.ns for stats in self.lines.values()) or 1
+        rows = [f"{'line':>6} {'count':>10} {'time ms':>10} {'%':>6} {'sensors':>10} {'actions':>10} {'maps':>8}  source"]
+        for line in sorted(self.lines):
+            stats = self.lines[line]
+            text = source[line - 1].strip() if line <= len(source) else ""
+            rows.append(f"{line:>6} {stats.count:>10} {stats.ns / 1e6:>10.3f} {100 * stats.ns / total_ns:>6.1f} "
+                        f"{stats.sensors:>10} {stats.actions:>10} {stats.maps:>8}  {text}")
+
+        if self.result is not None:
+            elapsed_ns = int(self.result.elapsed * 1e9)
+            interpreter_ns = max(elapsed_ns - self.maze_ns - self.map_ns - self.write_ns, 0)
+            rows.append("")
+            rows.append(f"{self.result.statements} statements and {self.result.actions} actions "
+                        f"in {elapsed_ns / 1e6:.3f} ms:")
+            for label, ns in (("maze", self.maze_ns), ("maps", self.map_ns),
+                              ("other output", self.write_ns), ("interpreter", interpreter_ns)):
+                rows.append(f"  {label:<13}{ns / 1e6:>10.3f} ms {100 * ns / max(elapsed_ns, 1):>6.1f}%")
+        return '\n'.join(rows)
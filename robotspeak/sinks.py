@@ -0,0 +1,268 @@
+"""
+Output sinks: where a run's report of actions, warnings and maps goes.
+
+Every sink has a verbosity level. The interpreter reads it once, when the
+code is linked against a maze, and builds its action closures to match, so
+a QUIET sink costs nothing per action: no strings are formatted and no
+maps are rendered, rather than being built and thrown away.
+"""
+import sys
+from collections import deque
+from time import perf_counter
+
+# verbosity levels
+QUIET = 0       # nothing
+ACTIONS = 1     # action lines, warnings and messages, but no maps
+MAPS = 2        # everything, including the map after each move or turn
+
+class Sink:
+    """
+    Destination for interpreter output.
+
+    Subclasses implement write(). Lines are passed without their trailing
+    newline, exactly as print() would be given them.
+
+    Args:
+        level: QUIET, ACTIONS or MAPS
+        render_every: At MAPS level, draw the map only after every Nth move or turn
+    """
+    def __init__(self, level: int = MAPS, render_every: int = 1):
+        if render_every < 1:
+            raise ValueError("render_every must be at least 1")
+        self.level = level
+        self.render_every = render_every
+        self._moves = 0
+
+    def write(self, text: str) -> None:
+        """Output one line (or block of lines)."""
+        raise NotImplementedError
+
+    def draw(self, maze) -> None:
+        """Show the whole maze."""
+        self.write(maze.render())
+
+    def map(self, maze) -> None:
+        """Called after every move or turn at MAPS level; draws maze every render_every calls."""
+        self._moves += 1
+        if self._moves == self.render_every:
+            self._moves = 0
+            self.draw(maze)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class NullSink(Sink):
+    """Discards everything. Always QUIET."""
+    def __init__(self):
+        super().__init__(QUIET)
+
+    def write(self, text: str) -> None:
+        pass
+
+    def draw(self, maze) -> None:
+        pass
+
+    def map(self, maze) -> None:
+        pass
+
+class TerminalSink(Sink):
+    """
+    Prints to a text stream.
+
+    Args:
+        stream: Stream to print to; None means whatever sys.stdout is at the time of writing
+    """
+    def __init__(self, stream = None, level: int = MAPS, render_every: int = 1):
+        super().__init__(level, render_every)
+        self.stream = stream
+
+    def write(self, text: str) -> None:
+        print(text, file=self.stream)
+
+    def flush(self) -> None:
+        (self.stream or sys.stdout).flush()
+
+class FileSink(Sink):
+    """
+    Writes to a file through a large buffer, so long runs cost one system call per buffer_size bytes.
+
+    Args:
+        path: File to create (or truncate)
+        buffer_size: Bytes buffered between writes to the file
+    """
+    def __init__(self, path: str, level: int = MAPS, render_every: int = 1, buffer_size: int = 1 << 16):
+        super().__init__(level, render_every)
+        self._file = open(path, "w", buffering=buffer_size, encoding="utf-8")
+
+    def write(self, text: str) -> None:
+        self._file.write(text + "\n")
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+class RingBufferSink(Sink):
+    """
+    Keeps only the last capacity writes in memory, e.g. to show how a long run ended.
+
+    Args:
+        capacity: Number of writes kept
+    """
+    def __init__(self, capacity: int = 1000, level: int = MAPS, render_every: int = 1):
+        super().__init__(level, render_every)
+        self._lines = deque(maxlen=capacity)
+
+    def write(self, text: str) -> None:
+        self._lines.append(text)
+
+    def lines(self) -> list:
+        """Return the kept writes, oldest first."""
+        return list(self._lines)
+
+    def getvalue(self) -> str:
+        """Return the kept writes as text, as a TerminalSink would have printed them."""
+        return ''.join(line + "\n" for line in self._lines)
+
+class AnsiSink(Sink):
+    """
+    A live view of the maze, redrawn in place with ANSI cursor movement.
+
+    The rendered cells are cached row by row. After a move or turn only
+    the robot's previous and current cells can differ from the cache, so
+    only those are re-rendered and rewritten; a cell whose text changes
+    width rewrites the rest of its row. Frames arriving faster than
+    max_fps are dropped and their changed cells carried into the next
+    frame drawn. Other output is shown on a status line under the maze.
+
+    Args:
+        stream: Terminal stream; None means whatever sys.stdout is at the time of writing
+        max_fps: Frames drawn per second at most; None draws every frame
+        delimiter: Character to separate cells, as for Maze.print_map
+    """
+    def __init__(self, stream = None, max_fps: float = 30.0, delimiter: str = ' '):
+        super().__init__(MAPS)
+        self.stream = stream
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.delimiter = delimiter
+        self._maze = None
+        self._rows = []         # rendered cell text, row by row
+        self._offsets = []      # per row, the column each cell starts at, or None when stale
+        self._dirty = set()     # (x, y) of cells to re-render in the next frame
+        self._robot = None      # robot cell at the last move or turn
+        self._status = ""
+        self._status_dirty = False
+        self._last_frame = 0.0
+
+    def _emit(self, text: str) -> None:
+        stream = self.stream or sys.stdout
+        stream.write(text)
+        stream.flush()
+
+    def write(self, text: str) -> None:
+        if self._maze is None:
+            # nothing drawn yet, e.g. the loading header: print it normally
+            print(text, file=self.stream)
+            return
+        self._status = text.strip("\n").rsplit("\n", 1)[-1]
+        self._status_dirty = True
+
+    def draw(self, maze) -> None:
+        """Draw the whole maze below the cursor and start tracking it."""
+        matrix = maze.get_map_matrix()
+        height, width = len(matrix), len(matrix[0])
+        self._maze = maze
+        self._rows = [[maze.render_cell(x, y) for x in range(width)] for y in range(height)]
+        self._offsets = [None] * height
+        self._dirty.clear()
+        self._robot = tuple(maze.robot_location)
+        self._status_dirty = False
+        self._last_frame = perf_counter()
+        self._emit(''.join(self.delimiter.join(row) + "\n" for row in self._rows) + self._status + "\n")
+
+    def map(self, maze) -> None:
+        if maze is not self._maze:
+            self.draw(maze)
+            return
+        robot = tuple(maze.robot_location)
+        self._dirty.add(self._robot)
+        self._dirty.add(robot)
+        self._robot = robot
+        now = perf_counter()
+        if now - self._last_frame >= self.min_interval:
+            self._last_frame = now
+            self._frame()
+
+    def _row_offsets(self, y: int) -> list:
+        offsets = self._offsets[y]
+        if offsets is None:
+            offsets = []
+            column = 0
+            step = len(self.delimiter)
+            for text in self._rows[y]:
+                offsets.append(column)
+                column += len(text) + step
+            self._offsets[y] = offsets
+        return offsets
+
+    def _frame(self) -> None:
+        """Rewrite the dirty cells and the status line; the cursor rests on the line under the status line."""
+        maze = self._maze
+        rows = self._rows
+        parts = []
+        for x, y in self._dirty:
+            row = rows[y]
+            old = row[x]
+            text = maze.render_cell(x, y)
+            if text == old:
+                continue
+            row[x] = text
+            up = len(rows) + 1 - y
+            if len(text) == len(old):
+                column = self._row_offsets(y)[x]
+                parts.append(f"\x1b[{up}A\x1b[{column + 1}G{text}\x1b[{up}B\r")
+            else:
+                self._offsets[y] = None
+                column = self._row_offsets(y)[x]
+                parts.append(f"\x1b[{up}A\x1b[{column + 1}G{self.delimiter.join(row[x:])}\x1b[K\x1b[{up}B\r")
+        self._dirty.clear()
+        if self._status_dirty:
+            self._status_dirty = False
+            parts.append(f"\x1b[1A\r{self._status}\x1b[K\x1b[1B\r")
+        if parts:
+            self._emit(''.join(parts))
+
+    def flush(self) -> None:
+        if self._maze is not None:
+            # keys picked up or dropped since the last move are on the robot's cell
+            self._dirty.add(self._robot)
+            self._dirty.add(tuple(self._maze.robot_location))
+            self._frame()
+        (self.stream or sys.stdout).flush()
+
+class SinkStandIn:
+    """
+    Base for objects that stand in for a sink when code is linked, to watch the calls made to it.
+
+    Subclasses set wrapped methods on the instance; everything else,
+    level included, is read from the sink.
+    """
+    def __init__(self, sink: Sink):
+        self._sink = sink
+        self.level = sink.level
+
+    def __getattr__(self, name):
+        return getattr(self._sink, name)
+
+# used by mazes that were not given a sink
+STDOUT = TerminalSink()
@@ -0,0 +1,188 @@
+"""
+Run counters and phase timings.
+
+Pass a RunStats to Interpreter.run (or run_code) to have it filled in.
+The counters come from a StatsRecorder, which the session links the code
+with: it wraps only assignments and actions, and binds the code to
+stand-ins for the maze and sink that count sensor reads, failed actions
+and maps. The run therefore takes the general path (see vm.link), and a
+run without stats pays nothing.
+"""
+import json
+from time import perf_counter_ns
+from robotspeak.maze import MazeStandIn, MazeActionError
+from robotspeak.predicates import SENSOR_METHODS
+from robotspeak.sinks import SinkStandIn
+from robotspeak.vm import STORE, ACTION_METHODS, ATTEMPT_METHODS, RunResult
+
+# maze methods that read sensors; sensor_bits reads them all in one call
+SENSOR_CALLS = tuple(SENSOR_METHODS.values()) + ("sensor_bits",)
+PHASES = ("parse", "compile", "load", "execute")
+
+class RunStats:
+    """
+    What a run (or, once merged, several) did and where its time went.
+
+    Attributes:
+        runs: Runs counted
+        statements: Statements executed
+        actions: Action name -> times executed, failed ones included
+        failed_actions: Actions the maze refused (MazeActionError, reported as warnings)
+        sensor_reads: Calls to the maze's sensors; a truth-table condition reads all of them in one call
+        renders: Maps handed to the sink (after moves and turns at MAPS level)
+        variable_writes: Assignments executed
+        parse_ns: Time spent parsing and optimising the program
+        compile_ns: Time spent compiling it to instructions
+        load_ns: Time spent on LOAD generating (or taking) the maze and reporting it
+        execute_ns: Time spent running the code, load_ns excluded
+    """
+    __slots__ = ("runs", "statements", "actions", "failed_actions", "sensor_reads", "renders",
+                 "variable_writes", "parse_ns", "compile_ns", "load_ns", "execute_ns")
+
+    def __init__(self):
+        self.runs = 0
+        self.statements = 0
+        self.actions = {}
+        self.failed_actions = 0
+        self.sensor_reads = 0
+        self.renders = 0
+        self.variable_writes = 0
+        self.parse_ns = 0
+        self.compile_ns = 0
+        self.load_ns = 0
+        self.execute_ns = 0
+
+    def merge(self, other: "RunStats") -> None:
+        """Add other's counts and times to these."""
+        for name in self.__slots__:
+            if name == "actions":
+                for action, count in other.actions.items():
+                    self.actions[action] = self.actions.get(action, 0) + count
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def to_dict(self) -> dict:
+        return {name: dict(self.actions) if name == "actions" else getattr(self, name) for name in self.__slots__}
+
+    def to_json(self, **kwargs) -> str:
+        """Return to_dict() as JSON; kwargs are passed to json.dumps."""
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def summary(self) -> str:
+        actions = sum(self.actions.values())
+        lines = [f"Statements: {self.statements}  Actions: {actions}  Failed actions: {self.failed_actions}",
+                 f"Sensor reads: {self.sensor_reads}  Renders: {self.renders}  "
+                 f"Variable writes: {self.variable_writes}"]
+        if self.actions:
+            lines.append("By action: " + "  ".join(f"{name} {count}" for name, count in sorted(self.actions.items())))
+        lines.append("Time: " + "  ".join(f"{phase} {getattr(self, phase + '_ns') / 1e6:.3f} ms" for phase in PHASES))
+        if self.runs > 1:
+            lines.insert(0, f"Runs: {self.runs}")
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"RunStats({self.to_dict()})"
+
+class StatsMaze(MazeStandIn):
+    """Counts sensor reads and failed actions made through it."""
+    def __init__(self, maze, stats: RunStats):
+        super().__init__(maze)
+        for name in SENSOR_CALLS:
+            if hasattr(maze, name):
+                setattr(self, name, self._read(getattr(maze, name), stats))
+        for name in ACTION_METHODS.values():
+            setattr(self, name, self._act(getattr(maze, name), stats))
+        for name in ATTEMPT_METHODS.values():
+            if hasattr(maze, name):
+                setattr(self, name, self._attempt(getattr(maze, name), stats))
+
+    @staticmethod
+    def _read(method, stats: RunStats):
+        def read():
+            stats.sensor_reads += 1
+            return method()
+        return read
+
+    @staticmethod
+    def _act(method, stats: RunStats):
+        def act():
+            try:
+                return method()
+            except MazeActionError:
+                stats.failed_actions += 1
+                raise
+        return act
+
+    @staticmethod
+    def _attempt(method, stats: RunStats):
+        def attempt():
+            status = method()
+            if status:
+                stats.failed_actions += 1
+            return status
+        return attempt
+
+class StatsSink(SinkStandIn):
+    """Counts the maps handed to it."""
+    def __init__(self, sink, stats: RunStats):
+        super().__init__(sink)
+        draw = sink.map
+        def map(maze):
+            stats.renders += 1
+            draw(maze)
+        self.map = map
+
+class StatsRecorder:
+    """
+    Recorder that fills in a RunStats' counters (Interpreter.run_code makes one when given stats).
+
+    Args:
+        stats: RunStats to count into
+        inner: Another recorder to run inside this one, or None
+    """
+    def __init__(self, stats: RunStats, inner = None):
+        self.stats = stats
+        self.inner = inner
+
+    def start(self, maze, sink) -> tuple:
+        if self.inner is not None:
+            maze, sink = self.inner.start(maze, sink)
+        return StatsMaze(maze, self.stats), StatsSink(sink, self.stats)
+
+    def condition(self, op: int, predicate, line: int):
+        if self.inner is not None:
+            predicate = self.inner.condition(op, predicate, line)
+        if op != STORE:
+            return predicate
+        stats = self.stats
+        def counted():
+            stats.variable_writes += 1
+            return predicate()
+        return counted
+
+    def action(self, act, maze, name: str, line: int):
+        if self.inner is not None:
+            act = self.inner.action(act, maze, name, line)
+        actions = self.stats.actions
+        actions.setdefault(name, 0)
+        def counted():
+            actions[name] += 1
+            return act()
+        return counted
+
+    def finish(self, result: RunResult) -> None:
+        self.stats.runs += 1
+        self.stats.statements += result.statements
+        if self.inner is not None:
+            self.inner.finish(result)
+
+def timed(function, stats: RunStats, phase: str):
+    """Return function wrapped to add the time each call takes to stats' phase_ns."""
+    attribute = phase + "_ns"
+    def call(*args):
+        begin = perf_counter_ns()
+        try:
+            return function(*args)
+        finally:
+            setattr(stats, attribute, getattr(stats, attribute) + perf_counter_ns() - begin)
+    return call
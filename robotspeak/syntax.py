@@ -0,0 +1,353 @@
+"""
+Front end for robotspeak.
+
+Tokenises and parses a whole program once into a tree of statement and
+expression nodes with block boundaries already resolved, so the evaluator
+never has to look at source text again.
+"""
+from typing import List, Tuple
+from robotspeak.errors import SyntaxErrorException, SyntaxErrors, RuntimeErrorException
+
+VOCABULARY = {
+    "LOAD", "IF", "OTHERWISE", "WHILE", "END", "AND", "OR", "TRUE", "FALSE",
+    "MOVE_FORWARD", "TURN_LEFT", "TURN_RIGHT", "PICK_KEY", "OPEN_DOOR",
+    "FRONT_IS_CLEAR", "ON_KEY", "AT_DOOR", "AT_EXIT", "1", "2", "3", ":=",
+    #new variables
+    "THROW_AWAY_KEY"
+}
+VALID_LOADING_ENVS = {"1", "2", "3"}
+ACTIONS = ("MOVE_FORWARD", "TURN_LEFT", "TURN_RIGHT", "PICK_KEY", "OPEN_DOOR", "THROW_AWAY_KEY")
+SENSORS = ("FRONT_IS_CLEAR", "ON_KEY", "AT_DOOR", "AT_EXIT")
+LITERALS = {"TRUE": True, "FALSE": False}
+
+# utilities
+def remove_comments(line: str) -> str:
+    if not isinstance(line, str):
+        return ''
+    return line.split("@", 1)[0].strip()
+
+
+def is_ascii_letters(s: str) -> bool:
+    return s.isascii() and s.isalpha()
+
+def is_identifier(s: str) -> bool:
+    return is_ascii_letters(s) and s not in VOCABULARY
+
+# tokeniser
+def tokeniser(line, lineNumber):
+    if not line:
+        return []
+    line = line.split() #should be no whitespace anymore
+
+    for token in line:
+        if ":=" in token and token != ":=":
+            raise SyntaxErrorException("Why are you slacking on separating := with spaces?????", lineNumber)
+        if token in VOCABULARY:
+            continue
+        if is_ascii_letters(token): #variable name must follow the spec
+            continue
+        raise SyntaxErrorException("You are using invalid tokens", lineNumber)
+
+    return line
+
+# expression nodes
+class Const:
+    __slots__ = ("value",)
+
+    def __init__(self, value: bool):
+        self.value = value
+
+    def __repr__(self):
+        return f"Const({self.value})"
+
+class Sensor:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f"Sensor({self.name})"
+
+class Var:
+    """
+    A variable read. compile_program fills in the slot the variable is
+    stored in, and whether the variable may still be unassigned here.
+    """
+    __slots__ = ("name", "slot", "guarded")
+
+    def __init__(self, name: str, slot: int = None, guarded: bool = True):
+        self.name = name
+        self.slot = slot
+        self.guarded = guarded
+
+    def __repr__(self):
+        if self.slot is None:
+            return f"Var({self.name})"
+        return f"Var({self.name}, slot={self.slot})"
+
+class And:
+    """Conjunction of two or more terms, evaluated left to right."""
+    __slots__ = ("terms",)
+
+    def __init__(self, terms: list):
+        self.terms = terms
+
+    def __repr__(self):
+        return f"And({self.terms})"
+
+class Or:
+    """Disjunction of two or more AND-groups, evaluated left to right."""
+    __slots__ = ("terms",)
+
+    def __init__(self, terms: list):
+        self.terms = terms
+
+    def __repr__(self):
+        return f"Or({self.terms})"
+
+# statement nodes
+class Action:
+    __slots__ = ("name", "line")
+
+    def __init__(self, name: str, line: int):
+        self.name = name
+        self.line = line
+
+    def __repr__(self):
+        return f"Action({self.name}, line={self.line})"
+
+class Assign:
+    __slots__ = ("name", "expr", "line")
+
+    def __init__(self, name: str, expr, line: int):
+        self.name = name
+        self.expr = expr
+        self.line = line
+
+    def __repr__(self):
+        return f"Assign({self.name}, {self.expr}, line={self.line})"
+
+class If:
+    """IF block; orelse is None when there is no OTHERWISE."""
+    __slots__ = ("cond", "body", "orelse", "line", "else_line", "end_line")
+
+    def __init__(self, cond, line: int):
+        self.cond = cond
+        self.body = []
+        self.orelse = None
+        self.line = line
+        self.else_line = None
+        self.end_line = None
+
+    def __repr__(self):
+        return f"If({self.cond}, {self.body}, {self.orelse}, line={self.line})"
+
+class While:
+    __slots__ = ("cond", "body", "line", "end_line")
+
+    def __init__(self, cond, line: int):
+        self.cond = cond
+        self.body = []
+        self.line = line
+        self.end_line = None
+
+    def __repr__(self):
+        return f"While({self.cond}, {self.body}, line={self.line})"
+
+class Program:
+    """A parsed program: the LOAD environment, the top-level statements and the final END line."""
+    __slots__ = ("env", "load_line", "body", "end_line")
+
+    def __init__(self, env: str, load_line: int, body: list, end_line: int):
+        self.env = env
+        self.load_line = load_line
+        self.body = body
+        self.end_line = end_line
+
+    def __repr__(self):
+        return f"Program(LOAD {self.env}, {self.body})"
+
+# parsing
+def parse_term(token: str, lineNumber: int):
+    if token in LITERALS:
+        return Const(LITERALS[token])
+    if token in SENSORS:
+        return Sensor(token)
+    if is_identifier(token):
+        return Var(token)
+    raise SyntaxErrorException("Expected boolean term", lineNumber)
+
+def parse_expression(tokens: List[str], lineNumber: int):
+    """
+    Parse a boolean expression where AND binds tighter than OR.
+
+    Returns a single term when there is no operator, otherwise an Or of
+    And groups (each collapsed to a plain term when it has only one).
+    """
+    groups = []
+    current = []
+    expect_term = True
+    for token in tokens:
+        if expect_term:
+            current.append(parse_term(token, lineNumber))
+            expect_term = False
+        elif token == "AND":
+            expect_term = True
+        elif token == "OR":
+            groups.append(current)
+            current = []
+            expect_term = True
+        else:
+            raise SyntaxErrorException("Unexpected tokens at end of boolean expression", lineNumber)
+    if expect_term:
+        raise SyntaxErrorException("Expected boolean term", lineNumber)
+    groups.append(current)
+
+    groups = [group[0] if len(group) == 1 else And(group) for group in groups]
+    return groups[0] if len(groups) == 1 else Or(groups)
+
+def parse_load(tokens: List[str], lineNumber: int) -> str:
+    if tokens[0] != "LOAD":
+        raise SyntaxErrorException("LOAD is not the first token.", lineNumber)
+    if len(tokens) == 1:
+        raise RuntimeErrorException("You have to specify which program to run", lineNumber)
+    if tokens[1] not in VALID_LOADING_ENVS or len(tokens) != 2:
+        raise RuntimeErrorException("You've gotta load either program 1, 2 or 3", lineNumber)
+    return tokens[1]
+
+def parse_program(robotspeak_program: str) -> Program:
+    """
+    Tokenise and parse a whole program into a Program tree.
+
+    Raises:
+        SyntaxErrorException: If the program has a syntax error; a
+            SyntaxErrors listing every one if it has several
+        RuntimeErrorException: If LOAD names an invalid environment
+    """
+    program, errors = check_syntax(robotspeak_program)
+    if len(errors) == 1:
+        raise errors[0]
+    if errors:
+        raise SyntaxErrors(errors)
+    return program
+
+def check_syntax(robotspeak_program: str) -> Tuple[Program, list]:
+    """
+    Tokenise and parse a whole program, carrying on past errors to find them all.
+
+    Blocks are tracked with an explicit stack rather than recursion, so
+    arbitrarily deep nesting cannot exhaust the Python call stack. A line
+    with an error still opens or closes the block its first token says it
+    does, so one bad line does not leave every later END unmatched. Each
+    line reports at most one error.
+
+    Returns:
+        The Program (None if there were errors) and the errors, in line order
+    """
+    errors = []
+    code_lines = robotspeak_program.strip().split('\n')
+    lines = []
+    for lineNumber, code_line in enumerate(code_lines, start = 1):
+        text = remove_comments(code_line)
+        try:
+            tokens = tokeniser(text, lineNumber)
+            valid = True
+        except SyntaxErrorException as e:
+            errors.append(e)
+            tokens = text.split()
+            valid = False
+        if tokens:
+            lines.append((lineNumber, tokens, valid))
+
+    if not lines:
+        return None, [SyntaxErrorException("LOAD is not the first token.", 1)]
+
+    load_line, load_tokens, valid = lines[0]
+    env = None
+    try:
+        env = parse_load(load_tokens, load_line)
+    except (SyntaxErrorException, RuntimeErrorException) as e:
+        if valid:
+            errors.append(e)
+    if load_tokens[0] == "LOAD":
+        lines = lines[1:]
+
+    body = []
+    blocks = [] # open IF/WHILE nodes, innermost last
+    current = body
+    end_line = None
+    closed_early = False
+
+    for lineNumber, tokens, valid in lines:
+        if end_line is not None:
+            # the program was closed early; report it once, then check the rest as top-level code
+            if not closed_early:
+                errors.append(SyntaxErrorException("END is not the only token on the last line", end_line))
+                closed_early = True
+            end_line = None
+
+        head = tokens[0]
+        try:
+            match head:
+                case "LOAD":
+                    raise SyntaxErrorException("Cannot have more than 1 LOAD", lineNumber)
+                case "IF" | "WHILE":
+                    node = If(None, lineNumber) if head == "IF" else While(None, lineNumber)
+                    current.append(node)
+                    blocks.append(node)
+                    current = node.body
+                    node.cond = parse_expression(tokens[1:], lineNumber)
+                case "OTHERWISE":
+                    matched = blocks and isinstance(blocks[-1], If) and blocks[-1].orelse is None
+                    if matched:
+                        blocks[-1].orelse = []
+                        blocks[-1].else_line = lineNumber
+                        current = blocks[-1].orelse
+                    if len(tokens) != 1:
+                        raise SyntaxErrorException("OTHERWISE must be the only token on its line", lineNumber)
+                    if not matched:
+                        raise SyntaxErrorException("OTHERWISE without a matching IF", lineNumber)
+                case "END":
+                    if not blocks:
+                        # closes the program itself
+                        end_line = lineNumber
+                        if len(tokens) != 1:
+                            raise SyntaxErrorException("END is not the only token on the last line", lineNumber)
+                        continue
+                    node = blocks.pop()
+                    node.end_line = lineNumber
+                    if not blocks:
+                        current = body
+                    elif isinstance(blocks[-1], If) and blocks[-1].orelse is not None:
+                        current = blocks[-1].orelse
+                    else:
+                        current = blocks[-1].body
+                    if len(tokens) != 1:
+                        raise SyntaxErrorException("END must be the only token on its line", lineNumber)
+                case _ if head in ACTIONS:
+                    if len(tokens) != 1:
+                        raise SyntaxErrorException(f"{head} must be the only token on its line", lineNumber)
+                    current.append(Action(head, lineNumber))
+                case _:
+                    if not is_identifier(head):
+                        raise SyntaxErrorException("Invalid token", lineNumber)
+                    if len(tokens) < 3 or tokens[1] != ":=":
+                        raise SyntaxErrorException("Invalid assignment line", lineNumber)
+                    current.append(Assign(head, parse_expression(tokens[2:], lineNumber), lineNumber))
+        except SyntaxErrorException as e:
+            # a line the tokeniser rejected has already reported its error
+            if valid:
+                errors.append(e)
+
+    for node in reversed(blocks):
+        kind = "IF/OTHERWISE" if isinstance(node, If) else "WHILE"
+        errors.append(SyntaxErrorException(f"Missing END for {kind}", node.line))
+    if not blocks and end_line is None and not closed_early:
+        last_line = lines[-1][0] if lines else load_line
+        errors.append(SyntaxErrorException("Missing END at the end of the program", last_line))
+
+    if errors:
+        errors.sort(key = lambda e: e.lineNumber)
+        return None, errors
+    return Program(env, load_line, body, end_line), []
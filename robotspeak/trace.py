@@ -0,0 +1,474 @@
+"""
+Compact binary execution traces, and their replay.
+
+A trace holds the maze as the program found it, then one event per
+statement executed: every condition test (with its outcome), assignment
+(with the value stored) and action (with whether it succeeded and the
+robot's heading afterwards, which gives the robot's delta for a move).
+Events are enough to rebuild the maze at any step without re-running the
+program.
+
+Layout:
+    header      magic, version byte, then varints: map height, map width,
+                robot x, robot y, robot heading, wall flag, object count;
+                if the wall flag is set, a bitmap of interior walls (bit
+                index & 7 of byte index >> 3, index = y * width + x);
+                then x, y, cell flags, key count for every cell holding
+                keys, the door or the exit
+    events      one tag byte each: kind in the low 4 bits, result in bit
+                4, robot heading in bits 5-6; followed by the change in
+                line number since the previous event as a zigzag varint
+    repeats     a REPEAT tag with the period minus one (0 to 15) in bits
+                4-7, then a varint count: the last period events happen
+                again, cycling, count more times. A loop like WHILE
+                FRONT_IS_CLEAR / MOVE_FORWARD / END costs a few bytes
+                however long it runs.
+    end         an END tag, then varints: termination index (in
+                Termination order), statements, actions
+"""
+import argparse
+import sys
+from collections import deque
+from typing import Iterator, List
+from robotspeak.maze import MazeActionError, MazeStandIn, KEY_SYMBOL, TRUE_KEY_SYMBOL, DOOR_SYMBOL, EXIT_SYMBOL, WALL_SYMBOL
+from robotspeak.grid import GridMaze, DIRECTIONS, DIRECTION_COORDINATES, KEY, TRUE_KEY, DOOR, EXIT, WALL
+from robotspeak.vm import (
+    JUMP_IF_FALSE, STORE, LOOP_IF_TRUE, LOOP, ACTION_METHODS, ATTEMPT_METHODS, Termination, RunResult,
+)
+from robotspeak.sinks import NullSink
+
+MAGIC = b"RSTR"
+VERSION = 1
+
+# event kinds
+REPEAT = 0
+BRANCH = 1          # IF condition (JUMP_IF_FALSE); result is the condition's value
+LOOP_TEST = 2       # WHILE condition at a back-edge (LOOP_IF_TRUE or LOOP)
+ASSIGN = 3          # STORE; result is the value stored
+MOVE_FORWARD = 4
+TURN_LEFT = 5
+TURN_RIGHT = 6
+PICK_KEY = 7
+THROW_AWAY_KEY = 8
+OPEN_DOOR = 9
+END = 15
+
+KIND_NAMES = {
+    BRANCH: "IF", LOOP_TEST: "WHILE", ASSIGN: "ASSIGN", MOVE_FORWARD: "MOVE_FORWARD",
+    TURN_LEFT: "TURN_LEFT", TURN_RIGHT: "TURN_RIGHT", PICK_KEY: "PICK_KEY",
+    THROW_AWAY_KEY: "THROW_AWAY_KEY", OPEN_DOOR: "OPEN_DOOR",
+}
+ACTION_KINDS = {name: kind for kind, name in KIND_NAMES.items() if kind >= MOVE_FORWARD}
+CONDITION_KINDS = {JUMP_IF_FALSE: BRANCH, LOOP_IF_TRUE: LOOP_TEST, LOOP: LOOP_TEST, STORE: ASSIGN}
+TERMINATIONS = list(Termination)
+
+# longest run of events a REPEAT record can repeat
+MAX_PERIOD = 16
+
+# how many bytes a recorder buffers before writing to its file
+FLUSH_SIZE = 1 << 16
+
+# varints
+def write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data: bytes, pos: int) -> tuple:
+    """Return (value, position after it)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+def unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+# recording
+def _heading(maze) -> int:
+    return DIRECTIONS.index(maze.robot_direction)
+
+def _cell_flags(text: str) -> tuple:
+    """Return (grid flags, key count) for a Maze-style cell text."""
+    keys = text.count(KEY_SYMBOL)
+    flags = (KEY if keys else 0) | (TRUE_KEY if TRUE_KEY_SYMBOL in text else 0) \
+        | (DOOR if DOOR_SYMBOL in text else 0) | (EXIT if EXIT_SYMBOL in text else 0)
+    return flags, keys
+
+def encode_header(maze) -> bytearray:
+    """Describe maze (any Maze-like object, after create_initial_map) as a trace header."""
+    matrix = maze.get_map_matrix()
+    height, width = len(matrix), len(matrix[0])
+    robot_x, robot_y = maze.robot_location
+
+    bitmap = bytearray((height * width + 7) // 8)
+    interior_walls = False
+    objects = []
+    for y in range(1, height - 1):
+        for x in range(1, width - 1):
+            text = matrix[y][x]
+            if text == WALL_SYMBOL:
+                interior_walls = True
+                index = y * width + x
+                bitmap[index >> 3] |= 1 << (index & 7)
+                continue
+            flags, keys = _cell_flags(text)
+            if flags:
+                objects.append((x, y, flags, keys))
+
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    for value in (height, width, robot_x, robot_y, _heading(maze), int(interior_walls), len(objects)):
+        write_varint(out, value)
+    if interior_walls:
+        out += bitmap
+    for obj in objects:
+        for value in obj:
+            write_varint(out, value)
+    return out
+
+class StatusMaze(MazeStandIn):
+    """
+    Notes whether the last action tried through it succeeded: from the
+    ActionStatus a try_* method returns, or, for a subclass whose raising
+    method is called instead, from whether it raised MazeActionError.
+    """
+    def __init__(self, maze):
+        super().__init__(maze)
+        self.succeeded = True
+        for name, attempt_name in ATTEMPT_METHODS.items():
+            if hasattr(maze, attempt_name):
+                setattr(self, attempt_name, self._attempt(getattr(maze, attempt_name)))
+            method_name = ACTION_METHODS[name]
+            setattr(self, method_name, self._method(getattr(maze, method_name)))
+
+    def _attempt(self, attempt):
+        def noted():
+            status = attempt()
+            self.succeeded = not status
+            return status
+        return noted
+
+    def _method(self, method):
+        def noted():
+            self.succeeded = False
+            method()
+            self.succeeded = True
+        return noted
+
+class TraceRecorder:
+    """
+    Records a run to a trace file. Pass one to vm.run (or Interpreter.run_code) as recorder.
+
+    The recorder wraps the linked predicates and actions, so a run without
+    one pays nothing for tracing. Use as a context manager, or call close().
+
+    Args:
+        file: Path of the trace file to create, or a binary file object to write to
+    """
+    def __init__(self, file):
+        self._file = open(file, "wb") if isinstance(file, str) else file
+        self._owns_file = isinstance(file, str)
+        self._buffer = bytearray()
+        self._maze = None # the StatusMaze the code is linked against
+        self._line = 0
+        self._recent = deque(maxlen=MAX_PERIOD) # encodings of the last events, repeats included
+        self._cycle = None      # events being repeated, when a run is pending
+        self._count = 0         # repeats of the pending run so far
+
+    def start(self, maze, sink) -> tuple:
+        """Write the header for maze; the code is linked against a StatusMaze around it."""
+        self._buffer += encode_header(maze)
+        self._maze = StatusMaze(maze)
+        return self._maze, sink
+
+    def _event(self, kind: int, result: bool, heading: int, line: int) -> None:
+        encoding = bytearray((kind | result << 4 | heading << 5,))
+        write_varint(encoding, zigzag(line - self._line))
+        self._line = line
+        encoding = bytes(encoding)
+
+        recent = self._recent
+        cycle = self._cycle
+        if cycle is not None:
+            if encoding == cycle[self._count % len(cycle)]:
+                self._count += 1
+                recent.append(encoding)
+                return
+            self._end_repeat()
+
+        # the shortest period that the event would continue
+        for period in range(1, len(recent) + 1):
+            if recent[-period] == encoding:
+                self._cycle, self._count = tuple(recent)[-period:], 1
+                break
+        else:
+            self._buffer += encoding
+            if len(self._buffer) >= FLUSH_SIZE:
+                self._flush()
+        recent.append(encoding)
+
+    def _end_repeat(self) -> None:
+        self._buffer.append(REPEAT | (len(self._cycle) - 1) << 4)
+        write_varint(self._buffer, self._count)
+        self._cycle = None
+
+    def condition(self, op: int, predicate, line: int):
+        """Wrap a linked predicate so that every evaluation is recorded."""
+        kind = CONDITION_KINDS[op]
+        event = self._event
+        def recorded():
+            result = predicate()
+            event(kind, bool(result), 0, line)
+            return result
+        return recorded
+
+    def action(self, act, maze, name: str, line: int):
+        """Wrap a linked action; success is the status the maze returned for it (turns always succeed)."""
+        kind = ACTION_KINDS[name]
+        event = self._event
+        if kind == TURN_LEFT or kind == TURN_RIGHT:
+            def recorded():
+                halt = act()
+                event(kind, True, _heading(maze), line)
+                return halt
+        else:
+            noted = self._maze
+            def recorded():
+                halt = act()
+                event(kind, noted.succeeded, _heading(maze), line)
+                return halt
+        return recorded
+
+    def finish(self, result: RunResult) -> None:
+        """Record how the run ended."""
+        if self._cycle is not None:
+            self._end_repeat()
+        self._buffer.append(END)
+        for value in (TERMINATIONS.index(result.reason), result.statements, result.actions):
+            write_varint(self._buffer, value)
+
+    def _flush(self) -> None:
+        self._file.write(self._buffer)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        if self._cycle is not None:
+            self._end_repeat()
+        self._flush()
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# reading
+class Event:
+    """One executed statement, as read back from a trace."""
+    __slots__ = ("line", "kind", "result", "heading")
+
+    def __init__(self, line: int, kind: int, result: bool, heading: int):
+        self.line = line
+        self.kind = kind
+        self.result = result
+        self.heading = heading
+
+    def __repr__(self):
+        return f"Event(line {self.line}, {KIND_NAMES[self.kind]}, {self.result})"
+
+class TraceMaze(GridMaze):
+    """A GridMaze rebuilt from a trace header, walls included."""
+    __slots__ = ()
+
+    def create_initial_map(self) -> None:
+        """The cells come from the trace; there is nothing to create."""
+
+class Trace:
+    """
+    A trace file read into memory.
+
+    Attributes:
+        termination: How the run ended (a Termination), or None if the trace has no END record
+        statements: Statements the run executed, from the END record
+        actions: Actions the run executed, from the END record
+    """
+    def __init__(self, data: bytes):
+        if data[:4] != MAGIC or data[4] != VERSION:
+            raise ValueError(f"Not a version {VERSION} trace file")
+        pos = 5
+        values = []
+        for _ in range(7):
+            value, pos = read_varint(data, pos)
+            values.append(value)
+        self._height, self._width, self._robot_x, self._robot_y, self._heading, walls, num_objects = values
+        self._bitmap = None
+        if walls:
+            size = (self._height * self._width + 7) // 8
+            self._bitmap = data[pos:pos + size]
+            pos += size
+        self._objects = []
+        for _ in range(num_objects):
+            obj = []
+            for _ in range(4):
+                value, pos = read_varint(data, pos)
+                obj.append(value)
+            self._objects.append(tuple(obj))
+        self._data = data
+        self._events_start = pos
+        self.termination = None
+        self.statements = None
+        self.actions = None
+
+    @classmethod
+    def open(cls, path: str) -> "Trace":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def initial_maze(self) -> TraceMaze:
+        """Return a maze in the state the program found it."""
+        keys = [[x, y] for x, y, flags, count in self._objects if flags & KEY for _ in range(count)]
+        door = next(([x, y] for x, y, flags, _ in self._objects if flags & DOOR), [0, 0])
+        exit = next(([x, y] for x, y, flags, _ in self._objects if flags & EXIT), [0, 0])
+        maze = TraceMaze(width = self._width - 2,
+                         length = self._height - 2,
+                         key_locations = keys,
+                         door_location = door,
+                         exit_location = exit,
+                         robot_location = [self._robot_x, self._robot_y],
+                         robot_direction = DIRECTIONS[self._heading])
+
+        cells = maze._build_cells()
+        if self._bitmap is not None:
+            for index in range(len(cells)):
+                if self._bitmap[index >> 3] >> (index & 7) & 1:
+                    cells[index] = WALL
+        maze._cells = cells
+        for x, y, flags, count in self._objects:
+            index = y * self._width + x
+            cells[index] = flags
+            if count:
+                maze._keys[index] = count
+            if flags & TRUE_KEY:
+                maze.true_key_location = [x, y]
+        return maze
+
+    def events(self) -> Iterator[Event]:
+        """Yield every event in order, repeats expanded."""
+        data = self._data
+        pos = self._events_start
+        line = 0
+        recent = deque(maxlen=MAX_PERIOD) # (tag, line delta) of the last events, repeats included
+        while pos < len(data):
+            tag = data[pos]
+            pos += 1
+            kind = tag & 0x0f
+            if kind == END:
+                values = []
+                for _ in range(3):
+                    value, pos = read_varint(data, pos)
+                    values.append(value)
+                self.termination = TERMINATIONS[values[0]]
+                self.statements, self.actions = values[1], values[2]
+                return
+            if kind == REPEAT:
+                period = (tag >> 4) + 1
+                count, pos = read_varint(data, pos)
+                cycle = tuple(recent)[-period:]
+                for i in range(count):
+                    tag, delta = cycle[i % period]
+                    recent.append((tag, delta))
+                    line += delta
+                    yield Event(line, tag & 0x0f, bool(tag >> 4 & 1), tag >> 5 & 3)
+                continue
+            delta, pos = read_varint(data, pos)
+            delta = unzigzag(delta)
+            line += delta
+            recent.append((tag, delta))
+            yield Event(line, kind, bool(tag >> 4 & 1), tag >> 5 & 3)
+
+def apply_event(maze: GridMaze, event: Event) -> None:
+    """Bring maze up to date with one event."""
+    kind = event.kind
+    if kind < MOVE_FORWARD:
+        return
+    maze._dir = event.heading
+    if not event.result:
+        return
+    if kind == MOVE_FORWARD:
+        dx, dy = DIRECTION_COORDINATES[event.heading]
+        maze._pos += dy * maze._stride + dx
+    elif kind == PICK_KEY or kind == THROW_AWAY_KEY or kind == OPEN_DOOR:
+        method = {PICK_KEY: maze.pick_key, THROW_AWAY_KEY: maze.throw_away_key, OPEN_DOOR: maze.open_door}[kind]
+        try:
+            method()
+        except MazeActionError:
+            pass
+
+def replay(trace: Trace, step: int = None) -> tuple:
+    """
+    Rebuild the maze after the first step events (all of them if step is None).
+
+    Returns:
+        (maze, events applied, last event applied or None)
+    """
+    maze = trace.initial_maze()
+    maze.sink = NullSink() # replayed actions must not print their messages
+    applied = 0
+    last = None
+    for event in trace.events():
+        if step is not None and applied == step:
+            break
+        apply_event(maze, event)
+        applied += 1
+        last = event
+    return maze, applied, last
+
+def describe(event: Event) -> str:
+    """Return a one-line description of an event."""
+    if event.kind >= MOVE_FORWARD:
+        outcome = f"{'ok' if event.result else 'failed'}, facing {DIRECTIONS[event.heading]}"
+    else:
+        outcome = "TRUE" if event.result else "FALSE"
+    return f"line {event.line:<5} {KIND_NAMES[event.kind]:<15} {outcome}"
+
+def main(argv: List[str] = None) -> None:
+    """Entry point for `robotspeak replay`."""
+    parser = argparse.ArgumentParser(
+        prog="robotspeak replay",
+        description="Show the maze at any step of a recorded Robotspeak trace.",
+    )
+    parser.add_argument("tracepath", type=str, help="The trace file, as written by --trace.")
+    parser.add_argument("--step", type=int, default=None,
+                        help="Show the maze after this many events (default: the end of the run).")
+    parser.add_argument("--list", action="store_true",
+                        help="List every event instead of drawing the maze.")
+    args = parser.parse_args(argv)
+
+    try:
+        trace = Trace.open(args.tracepath)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.list:
+        for index, event in enumerate(trace.events(), 1):
+            print(f"{index:8} {describe(event)}")
+    else:
+        maze, applied, last = replay(trace, args.step)
+        print(f"Step {applied}" + ("" if last is None else f": {describe(last)}"))
+        maze.print_map()
+        print(maze.get_status())
+    if trace.termination is not None:
+        print(f"Run ended: {trace.termination.value} after {trace.statements} statements and {trace.actions} actions")
@@ -0,0 +1,628 @@
+"""
+Bytecode compiler and virtual machine for robotspeak.
+
+A parsed Program is flattened into a list of (opcode, argument, dest, line)
+instructions with every block boundary turned into a jump target. The VM
+runs that list with a single dispatch loop, so neither compiling nor
+running a program recurses, however deeply its blocks are nested.
+
+Variables are numbered when the program is compiled and live in a list
+of slots while it runs, so neither assignments nor reads look a name up.
+"""
+import sys
+from enum import Enum
+from time import perf_counter
+from robotspeak.maze import MazeActionError, ACTION_ERRORS, is_kept_in_step
+from robotspeak.errors import RuntimeErrorException
+from robotspeak.syntax import Program, Action, Assign, If, While, Const, Sensor
+from robotspeak.predicates import fold_condition, resolve_variables, compile_condition, requires_front_clear
+from robotspeak.sinks import QUIET, MAPS, TerminalSink
+
+# opcodes
+LOAD_ENV = 0        # arg: environment id, dest: variable names by slot; builds the maze and links the code
+ACTION = 1          # arg: action name
+JUMP_IF_FALSE = 2   # arg: condition; jump to dest when it is false
+JUMP = 3            # dest: forward target
+STORE = 4           # arg: condition; store its value in slot dest
+LOOP_IF_TRUE = 5    # arg: WHILE condition; jump back to dest when it is true
+LOOP = 6            # dest: back-edge of a WHILE whose condition is always true
+HALT = 7            # final END
+MOVE_WHILE = 8      # arg: (condition, plain); a whole WHILE cond / MOVE_FORWARD / END, only made by link
+
+OPCODE_NAMES = {
+    LOAD_ENV: "LOAD_ENV", ACTION: "ACTION", JUMP_IF_FALSE: "JUMP_IF_FALSE",
+    JUMP: "JUMP", STORE: "STORE", LOOP_IF_TRUE: "LOOP_IF_TRUE", LOOP: "LOOP",
+    HALT: "HALT", MOVE_WHILE: "MOVE_WHILE",
+}
+
+# every opcode except JUMP, LOAD_ENV, HALT and MOVE_WHILE executes one statement:
+# an action, an assignment, or one evaluation of an IF/WHILE condition;
+# MOVE_WHILE executes as many as the loop it stands for would
+
+ACTION_METHODS = {
+    "MOVE_FORWARD": "move_forward",
+    "TURN_LEFT": "turn_left",
+    "TURN_RIGHT": "turn_right",
+    "PICK_KEY": "pick_key",
+    "THROW_AWAY_KEY": "throw_away_key",
+    "OPEN_DOOR": "open_door",
+}
+
+# the ActionStatus-returning variants of the actions that can fail
+ATTEMPT_METHODS = {
+    "MOVE_FORWARD": "try_move_forward",
+    "PICK_KEY": "try_pick_key",
+    "THROW_AWAY_KEY": "try_throw_away_key",
+    "OPEN_DOOR": "try_open_door",
+}
+
+# actions followed by a map at MAPS verbosity
+MAP_ACTIONS = ("MOVE_FORWARD", "TURN_LEFT", "TURN_RIGHT")
+
+# how many statements run between two looks at the clock
+TIME_CHECK_INTERVAL = 1024
+
+# compiling
+def patch(code: list, index: int) -> None:
+    """Point the jump at index to the next instruction to be emitted."""
+    if index is None:
+        return
+    op, arg, _, line = code[index]
+    code[index] = (op, arg, len(code), line)
+
+def emit_branch(code: list, cond, line: int, slots: dict, assigned: set):
+    """
+    Emit a jump taken when cond is false and return its index for patching.
+
+    Constant conditions need no test: an always-true one emits nothing
+    (None is returned) and an always-false one becomes a plain JUMP.
+    slots and assigned are as for resolve_variables.
+    """
+    cond = fold_condition(cond)
+    if isinstance(cond, Const):
+        if cond.value:
+            return None
+        code.append((JUMP, None, None, line))
+    else:
+        code.append((JUMP_IF_FALSE, resolve_variables(cond, slots, assigned), None, line))
+    return len(code) - 1
+
+def compile_program(program: Program) -> list:
+    """
+    Flatten a Program into a list of instructions.
+
+    Uses an explicit work list of statements and pending jump fix-ups
+    instead of recursing into nested blocks. Conditions are stored as
+    folded expression trees and only become predicates when the code is
+    linked against a maze.
+
+    Every variable gets a slot, numbered in order of first appearance;
+    LOAD_ENV carries the names by slot. The walk also tracks which
+    variables are definitely assigned at each point, and reads of those
+    skip the runtime check for an unassigned variable.
+    """
+    code = [(LOAD_ENV, program.env, None, program.load_line)]
+    slots = {}
+    assigned = set()
+
+    # items are statements, or ("endif", ...) / ("loop", ...) / ("else", ...) markers;
+    # the markers carry what is definitely assigned at the other way into the code after them
+    work = list(reversed(program.body))
+    while work:
+        item = work.pop()
+        match item:
+            case ("endif", index, other):
+                patch(code, index)
+                if other is not None:
+                    assigned &= other
+            case ("loop", start, index, cond, line, before):
+                if cond is None:
+                    code.append((LOOP, None, start, line))
+                elif not isinstance(cond, Const):
+                    code.append((LOOP_IF_TRUE, resolve_variables(cond, slots, assigned), start, line))
+                patch(code, index)
+                # the body may not have run at all
+                assigned = before
+            case ("else", index, orelse, line, before):
+                code.append((JUMP, None, None, line))
+                patch(code, index)
+                work.append(("endif", len(code) - 1, assigned))
+                work.extend(reversed(orelse))
+                assigned = set(before)
+            case Action():
+                code.append((ACTION, item.name, None, item.line))
+            case Assign():
+                expr = resolve_variables(fold_condition(item.expr), slots, assigned)
+                code.append((STORE, expr, slots.setdefault(item.name, len(slots)), item.line))
+                assigned.add(item.name)
+            case If():
+                index = emit_branch(code, item.cond, item.line, slots, assigned)
+                before = None if index is None else set(assigned)
+                if item.orelse:
+                    work.append(("else", index, item.orelse, item.else_line, assigned))
+                    assigned = set(assigned)
+                else:
+                    work.append(("endif", index, before))
+                work.extend(reversed(item.body))
+            case While():
+                # the condition is tested once on entry and then at the bottom
+                # of every iteration, so each back-edge is a single instruction
+                index = emit_branch(code, item.cond, item.line, slots, assigned)
+                cond = None if index is None else fold_condition(item.cond)
+                work.append(("loop", len(code), index, cond, item.line, set(assigned)))
+                work.extend(reversed(item.body))
+
+    code[0] = (LOAD_ENV, program.env, tuple(slots), program.load_line)
+    code.append((HALT, None, None, program.end_line))
+    return code
+
+def compile_attempt(maze, name: str, lineNumber: int, sink):
+    """
+    compile_action for an action whose try_* method the maze can be trusted
+    with: a refused action returns an ActionStatus instead of raising, and
+    its warning is only formatted for a sink that shows it.
+    """
+    attempt = getattr(maze, ATTEMPT_METHODS[name])
+
+    if sink.level == QUIET:
+        if name == "OPEN_DOOR":
+            def act():
+                return not attempt() and maze.is_maze_solved()
+        else:
+            def act():
+                attempt()
+                return False
+        return act
+
+    write = sink.write
+    if name == "OPEN_DOOR":
+        def act():
+            status = attempt()
+            if status:
+                write(f"Warning at line {lineNumber}: {ACTION_ERRORS[status]}")
+                return False
+            write("\nAction: OPEN_DOOR")
+            if maze.is_maze_solved():
+                write("\n*** MAZE SOLVED! ***")
+                return True
+            return False
+        return act
+
+    draw = sink.map if sink.level >= MAPS and name in MAP_ACTIONS else None
+    def act():
+        status = attempt()
+        if status:
+            write(f"Warning at line {lineNumber}: {ACTION_ERRORS[status]}")
+            return False
+        write(f"\nAction: {name} {maze.get_status()}")
+        if draw is not None:
+            draw(maze)
+        return False
+    return act
+
+def compile_action(maze, name: str, lineNumber: int, sink):
+    """
+    Turn an action into a zero-argument callable bound to maze that returns True when the program must halt.
+
+    What it reports is fixed here by the sink's level: a QUIET action only
+    calls the maze method, an ACTIONS one also writes its action line or
+    warning, and a MAPS one hands the maze to sink.map after moves and turns.
+
+    Actions that can fail go through their try_* method (see
+    compile_attempt) unless a subclass overrides the raising method
+    without it, in which case the override is called and its
+    MazeActionError caught as before.
+    """
+    method_name = ACTION_METHODS[name]
+    attempt_name = ATTEMPT_METHODS.get(name)
+    if attempt_name is not None and hasattr(maze, attempt_name) \
+            and is_kept_in_step(maze, attempt_name, method_name):
+        return compile_attempt(maze, name, lineNumber, sink)
+
+    method = getattr(maze, method_name)
+
+    if sink.level == QUIET:
+        if name == "OPEN_DOOR":
+            def act():
+                try:
+                    method()
+                except MazeActionError:
+                    return False
+                return maze.is_maze_solved()
+        else:
+            def act():
+                try:
+                    method()
+                except MazeActionError:
+                    pass
+                return False
+        return act
+
+    write = sink.write
+    if name == "OPEN_DOOR":
+        def act():
+            try:
+                method()
+            except MazeActionError as e:
+                write(f"Warning at line {lineNumber}: {e}")
+                return False
+            write("\nAction: OPEN_DOOR")
+            if maze.is_maze_solved():
+                write("\n*** MAZE SOLVED! ***")
+                return True
+            return False
+        return act
+
+    draw = sink.map if sink.level >= MAPS and name in MAP_ACTIONS else None
+    def act():
+        try:
+            method()
+        except MazeActionError as e:
+            write(f"Warning at line {lineNumber}: {e}")
+            return False
+        write(f"\nAction: {name} {maze.get_status()}")
+        if draw is not None:
+            draw(maze)
+        return False
+    return act
+
+def is_move_loop(code: list, pc: int) -> bool:
+    """
+    Return True if code[pc] starts a WHILE whose body is a single MOVE_FORWARD
+    and whose condition is false whenever the front is blocked, e.g.
+    WHILE FRONT_IS_CLEAR AND NOT ON_KEY: the robot can never bump a wall in it.
+    """
+    if pc + 2 >= len(code):
+        return False
+    op, cond, dest, _ = code[pc]
+    return (op == JUMP_IF_FALSE and dest == pc + 3
+            and code[pc + 1][0] == ACTION and code[pc + 1][1] == "MOVE_FORWARD"
+            and code[pc + 2][0] == LOOP_IF_TRUE and code[pc + 2][2] == pc + 1
+            and requires_front_clear(cond))
+
+def wall_distance_is_exact(maze) -> bool:
+    """Return True if maze.wall_distance and maze.advance can stand in for is_front_clear and move_forward."""
+    return (is_kept_in_step(maze, "wall_distance", "is_front_clear")
+            and is_kept_in_step(maze, "advance", "move_forward", "try_move_forward"))
+
+def halt_when_solved(act, maze, sink):
+    """
+    Wrap a MOVE_FORWARD callable so that it also halts the program when the
+    move leaves the maze solved (the robot stepped onto the exit). Moves
+    are the only actions besides OPEN_DOOR that can solve it.
+    """
+    solved = maze.is_maze_solved
+    if sink.level == QUIET:
+        return lambda: act() or solved()
+    write = sink.write
+    def checked():
+        if act():
+            return True
+        if solved():
+            write("\n*** MAZE SOLVED! ***")
+            return True
+        return False
+    return checked
+
+def link(code: list, maze, slots: list, sink, recorder = None, stop_when_solved: bool = False) -> list:
+    """
+    Return a copy of code with every condition and action compiled into a
+    callable bound to maze, its variables read from slots.
+
+    A recorder (robotspeak.trace.TraceRecorder or
+    robotspeak.profiler.LineProfiler) is started on the maze and sink,
+    hands back the ones the callables are bound to (itself or stand-ins
+    that watch the calls made through them), and gets to wrap each
+    callable; LOOP then becomes a LOOP_IF_TRUE on an always-true condition
+    so that its back-edges are recorded too.
+
+    With a QUIET sink and no recorder, the entry test of every loop
+    is_move_loop accepts becomes a MOVE_WHILE, which runs the whole loop
+    in one instruction. The loop's own instructions are kept after it, so
+    the VM can hand over to them part way through.
+
+    With stop_when_solved, every MOVE_FORWARD also halts the program when
+    it solves the maze (see halt_when_solved), and no MOVE_WHILE is made,
+    as it moves without looking for the exit.
+    """
+    if recorder is not None:
+        maze, sink = recorder.start(maze, sink)
+    move_loops = recorder is None and sink.level == QUIET and not stop_when_solved
+    plain_ok = move_loops and wall_distance_is_exact(maze)
+    linked = []
+    for pc, (op, arg, dest, line) in enumerate(code):
+        if move_loops and is_move_loop(code, pc):
+            plain = plain_ok and isinstance(arg, Sensor)
+            linked.append((MOVE_WHILE, (compile_condition(arg, maze, slots, line), plain), dest, line))
+            continue
+        if op == JUMP_IF_FALSE or op == STORE or op == LOOP_IF_TRUE:
+            arg = compile_condition(arg, maze, slots, line)
+            if recorder is not None:
+                arg = recorder.condition(op, arg, line)
+        elif op == ACTION:
+            name = arg
+            arg = compile_action(maze, name, line, sink)
+            if stop_when_solved and name == "MOVE_FORWARD":
+                arg = halt_when_solved(arg, maze, sink)
+            if recorder is not None:
+                arg = recorder.action(arg, maze, name, line)
+        elif op == LOOP and recorder is not None:
+            op, arg = LOOP_IF_TRUE, recorder.condition(LOOP, lambda: True, line)
+        linked.append((op, arg, dest, line))
+    return linked
+
+def disassemble(code: list) -> str:
+    """Return a readable listing of compiled code, one instruction per line."""
+    return '\n'.join(
+        f"{pc:5} line {line:<5} {OPCODE_NAMES[op]:<14} {'' if arg is None else arg} {'' if dest is None else dest}".rstrip()
+        for pc, (op, arg, dest, line) in enumerate(code)
+    )
+
+# running
+class Termination(Enum):
+    """Why a run stopped."""
+    HALTED = "halted"                       # reached the final END
+    SOLVED = "solved"                       # OPEN_DOOR solved the maze (or a move did, with stop_when_solved)
+    STATEMENT_LIMIT = "statement limit"     # Limits.max_statements reached
+    ACTION_LIMIT = "action limit"           # Limits.max_actions reached
+    TIMEOUT = "timeout"                     # Limits.max_seconds elapsed
+    CYCLE = "cycle"                         # the interpreter state repeated at a loop back-edge
+
+class Limits:
+    """
+    Bounds on a single run. None means unbounded.
+
+    Args:
+        max_statements: Statements (actions, assignments, condition tests) allowed
+        max_actions: Robot actions allowed
+        max_seconds: Wall-clock time allowed, checked every TIME_CHECK_INTERVAL statements
+        stop_when_solved: Also stop with Termination.SOLVED as soon as
+            is_maze_solved() is true, e.g. when the robot moves onto the exit,
+            not only when OPEN_DOOR solves the maze
+    """
+    __slots__ = ("max_statements", "max_actions", "max_seconds", "stop_when_solved")
+
+    def __init__(self, max_statements: int = None, max_actions: int = None, max_seconds: float = None,
+                 stop_when_solved: bool = False):
+        self.max_statements = max_statements
+        self.max_actions = max_actions
+        self.max_seconds = max_seconds
+        self.stop_when_solved = stop_when_solved
+
+class RunResult:
+    """
+    Outcome of a run.
+
+    Attributes:
+        reason: A Termination member
+        statements: Statements executed
+        actions: Robot actions executed (including ones that failed with a warning)
+        elapsed: Seconds spent in the run
+        line: Line of the last statement executed, or of the one that was
+            refused when a limit stopped the run; for CYCLE, the WHILE line
+            whose back-edge the repeated state was seen at
+        cycle_length: For CYCLE, the number of statements in one turn of the cycle
+    """
+    __slots__ = ("reason", "statements", "actions", "elapsed", "line", "cycle_length")
+
+    def __init__(self, reason: Termination, statements: int, actions: int, elapsed: float, line: int,
+                 cycle_length: int = None):
+        self.reason = reason
+        self.statements = statements
+        self.actions = actions
+        self.elapsed = elapsed
+        self.line = line
+        self.cycle_length = cycle_length
+
+    @property
+    def finished(self) -> bool:
+        """True if the program stopped on its own rather than hitting a limit."""
+        return self.reason in (Termination.HALTED, Termination.SOLVED)
+
+    def __repr__(self):
+        cycle = "" if self.cycle_length is None else f", cycle_length={self.cycle_length}"
+        return (f"RunResult({self.reason.name}, statements={self.statements}, "
+                f"actions={self.actions}, elapsed={self.elapsed:.6f}, line={self.line}{cycle})")
+
+def run(code: list, load, variables: dict, limits: Limits = None, detect_cycles: bool = False,
+        sink = None, recorder = None, jit: bool = True) -> RunResult:
+    """
+    Execute compiled code.
+
+    Args:
+        code: Instructions from compile_program
+        load: Called with the environment id by LOAD_ENV; returns the maze to use
+        variables: Mapping the program's variables are left in, by name,
+            when the run stops; while it runs they live in a list of slots
+        limits: Optional Limits; the run stops with the matching Termination
+            instead of executing the statement that would exceed them
+        detect_cycles: Record the program position, maze state and
+            variable slots at every taken loop back-edge and stop with
+            Termination.CYCLE as soon as one repeats exactly. A deterministic
+            program that revisits a state can never terminate.
+        sink: Sink actions are reported to; defaults to a TerminalSink on sys.stdout
+        recorder: Optional recorder (a robotspeak.trace.TraceRecorder or
+            robotspeak.profiler.LineProfiler) that sees every statement
+            executed and is finished with the result
+        jit: Compile the path hot loops take into straight-line code (see
+            robotspeak.jit); ignored with a recorder or detect_cycles
+    """
+    if sink is None:
+        sink = TerminalSink()
+    limits = limits or Limits()
+    max_statements = sys.maxsize if limits.max_statements is None else limits.max_statements
+    max_actions = sys.maxsize if limits.max_actions is None else limits.max_actions
+    deadline = None if limits.max_seconds is None else perf_counter() + limits.max_seconds
+    stop_when_solved = limits.stop_when_solved
+
+    # the only per-statement cost is comparing against checkpoint; the
+    # slower checks (statement limit, clock) run when it is reached
+    def watchdog(statements):
+        if statements >= max_statements:
+            return Termination.STATEMENT_LIMIT, statements
+        if deadline is not None and perf_counter() >= deadline:
+            return Termination.TIMEOUT, statements
+        if deadline is None:
+            return None, max_statements
+        return None, min(max_statements, statements + TIME_CHECK_INTERVAL)
+
+    seen = {} if detect_cycles else None # (pc, maze state, slots) -> statements executed when first seen
+
+    def cycle_start(pc, statements):
+        # keyed on the state itself, not its hash: states that merely collide are told apart
+        first = seen.setdefault((pc, maze.state_key(), tuple(slots)), statements)
+        return None if first == statements else first
+
+    start = perf_counter()
+    _, checkpoint = watchdog(0)
+    cycle_length = None
+    statements = 0
+    actions = 0
+    maze = None
+    names = ()
+    slots = []
+    traces = None
+    pc = 0
+
+    try:
+        while True:
+            op, arg, dest, line = code[pc]
+            pc += 1
+
+            if op == ACTION:
+                if statements == checkpoint:
+                    reason, checkpoint = watchdog(statements)
+                    if reason:
+                        break
+                if actions == max_actions:
+                    reason = Termination.ACTION_LIMIT
+                    break
+                statements += 1
+                actions += 1
+                if arg():
+                    reason = Termination.SOLVED
+                    break
+            elif op == JUMP_IF_FALSE:
+                if statements == checkpoint:
+                    reason, checkpoint = watchdog(statements)
+                    if reason:
+                        break
+                statements += 1
+                if not arg():
+                    pc = dest
+            elif op == LOOP_IF_TRUE:
+                if statements == checkpoint:
+                    reason, checkpoint = watchdog(statements)
+                    if reason:
+                        break
+                statements += 1
+                if arg():
+                    pc = dest
+                    if seen is not None:
+                        first = cycle_start(pc, statements)
+                        if first is not None:
+                            reason = Termination.CYCLE
+                            cycle_length = statements - first
+                            break
+                    elif traces is not None:
+                        pc, statements, actions, solved = traces.enter(pc, statements, actions, checkpoint,
+                                                                       max_actions)
+                        if solved:
+                            reason = Termination.SOLVED
+                            line = code[pc - 1][3]
+                            break
+            elif op == JUMP:
+                pc = dest
+            elif op == LOOP:
+                if statements == checkpoint:
+                    reason, checkpoint = watchdog(statements)
+                    if reason:
+                        break
+                statements += 1
+                pc = dest
+                if seen is not None:
+                    first = cycle_start(pc, statements)
+                    if first is not None:
+                        reason = Termination.CYCLE
+                        cycle_length = statements - first
+                        break
+                elif traces is not None:
+                    pc, statements, actions, solved = traces.enter(pc, statements, actions, checkpoint,
+                                                                   max_actions)
+                    if solved:
+                        reason = Termination.SOLVED
+                        line = code[pc - 1][3]
+                        break
+            elif op == STORE:
+                if statements == checkpoint:
+                    reason, checkpoint = watchdog(statements)
+                    if reason:
+                        break
+                statements += 1
+                slots[dest] = arg()
+            elif op == MOVE_WHILE:
+                # dest is the instruction after the loop and dest - 2 its MOVE_FORWARD; counts,
+                # limits and cycle checks come out exactly as running the loop's instructions would
+                if statements == checkpoint:
+                    reason, checkpoint = watchdog(statements)
+                    if reason:
+                        break
+                statements += 1
+                test, plain = arg
+                if not test():
+                    pc = dest
+                    continue
+                pc = dest - 2
+                if plain and seen is None:
+                    # WHILE FRONT_IS_CLEAR: jump straight to the wall, or as far as
+                    # the loop would get before the next limit check
+                    distance = maze.wall_distance()
+                    steps = min(distance, (checkpoint - statements) // 2, max_actions - actions)
+                    maze.advance(steps)
+                    statements += 2 * steps
+                    actions += steps
+                    if steps == distance:
+                        pc = dest
+                else:
+                    # step and test cell by cell; stop short of any limit check and
+                    # leave it to the loop's own instructions
+                    while statements + 1 < checkpoint and actions < max_actions:
+                        maze.move_forward()
+                        statements += 2
+                        actions += 1
+                        if not test():
+                            pc = dest
+                            break
+                        if seen is not None:
+                            first = cycle_start(pc, statements)
+                            if first is not None:
+                                cycle_length = statements - first
+                                break
+                    if cycle_length is not None:
+                        reason = Termination.CYCLE
+                        break
+            elif op == LOAD_ENV:
+                maze = load(arg)
+                if maze is None:
+                    raise RuntimeErrorException("Maze has not been loaded yet.", line)
+                names = dest
+                slots = [None] * len(names)
+                linked = link(code, maze, slots, sink, recorder, stop_when_solved)
+                if jit and recorder is None and seen is None:
+                    # imported here: robotspeak.jit builds on this module
+                    from robotspeak.jit import LoopJit
+                    traces = LoopJit(code, linked, maze, slots)
+                code = linked
+                if stop_when_solved and maze.is_maze_solved():
+                    reason = Termination.SOLVED
+                    break
+            elif op == HALT:
+                reason = Termination.HALTED
+                break
+    finally:
+        variables.update((name, value) for name, value in zip(names, slots) if value is not None)
+
+    result = RunResult(reason, statements, actions, perf_counter() - start, line, cycle_length)
+    if recorder is not None:
+        recorder.finish(result)
+    return result
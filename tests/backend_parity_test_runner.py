@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Backend Parity Test Runner: Maze, GridMaze, SparseMaze and MappedMaze
+Runs the three algorithms on the same random rooms with every maze backend
+and checks that they report the same actions and end in the same state,
+and that all of them reject the same invalid inputs with the same message.
+"""
+
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.maze import Maze, MazeValidationError
+from robotspeak.grid import GridMaze, SparseMaze
+from robotspeak.mazefile import write_maze_file, open_maze_file
+from robotspeak.compiler import Interpreter
+from robotspeak.generator import generate_maze
+from robotspeak.sinks import TerminalSink, ACTIONS
+from robotspeak.vm import Limits
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEEDS = range(20)
+LIMITS = Limits(max_statements=100000)
+
+def maze_arguments(maze):
+    """Return the constructor arguments a maze was built with."""
+    return dict(width=maze.width,
+                length=maze.length,
+                key_locations=[list(location) for location in maze.key_locations],
+                door_location=list(maze.door_location),
+                exit_location=list(maze.exit_location),
+                robot_location=list(maze.robot_location),
+                robot_direction=maze.robot_direction,
+                true_key_idx=maze.true_key_idx + 1)
+
+def build_mazes(arguments, directory):
+    """Build one ready maze per backend from the same arguments."""
+    mazes = []
+    for maze_class in (Maze, GridMaze, SparseMaze):
+        maze = maze_class(**arguments)
+        maze.create_initial_map()
+        mazes.append((maze_class.__name__, maze))
+    path = os.path.join(directory, "room.rsmz")
+    write_maze_file(path, **arguments)
+    mazes.append(("MappedMaze", open_maze_file(path)))
+    return mazes
+
+def outcome(maze, program):
+    """Run program on maze and return everything a backend must agree on."""
+    output = io.StringIO()
+    result = Interpreter(maze=maze, sink=TerminalSink(output, level=ACTIONS)).run(program, LIMITS)
+    return (result.reason, result.statements, result.actions, result.line, output.getvalue(),
+            list(maze.robot_location), maze.robot_direction, maze.has_key, maze.has_opened_door,
+            maze.is_maze_solved())
+
+def test_program_parity():
+    """Every backend takes the same actions for the three algorithms."""
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        for number in (1, 2, 3):
+            with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+                program = f.read()
+            for seed in SEEDS:
+                arguments = maze_arguments(generate_maze(str(number), Maze, seed))
+                results = [(name, outcome(maze, program)) for name, maze in build_mazes(arguments, directory)]
+                expected = results[0][1]
+                for name, result in results[1:]:
+                    if result != expected:
+                        failures.append(f"program {number}, seed {seed}: {name} differs from Maze")
+    return failures
+
+# invalid inputs: changes to a valid room, all of which Maze rejects, and whether a maze file can hold them
+# (the format stores unsigned coordinate pairs and a direction index)
+VALID_ROOM = dict(width=5, length=4, key_locations=[[2, 2], [3, 3]], door_location=[4, 4],
+                  exit_location=[5, 1], robot_location=[1, 1], robot_direction='north', true_key_idx=1)
+INVALID_ROOMS = [
+    ("robot x out of range", dict(robot_location=[8, 1]), True),
+    ("robot y out of range", dict(robot_location=[1, 9]), True),
+    ("robot x zero", dict(robot_location=[0, 2]), True),
+    ("door out of range", dict(door_location=[6, 4]), True),
+    ("exit out of range", dict(exit_location=[5, 5]), True),
+    ("key out of range", dict(key_locations=[[2, 2], [7, 3]]), True),
+    ("true key index too large", dict(true_key_idx=3), True),
+    ("true key index zero", dict(true_key_idx=0), True),
+    ("zero width", dict(width=0), True),
+    ("unknown direction", dict(robot_direction='up'), False),
+    ("robot location not a list", dict(robot_location=(1, 1)), False),
+    ("robot location too short", dict(robot_location=[1]), False),
+]
+
+def rejection(build):
+    """Return the MazeValidationError message build() raises, or None if it succeeds."""
+    try:
+        build()
+    except MazeValidationError as e:
+        return str(e)
+    return None
+
+def test_validation_parity():
+    """Every backend rejects the same invalid rooms with Maze's message."""
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        for description, change, storable in INVALID_ROOMS:
+            arguments = dict(VALID_ROOM, **change)
+            expected = rejection(lambda: Maze(**arguments).create_initial_map())
+            if expected is None:
+                failures.append(f"{description}: Maze accepted it")
+                continue
+            for maze_class in (GridMaze, SparseMaze):
+                message = rejection(lambda: maze_class(**arguments).create_initial_map())
+                if message != expected:
+                    failures.append(f"{description}: {maze_class.__name__} gave {message!r}, expected {expected!r}")
+
+            if not storable:
+                continue
+            path = os.path.join(directory, "invalid.rsmz")
+            write_maze_file(path, **arguments)
+            message = rejection(lambda: open_maze_file(path))
+            if message != expected:
+                failures.append(f"{description}: MappedMaze gave {message!r}, expected {expected!r}")
+    return failures
+
+def main():
+    """Main test runner for backend parity"""
+
+    print("🎯 BACKEND PARITY TEST SUITE")
+    print("=" * 60)
+    print("Maze, GridMaze, SparseMaze and MappedMaze must behave identically")
+    print()
+
+    results = []
+    for test_name, test in (("Programs 1-3 on random rooms", test_program_parity),
+                            ("Invalid inputs rejected alike", test_validation_parity)):
+        print(f"🚀 RUNNING: {test_name}")
+        failures = test()
+        for failure in failures:
+            print(f"❌ {failure}")
+        results.append((test_name, not failures))
+        print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
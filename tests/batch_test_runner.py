@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Batch Test Runner: many mazes per run
+Runs programs through run_batch on seeds, ready-made mazes and corpus
+files, in this process and in worker processes, and checks that a maze
+that fails validation is reported instead of stopping the batch, and that
+cycle detection is off unless asked for.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.maze import Maze
+from robotspeak.grid import GridMaze
+from robotspeak.batch import run_batch
+from robotspeak.corpus import write_corpus
+from robotspeak.vm import Limits
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# turns on the spot forever, so only a limit or cycle detection stops it
+SPINNING = """LOAD 2
+WHILE TRUE
+    TURN_LEFT
+END
+END
+"""
+
+def read_program(number):
+    with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+        return f.read()
+
+def room(maze_class, robot_location):
+    return maze_class(width=4, length=4, key_locations=[[2, 2]], door_location=[4, 4],
+                      exit_location=[1, 1], robot_location=robot_location, robot_direction='north')
+
+def test_invalid_mazes():
+    """A maze that fails validation is counted as an "invalid maze" failure and the rest still run."""
+    failures = []
+    program = read_program(2)
+    limits = Limits(max_statements=20000)
+    for workers in (0, 2):
+        mazes = [room(GridMaze, [2, 3]), room(GridMaze, [9, 9]), room(GridMaze, [3, 2])]
+        report = run_batch(program, mazes=mazes, workers=workers, limits=limits)
+        if report.runs != 3 or report.failures["invalid maze"] != 1:
+            failures.append(f"mazes, {workers} workers: {report.runs} runs, failures {dict(report.failures)}")
+        elif report.statements.get("max") is None:
+            failures.append(f"mazes, {workers} workers: the valid mazes were not run")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "mixed.rscp")
+        write_corpus(path, [room(Maze, [2, 3]), room(Maze, [9, 9]), room(Maze, [3, 2])], 1)
+        for workers in (0, 2):
+            report = run_batch(program, corpus=path, workers=workers, limits=limits)
+            if report.runs != 3 or report.failures["invalid maze"] != 1:
+                failures.append(f"corpus, {workers} workers: {report.runs} runs, failures {dict(report.failures)}")
+    return failures
+
+def test_cycle_detection():
+    """Runs go on to the statement limit unless detect_cycles is set."""
+    failures = []
+    limits = Limits(max_statements=5000)
+    report = run_batch(SPINNING, seeds=range(4), workers=0, limits=limits)
+    if dict(report.failures) != {"statement limit": 4}:
+        failures.append(f"without detect_cycles: failures {dict(report.failures)}")
+    report = run_batch(SPINNING, seeds=range(4), workers=0, limits=limits, detect_cycles=True)
+    if dict(report.failures) != {"cycle": 4} or report.statements["max"] >= 5000:
+        failures.append(f"with detect_cycles: failures {dict(report.failures)}, statements {report.statements}")
+    return failures
+
+def run_cli(*options):
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write(SPINNING)
+    try:
+        completed = subprocess.run([sys.executable, "-m", "robotspeak.main", "batch", f.name,
+                                    "--seeds", "3", "--workers", "0", "--max-statements", "5000", *options],
+                                   cwd=REPO_ROOT, capture_output=True, text=True)
+    finally:
+        os.unlink(f.name)
+    return completed.returncode, completed.stdout
+
+def test_cli_flags():
+    """`robotspeak batch --detect-cycles` turns detection on; there is no flag to turn it off."""
+    failures = []
+    code, output = run_cli()
+    if code != 0 or "Unsolved (statement limit): 3" not in output:
+        failures.append(f"default: exit {code}, output {output!r}")
+    code, output = run_cli("--detect-cycles")
+    if code != 0 or "Unsolved (cycle): 3" not in output:
+        failures.append(f"--detect-cycles: exit {code}, output {output!r}")
+    code, _ = run_cli("--no-cycle-detection")
+    if code != 2:
+        failures.append(f"--no-cycle-detection was accepted (exit {code})")
+    return failures
+
+def main():
+    """Main test runner for batches"""
+
+    print("🎯 BATCH TEST SUITE")
+    print("=" * 60)
+    print("Batches must report every maze, and only detect cycles when asked to")
+    print()
+
+    results = []
+    for test_name, test in (("Invalid mazes reported", test_invalid_mazes),
+                            ("Cycle detection is opt-in", test_cycle_detection),
+                            ("robotspeak batch flags", test_cli_flags)):
+        print(f"🚀 RUNNING: {test_name}")
+        failures = test()
+        for failure in failures:
+            print(f"❌ {failure}")
+        results.append((test_name, not failures))
+        print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Check Test Runner: static checks before execution
+Checks that check_program reports every syntax error of a program in one
+pass with its line, that parse_program raises them together as a
+SyntaxErrors before anything runs, that variables read before they are
+assigned are warned about, and that `robotspeak check` exits accordingly.
+"""
+
+import io
+import os
+import subprocess
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.errors import SyntaxErrorException, SyntaxErrors
+from robotspeak.syntax import parse_program
+from robotspeak.check import check_program
+from robotspeak.compiler import Interpreter
+from robotspeak.sinks import TerminalSink, ACTIONS
+from robotspeak.vm import Limits
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (program, line of every error in order)
+BROKEN_PROGRAMS = [
+    ("""LOAD 2
+MOVE_FORWARD
+FLY
+IF FRONT_IS_CLEAR AND
+    TURN_LEFT
+END
+WHILE TRUE
+    TURN_RIGHT
+""", [3, 4, 7]),
+    ("""LOAD 2
+TURN_LEFT
+END
+END
+""", [3]),
+    ("""LOAD 2
+TURN_LEFT
+""", [2]),
+    ("""LOAD 2
+IF AT_EXIT OR OR ON_KEY
+    OPEN_DOOR
+END
+WHILE FRONT_IS_CLEAR
+    MOVE_FORWARD
+    seen := TRUE FALSE
+END
+END
+""", [2, 7]),
+]
+
+WARNED_PROGRAM = """LOAD 2
+IF FRONT_IS_CLEAR
+    clear := TRUE
+END
+IF clear
+    TURN_LEFT
+END
+IF never
+    TURN_LEFT
+END
+END
+"""
+WARNINGS = ["Warning at line 5: clear may be read before it is assigned",
+            "Warning at line 8: never is never assigned"]
+
+def read_program(number):
+    with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+        return f.read()
+
+def test_all_errors():
+    """Every syntax error is reported at once, in line order."""
+    failures = []
+    for i, (program, lines) in enumerate(BROKEN_PROGRAMS):
+        errors, warnings = check_program(program)
+        if [e.lineNumber for e in errors] != lines or warnings:
+            failures.append(f"broken program {i + 1}: errors at {[e.lineNumber for e in errors]}, warnings {warnings}")
+        try:
+            parse_program(program)
+            failures.append(f"broken program {i + 1}: parsed")
+        except SyntaxErrors as e:
+            if len(lines) == 1 or [error.lineNumber for error in e.errors] != lines or e.lineNumber != lines[0]:
+                failures.append(f"broken program {i + 1}: SyntaxErrors at {[error.lineNumber for error in e.errors]}")
+        except SyntaxErrorException as e:
+            if len(lines) != 1 or e.lineNumber != lines[0]:
+                failures.append(f"broken program {i + 1}: single error at line {e.lineNumber}")
+    return failures
+
+def test_nothing_runs():
+    """A program with a syntax error late on performs no action at all."""
+    failures = []
+    program = "LOAD 2\n" + "TURN_LEFT\n" * 50 + "FLY\nEND\n"
+    output = io.StringIO()
+    try:
+        Interpreter(sink=TerminalSink(output, level=ACTIONS)).run(program, Limits(max_statements=1000))
+        failures.append("the program ran")
+    except SyntaxErrorException as e:
+        if e.lineNumber != 52:
+            failures.append(f"error reported at line {e.lineNumber}")
+    if output.getvalue():
+        failures.append(f"output before the error: {output.getvalue()[:80]!r}")
+    return failures
+
+def test_warnings():
+    """Reads that may come before an assignment are warned about; the algorithms are clean."""
+    failures = []
+    errors, warnings = check_program(WARNED_PROGRAM)
+    if errors or warnings != WARNINGS:
+        failures.append(f"warned program: errors {errors}, warnings {warnings}")
+    for number in (1, 2, 3):
+        if check_program(read_program(number)) != ([], []):
+            failures.append(f"program {number}: {check_program(read_program(number))}")
+    return failures
+
+def run_check(directory, program, *options):
+    path = os.path.join(directory, "program.txt")
+    with open(path, "w") as f:
+        f.write(program)
+    completed = subprocess.run([sys.executable, "-m", "robotspeak.main", "check", path, *options],
+                               cwd=REPO_ROOT, capture_output=True, text=True)
+    return completed.returncode, completed.stdout
+
+def test_cli():
+    """`robotspeak check` fails on errors, and on warnings only with --strict."""
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        code, output = run_check(directory, read_program(2))
+        if code != 0 or not output.rstrip().endswith(": ok"):
+            failures.append(f"clean program: exit {code}, {output!r}")
+        program, lines = BROKEN_PROGRAMS[0]
+        code, output = run_check(directory, program)
+        if code != 1 or [f"at line {line} " in output for line in lines] != [True] * len(lines):
+            failures.append(f"broken program: exit {code}, {output!r}")
+        code, output = run_check(directory, WARNED_PROGRAM)
+        if code != 0 or not all(warning in output for warning in WARNINGS):
+            failures.append(f"warned program: exit {code}, {output!r}")
+        code, _ = run_check(directory, WARNED_PROGRAM, "--strict")
+        if code != 1:
+            failures.append(f"warned program with --strict: exit {code}")
+    return failures
+
+def main():
+    """Main test runner for static checks"""
+
+    print("🎯 CHECK TEST SUITE")
+    print("=" * 60)
+    print("Every syntax error must be found before anything runs")
+    print()
+
+    results = []
+    for test_name, test in (("Every error reported", test_all_errors),
+                            ("Nothing runs", test_nothing_runs),
+                            ("Unassigned variables warned", test_warnings),
+                            ("robotspeak check", test_cli)):
+        print(f"🚀 RUNNING: {test_name}")
+        failures = test()
+        for failure in failures:
+            print(f"❌ {failure}")
+        results.append((test_name, not failures))
+        print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
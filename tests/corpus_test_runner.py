@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Corpus Test Runner: build, read back and reject truncated corpus files
+Builds corpora from seed ranges and checks that every record reads back as
+the maze its seed generates, then truncates the file and checks that
+Corpus and `robotspeak corpus show` refuse it with an error message.
+"""
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.maze import Maze
+from robotspeak.generator import generate_maze
+from robotspeak.corpus import Corpus, build_corpus
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEEDS = range(20)
+
+def fields(maze):
+    return (maze.width, maze.length, [list(location) for location in maze.key_locations],
+            list(maze.door_location), list(maze.exit_location), list(maze.robot_location),
+            maze.robot_direction, maze.true_key_idx)
+
+def test_round_trip(directory):
+    """Every record rebuilds the maze its seed generates, by index and by iteration."""
+    failures = []
+    for env in ("1", "2", "3"):
+        path = os.path.join(directory, f"env{env}.rscp")
+        if build_corpus(path, env, SEEDS) != len(SEEDS):
+            failures.append(f"env {env}: wrong count written")
+        expected = [fields(generate_maze(env, Maze, random.Random(seed))) for seed in SEEDS]
+        with Corpus(path) as corpus:
+            if len(corpus) != len(SEEDS):
+                failures.append(f"env {env}: corpus holds {len(corpus)} mazes")
+            if [fields(corpus[i]) for i in range(len(corpus))] != expected:
+                failures.append(f"env {env}: indexed mazes differ from the generated ones")
+            if [fields(maze) for maze in corpus] != expected:
+                failures.append(f"env {env}: iterated mazes differ from the generated ones")
+            if fields(corpus[-1]) != expected[-1]:
+                failures.append(f"env {env}: corpus[-1] is not the last maze")
+            try:
+                corpus[len(SEEDS)]
+                failures.append(f"env {env}: reading past the end did not raise IndexError")
+            except IndexError:
+                pass
+    return failures
+
+def show(path):
+    completed = subprocess.run([sys.executable, "-m", "robotspeak.main", "corpus", "show", path, "--index", "4"],
+                               cwd=REPO_ROOT, capture_output=True, text=True)
+    return completed.returncode, completed.stderr
+
+def test_truncated(directory):
+    """A corpus shorter than its header says is refused when opened."""
+    failures = []
+    path = os.path.join(directory, "five.rscp")
+    build_corpus(path, "3", range(5))
+    with open(path, "rb") as f:
+        contents = f.read()
+    truncated = os.path.join(directory, "truncated.rscp")
+    for cut in (1, 10, len(contents) // 2):
+        with open(truncated, "wb") as f:
+            f.write(contents[:-cut])
+        try:
+            Corpus(truncated).close()
+            failures.append(f"cut {cut} bytes: opened")
+        except ValueError:
+            pass
+        code, stderr = show(truncated)
+        if code != 1 or not stderr.startswith("Error:") or "Traceback" in stderr:
+            failures.append(f"cut {cut} bytes: corpus show exited {code} with {stderr!r}")
+    return failures
+
+def main():
+    """Main test runner for corpus files"""
+
+    print("🎯 CORPUS TEST SUITE")
+    print("=" * 60)
+    print("Corpus records must read back as their mazes; truncated files are refused")
+    print()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for test_name, test in (("Build and read back", test_round_trip),
+                                ("Truncated files refused", test_truncated)):
+            print(f"🚀 RUNNING: {test_name}")
+            failures = test(directory)
+            for failure in failures:
+                print(f"❌ {failure}")
+            results.append((test_name, not failures))
+            print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
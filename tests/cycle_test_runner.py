@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Cycle Test Runner: detect_cycles
+Checks that programs known to loop forever stop with Termination.CYCLE
+and the length of one lap, and that programs that terminate run exactly
+as they do without cycle detection, even when distinct states hash alike.
+"""
+
+import os
+import random
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.maze import Maze
+from robotspeak.grid import GridMaze
+from robotspeak.compiler import Interpreter
+from robotspeak.generator import generate_maze
+from robotspeak.sinks import NullSink
+from robotspeak.vm import Limits, Termination
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEEDS = range(20)
+LIMITS = Limits(max_statements=20000)
+
+# (program, statements in one lap of its cycle, WHILE line the cycle is entered through)
+LOOPING_PROGRAMS = [
+    # four turns bring the robot back: 4 x (loop test + TURN_LEFT)
+    ("""LOAD 2
+    WHILE TRUE
+        TURN_LEFT
+    END
+    END
+    """, 8, 2),
+    # two turns face it back the way it came: 2 x (loop test + 2 turns)
+    ("""LOAD 2
+    WHILE TRUE
+        TURN_LEFT
+        TURN_LEFT
+    END
+    END
+    """, 6, 2),
+    # the variable is part of the state: 4 x (loop test + assignment + TURN_RIGHT)
+    ("""LOAD 2
+    clear := TRUE
+    WHILE TRUE
+        clear := FRONT_IS_CLEAR
+        TURN_RIGHT
+    END
+    END
+    """, 12, 3),
+]
+
+class Colliding:
+    """Wraps a value so that every instance hashes alike but compares by the value."""
+    def __init__(self, value):
+        self.value = value
+
+    def __hash__(self):
+        return 0
+
+    def __eq__(self, other):
+        return isinstance(other, Colliding) and self.value == other.value
+
+class CollidingMaze(Maze):
+    """A Maze whose state keys all hash alike, though they still compare as Maze's do."""
+    def state_key(self):
+        return (Colliding(super().state_key()),)
+
+def room(maze_class):
+    maze = maze_class(width=4, length=4, key_locations=[[2, 2]], door_location=[4, 4],
+                      exit_location=[1, 1], robot_location=[2, 3], robot_direction='north')
+    maze.create_initial_map()
+    return maze
+
+def read_program(number):
+    with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+        return f.read()
+
+def test_infinite_loops():
+    """Programs that loop forever stop with CYCLE after one lap, reporting its length."""
+    failures = []
+    for i, (program, lap, line) in enumerate(LOOPING_PROGRAMS):
+        for maze_class in (Maze, GridMaze):
+            result = Interpreter(maze=room(maze_class), sink=NullSink()).run(program, LIMITS, True)
+            if (result.reason, result.cycle_length, result.line) != (Termination.CYCLE, lap, line):
+                failures.append(f"looping program {i + 1}, {maze_class.__name__}: {result}")
+            elif result.statements > 2 * lap + line:
+                failures.append(f"looping program {i + 1}, {maze_class.__name__}: stopped late, {result}")
+    return failures
+
+def run_program(program, number, maze_class, seed, detect_cycles):
+    maze = generate_maze(str(number), maze_class, random.Random(seed))
+    maze.create_initial_map()
+    result = Interpreter(maze=maze, sink=NullSink()).run(program, LIMITS, detect_cycles)
+    return (result.reason, result.statements, result.actions, result.cycle_length,
+            list(maze.robot_location), maze.is_maze_solved())
+
+def test_terminating_programs():
+    """Programs that terminate end exactly as without detection, and report no cycle."""
+    failures = []
+    for number in (1, 2, 3):
+        program = read_program(number)
+        for maze_class in (Maze, GridMaze, CollidingMaze):
+            for seed in SEEDS:
+                plain = run_program(program, number, Maze, seed, False)
+                detected = run_program(program, number, maze_class, seed, True)
+                if plain[0] not in (Termination.HALTED, Termination.SOLVED):
+                    continue
+                if detected != plain:
+                    failures.append(f"program {number}, {maze_class.__name__}, seed {seed}: "
+                                    f"{detected[:4]} with detection, {plain[:4]} without")
+    return failures
+
+def main():
+    """Main test runner for cycle detection"""
+
+    print("🎯 CYCLE TEST SUITE")
+    print("=" * 60)
+    print("detect_cycles must stop infinite loops and nothing else")
+    print()
+
+    results = []
+    for test_name, test in (("Infinite loops stop", test_infinite_loops),
+                            ("Terminating programs unaffected", test_terminating_programs)):
+        print(f"🚀 RUNNING: {test_name}")
+        failures = test()
+        for failure in failures:
+            print(f"❌ {failure}")
+        results.append((test_name, not failures))
+        print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
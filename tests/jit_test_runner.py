@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+JIT Test Runner: traced loops against the VM
+Runs the three algorithms and some loop-heavy programs with hot loops
+compiled into traces and with every instruction run by the VM, and checks
+that both report the same actions, stop for the same reason at the same
+counts and leave the maze and variables in the same state, also when a
+limit or a solve stops a run in the middle of a trace. Does the same for
+`robotspeak` with and without --no-jit.
+"""
+
+import io
+import os
+import random
+import subprocess
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak import jit
+from robotspeak.maze import Maze
+from robotspeak.grid import GridMaze
+from robotspeak.compiler import Interpreter
+from robotspeak.generator import random_maze
+from robotspeak.sinks import TerminalSink, QUIET, ACTIONS
+from robotspeak.vm import Limits
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEEDS = range(12)
+
+# loops whose bodies branch on sensors and variables, so traces side-exit and get recorded again
+LOOP_PROGRAMS = [
+    """LOAD 3
+    turned := FALSE
+    WHILE TRUE
+        IF FRONT_IS_CLEAR
+            MOVE_FORWARD
+            turned := FALSE
+        OTHERWISE
+            IF turned
+                TURN_RIGHT
+                TURN_RIGHT
+            OTHERWISE
+                TURN_LEFT
+            END
+            turned := TRUE
+        END
+        IF ON_KEY
+            PICK_KEY
+        END
+        IF AT_DOOR OR AT_EXIT
+            OPEN_DOOR
+        END
+    END
+    END
+    """,
+    """LOAD 2
+    going := TRUE
+    WHILE going
+        WHILE FRONT_IS_CLEAR AND going
+            MOVE_FORWARD
+            IF AT_EXIT OR AT_DOOR
+                going := FALSE
+            END
+        END
+        TURN_RIGHT
+        IF FRONT_IS_CLEAR
+            MOVE_FORWARD
+        END
+        TURN_RIGHT
+        WHILE FRONT_IS_CLEAR AND going
+            MOVE_FORWARD
+            IF AT_EXIT
+                going := FALSE
+            END
+        END
+        TURN_LEFT
+        IF FRONT_IS_CLEAR
+            MOVE_FORWARD
+        OTHERWISE
+            going := FALSE
+        END
+        TURN_LEFT
+    END
+    OPEN_DOOR
+    END
+    """,
+]
+
+LIMITS = [
+    Limits(max_statements=50000),
+    Limits(max_statements=50000, max_actions=777),
+    Limits(max_statements=1234),
+    Limits(max_statements=50000, stop_when_solved=True),
+]
+
+def read_program(number):
+    with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+        return f.read()
+
+def outcome(program, maze_class, seed, limits, level, use_jit):
+    """Run program on a large random room and return everything the JIT must leave unchanged."""
+    rng = random.Random(seed)
+    maze = random_maze(rng, rng.randint(1, 4), False, maze_class, 60)
+    maze.create_initial_map()
+    output = io.StringIO()
+    session = Interpreter(maze=maze, sink=TerminalSink(output, level=level), jit=use_jit)
+    result = session.run(program, limits)
+    return (result.reason, result.statements, result.actions, result.line, output.getvalue(),
+            sorted(session.variables.items()), maze.state_key())
+
+def test_interpreter_jit():
+    """Interpreter(jit=True) and Interpreter(jit=False) run every program identically."""
+    failures = []
+    programs = [(f"program {number}", read_program(number)) for number in (2, 3)]
+    programs += [(f"loop program {i + 1}", program) for i, program in enumerate(LOOP_PROGRAMS)]
+    jit._compiled.clear()
+    for name, program in programs:
+        for maze_class in (Maze, GridMaze):
+            for seed in SEEDS:
+                limits = LIMITS[seed % len(LIMITS)]
+                level = QUIET if seed % 2 else ACTIONS
+                traced = outcome(program, maze_class, seed, limits, level, True)
+                plain = outcome(program, maze_class, seed, limits, level, False)
+                if traced != plain:
+                    failures.append(f"{name}, {maze_class.__name__}, seed {seed}: "
+                                    f"JIT {traced[:4]} but VM {plain[:4]}")
+    if not jit._compiled:
+        failures.append("no loop was traced, so nothing was compared")
+    return failures
+
+def run_cli(number, seed, *options):
+    path = os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt')
+    completed = subprocess.run([sys.executable, "-m", "robotspeak.main", path, "--seed", str(seed),
+                                "--max-statements", "20000", *options],
+                               cwd=REPO_ROOT, capture_output=True, text=True)
+    return completed.returncode, completed.stdout, completed.stderr
+
+def test_cli_no_jit():
+    """`robotspeak --no-jit` prints exactly what `robotspeak` does."""
+    failures = []
+    for number in (1, 2, 3):
+        for seed in range(3):
+            for options in (("--actions-only",), ("--quiet", "--max-actions", "40")):
+                if run_cli(number, seed, *options) != run_cli(number, seed, *options, "--no-jit"):
+                    failures.append(f"program {number}, seed {seed}, {' '.join(options)}: output differs")
+    return failures
+
+def main():
+    """Main test runner for the JIT"""
+
+    print("🎯 JIT TEST SUITE")
+    print("=" * 60)
+    print("Traced loops must behave exactly as the VM runs them")
+    print()
+
+    results = []
+    for test_name, test in (("JIT against the VM", test_interpreter_jit),
+                            ("robotspeak --no-jit", test_cli_no_jit)):
+        print(f"🚀 RUNNING: {test_name}")
+        failures = test()
+        for failure in failures:
+            print(f"❌ {failure}")
+        results.append((test_name, not failures))
+        print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Maze File Test Runner: save, reopen and reject malformed files
+Saves a maze with interior walls, reopens it as a MappedMaze and checks that
+it is the same maze, checks that a file with no wall bits set still keeps
+the robot inside its border, then damages the file in several ways and
+checks that open_maze_file rejects every one with a MazeValidationError.
+"""
+
+import io
+import os
+import struct
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.maze import Maze, MazeValidationError, WALL_SYMBOL
+from robotspeak.grid import GridMaze
+from robotspeak.mazefile import HEADER, KEY, save_maze, open_maze_file
+from robotspeak.compiler import Interpreter
+from robotspeak.sinks import TerminalSink, ACTIONS
+from robotspeak.vm import Limits
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def walled_maze():
+    """A 9x7 room with a wall across the middle that has a gap in it."""
+    maze = Maze(width=9, length=7, key_locations=[[2, 6], [8, 2]], door_location=[8, 6],
+                exit_location=[9, 1], robot_location=[1, 7], robot_direction='east', true_key_idx=2)
+    maze.create_initial_map()
+    for x in range(1, 9):
+        maze.set_location([x, 4], WALL_SYMBOL)
+    return maze
+
+def state(maze):
+    return (maze.width, maze.length, [list(location) for location in maze.key_locations],
+            list(maze.true_key_location), list(maze.door_location), list(maze.exit_location),
+            list(maze.robot_location), maze.robot_direction, maze.get_map_matrix())
+
+def run_program(maze, number):
+    with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+        program = f.read()
+    output = io.StringIO()
+    result = Interpreter(maze=maze, sink=TerminalSink(output, level=ACTIONS)).run(
+        program, Limits(max_statements=20000))
+    return result.reason, result.statements, result.actions, output.getvalue(), list(maze.robot_location)
+
+def test_round_trip(directory):
+    """A saved maze reopens with the same map, objects and behaviour."""
+    failures = []
+    path = os.path.join(directory, "walled.rsmz")
+    save_maze(walled_maze(), path)
+    mapped = open_maze_file(path)
+    if state(mapped) != state(walled_maze()):
+        failures.append("reopened maze differs from the saved one")
+    mapped.close()
+    for number in (2, 3):
+        mapped = open_maze_file(path)
+        if run_program(mapped, number) != run_program(walled_maze(), number):
+            failures.append(f"program {number} runs differently on the reopened maze")
+        mapped.close()
+    return failures
+
+def damaged_files(original: bytes):
+    """Yield (description, contents) for ways a maze file can be malformed."""
+    header = list(HEADER.unpack_from(original))
+    num_keys = header[6]
+    keys_end = HEADER.size + num_keys * KEY.size
+
+    def with_header(**fields):
+        names = ["magic", "version", "direction", "width", "length", "true_key_idx", "num_keys",
+                 "robot_x", "robot_y", "door_x", "door_y", "exit_x", "exit_y", "offset"]
+        values = list(header)
+        for name, value in fields.items():
+            values[names.index(name)] = value
+        return HEADER.pack(*values) + original[HEADER.size:]
+
+    yield "empty file", b""
+    yield "truncated header", original[:HEADER.size - 1]
+    yield "wrong magic", b"XXXX" + original[4:]
+    yield "wrong version", with_header(version=99)
+    yield "invalid direction", with_header(direction=7)
+    yield "truncated key records", original[:keys_end - 1]
+    yield "more keys than the file holds", with_header(num_keys=1000)[:keys_end + 8]
+    yield "truncated wall bitmap", original[:-1]
+    yield "bitmap offset inside the key table", with_header(offset=HEADER.size)
+    yield "robot outside the room", with_header(robot_x=50)
+    yield "true key index out of range", with_header(true_key_idx=5)
+    # [1, 4] to [8, 4] are the interior wall
+    yield "robot on a wall", with_header(robot_x=1, robot_y=4)
+    yield "door on a wall", with_header(door_x=8, door_y=4)
+    yield "exit on a wall", with_header(exit_x=3, exit_y=4)
+
+def test_cleared_border(directory):
+    """A file whose bitmap has no bits set still has its border: robots stop at it instead of reading past it."""
+    failures = []
+    path = os.path.join(directory, "walled.rsmz")
+    save_maze(walled_maze(), path)
+    with open(path, "rb") as f:
+        contents = bytearray(f.read())
+    offset = HEADER.unpack_from(contents)[-1]
+    contents[offset:] = bytes(len(contents) - offset)
+    cleared = os.path.join(directory, "cleared.rsmz")
+    with open(cleared, "wb") as f:
+        f.write(contents)
+
+    def open_room():
+        room = GridMaze(width=9, length=7, key_locations=[[2, 6], [8, 2]], door_location=[8, 6],
+                        exit_location=[9, 1], robot_location=[1, 7], robot_direction='east', true_key_idx=2)
+        room.create_initial_map()
+        return room
+
+    mapped = open_maze_file(cleared)
+    if mapped.get_map_matrix() != open_room().get_map_matrix():
+        failures.append("cleared bitmap does not read as a room with only its border")
+    for direction in ('north', 'west', 'south', 'east'):
+        mapped.robot_direction = direction
+        room = open_room()
+        room.robot_direction = direction
+        if mapped.wall_distance() != room.wall_distance() or mapped.is_front_clear() != room.is_front_clear():
+            failures.append(f"facing {direction}: the border is not a wall")
+    mapped.close()
+    for number in (2, 3):
+        mapped = open_maze_file(cleared)
+        try:
+            if run_program(mapped, number) != run_program(open_room(), number):
+                failures.append(f"program {number} runs differently on the cleared maze")
+        except IndexError as e:
+            failures.append(f"program {number} raised IndexError: {e}")
+        mapped.close()
+    return failures
+
+def test_malformed_files(directory):
+    """Every malformed file is rejected with MazeValidationError."""
+    failures = []
+    path = os.path.join(directory, "walled.rsmz")
+    save_maze(walled_maze(), path)
+    with open(path, "rb") as f:
+        original = f.read()
+    for description, contents in damaged_files(original):
+        damaged = os.path.join(directory, "damaged.rsmz")
+        with open(damaged, "wb") as f:
+            f.write(contents)
+        try:
+            maze = open_maze_file(damaged)
+        except MazeValidationError:
+            continue
+        except (struct.error, IndexError, ValueError) as e:
+            failures.append(f"{description}: raised {type(e).__name__}: {e}")
+            continue
+        maze.close()
+        failures.append(f"{description}: accepted")
+    return failures
+
+def main():
+    """Main test runner for maze files"""
+
+    print("🎯 MAZE FILE TEST SUITE")
+    print("=" * 60)
+    print("Round-trips a walled maze through a maze file and rejects damaged files")
+    print()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for test_name, test in (("Save and reopen", test_round_trip),
+                                ("Border without wall bits", test_cleared_border),
+                                ("Malformed files rejected", test_malformed_files)):
+            print(f"🚀 RUNNING: {test_name}")
+            failures = test(directory)
+            for failure in failures:
+                print(f"❌ {failure}")
+            results.append((test_name, not failures))
+            print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Optimizer Test Runner: -O1 and -O2
+Checks that -O1 leaves the actions a run performs unchanged, that -O2 ends
+in the same state, and that a loop whose turns cancel out under -O2 can
+still be stopped by an action limit.
+"""
+
+import io
+import os
+import random
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.maze import Maze
+from robotspeak.compiler import Interpreter
+from robotspeak.generator import generate_maze
+from robotspeak.sinks import TerminalSink, ACTIONS
+from robotspeak.vm import Limits, Termination
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEEDS = range(20)
+LIMITS = Limits(max_statements=100000)
+# -O1 runs the same actions in fewer statements, so its runs are compared up to an action limit
+ACTION_LIMITS = Limits(max_statements=1000000, max_actions=2000)
+
+# programs with code -O1 folds away: constant conditions, dead loops and unread variables
+FOLDED_PROGRAMS = [
+    """LOAD 2
+    unused := FRONT_IS_CLEAR
+    IF TRUE
+        TURN_LEFT
+    END
+    WHILE FALSE
+        MOVE_FORWARD
+    END
+    WHILE FRONT_IS_CLEAR OR FALSE
+        MOVE_FORWARD
+    END
+    IF AT_EXIT AND TRUE
+        OPEN_DOOR
+    END
+    TURN_RIGHT
+    WHILE TRUE
+        IF FRONT_IS_CLEAR
+            MOVE_FORWARD
+        END
+        TURN_LEFT
+        TURN_LEFT
+        TURN_LEFT
+        IF AT_EXIT
+            OPEN_DOOR
+        END
+    END
+    TURN_LEFT
+    END
+    """,
+    """LOAD 3
+    seen := FALSE
+    WHILE TRUE
+        IF ON_KEY
+            PICK_KEY
+            seen := TRUE
+        END
+        IF seen AND AT_DOOR
+            OPEN_DOOR
+        END
+        IF FRONT_IS_CLEAR AND TRUE
+            MOVE_FORWARD
+        END
+        TURN_RIGHT
+        TURN_LEFT
+        TURN_LEFT
+    END
+    END
+    """,
+]
+
+# loops whose turns -O2 would cancel down to nothing
+TURNING_LOOPS = [
+    """LOAD 2
+    WHILE TRUE
+        TURN_LEFT
+        TURN_RIGHT
+    END
+    END
+    """,
+    """LOAD 2
+    WHILE TRUE
+        TURN_LEFT
+        TURN_LEFT
+        TURN_LEFT
+        TURN_LEFT
+    END
+    END
+    """,
+    """LOAD 2
+    done := FALSE
+    WHILE TRUE
+        TURN_RIGHT
+        done := FRONT_IS_CLEAR
+        TURN_LEFT
+        TURN_RIGHT
+        TURN_LEFT
+    END
+    END
+    """,
+]
+
+def read_program(number):
+    with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+        return f.read()
+
+def run_program(program, env, seed, level, limits=LIMITS):
+    """Run program at optimisation level on the maze seed generates; return its result, output and maze."""
+    maze = generate_maze(env, Maze, random.Random(seed))
+    maze.create_initial_map()
+    output = io.StringIO()
+    result = Interpreter(maze=maze, sink=TerminalSink(output, level=ACTIONS)).run(program, limits,
+                                                                                 optimize_level=level)
+    return result, output.getvalue(), maze
+
+def final_state(maze):
+    return (list(maze.robot_location), maze.robot_direction, maze.has_key, maze.has_opened_door,
+            maze.is_maze_solved())
+
+def test_o1_preserves_actions():
+    """-O1 performs exactly the actions of the program as written."""
+    failures = []
+    programs = [(f"program {number}", read_program(number), str(number)) for number in (1, 2, 3)]
+    programs += [(f"folded program {i + 1}", program, "2" if i == 0 else "3")
+                 for i, program in enumerate(FOLDED_PROGRAMS)]
+    for name, program, env in programs:
+        for seed in SEEDS:
+            plain, plain_output, plain_maze = run_program(program, env, seed, 0, ACTION_LIMITS)
+            folded, folded_output, folded_maze = run_program(program, env, seed, 1, ACTION_LIMITS)
+            if (folded.reason, folded.actions, folded_output) != (plain.reason, plain.actions, plain_output):
+                failures.append(f"{name}, seed {seed}: -O1 actions differ")
+            elif final_state(folded_maze) != final_state(plain_maze):
+                failures.append(f"{name}, seed {seed}: -O1 ends in a different state")
+            elif folded.statements > plain.statements:
+                failures.append(f"{name}, seed {seed}: -O1 ran more statements")
+    return failures
+
+def test_o2_same_outcome():
+    """-O2 may drop turns but ends in the same state."""
+    failures = []
+    for number in (1, 2, 3):
+        program = read_program(number)
+        for seed in SEEDS:
+            plain, _, plain_maze = run_program(program, str(number), seed, 0)
+            optimised, _, optimised_maze = run_program(program, str(number), seed, 2)
+            if not plain.finished:
+                continue
+            if optimised.reason != plain.reason or final_state(optimised_maze) != final_state(plain_maze):
+                failures.append(f"program {number}, seed {seed}: -O2 ends differently")
+            elif optimised.actions > plain.actions:
+                failures.append(f"program {number}, seed {seed}: -O2 performed more actions")
+    return failures
+
+def test_o2_turning_loops_stop():
+    """An action limit stops loops whose turns cancel out, at every level."""
+    failures = []
+    # the statement limit only keeps a broken optimiser from hanging the test
+    limits = Limits(max_statements=1000000, max_actions=100)
+    for i, program in enumerate(TURNING_LOOPS):
+        for level in (0, 1, 2):
+            result, _, _ = run_program(program, "2", 0, level, limits)
+            if result.reason != Termination.ACTION_LIMIT or result.actions != 100:
+                failures.append(f"turning loop {i + 1} at -O{level}: stopped by {result.reason.value} "
+                                f"after {result.actions} actions")
+    return failures
+
+def main():
+    """Main test runner for the optimizer"""
+
+    print("🎯 OPTIMIZER TEST SUITE")
+    print("=" * 60)
+    print("-O1 must not change actions; -O2 must not change outcomes or hide loops from action limits")
+    print()
+
+    results = []
+    for test_name, test in (("-O1 preserves actions", test_o1_preserves_actions),
+                            ("-O2 ends in the same state", test_o2_same_outcome),
+                            ("Turning loops stop at the action limit", test_o2_turning_loops_stop)):
+        print(f"🚀 RUNNING: {test_name}")
+        failures = test()
+        for failure in failures:
+            print(f"❌ {failure}")
+        results.append((test_name, not failures))
+        print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
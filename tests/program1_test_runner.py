@@ -9,7 +9,8 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from robotspeak.maze import Maze
-from robotspeak.compiler import compiler
+from robotspeak.compiler import Interpreter
+from robotspeak.vm import Limits
 
 class CorridorMaze(Maze):
     """Custom maze class for creating actual corridors with walls"""
@@ -169,41 +170,15 @@ def run_program1_on_corridor(test_name, maze):
     print("• Navigate unknown corridor layout")
     print()
     
-    # Override the load_program1 function to use our custom maze
-    import robotspeak.compiler as compiler_module
-    
-    def custom_load_program1():
-        compiler_module.maze = maze
-        print(f"--- Loading Custom Corridor: {test_name} ---")
-        print("Initial Maze State:")
-        maze.print_map()
-    
-    # Temporarily replace the load function
-    original_load = compiler_module.load_program1
-    compiler_module.load_program1 = custom_load_program1
-    
     print("🎬 EXECUTING PROGRAM 1...")
     print("-" * 40)
     
     try:
-        # Enhance parser to stop immediately when solved
-        original_parser = compiler_module.parser
-
-        def enhanced_parser(tokens, lineNumber, numLines, codingList, num_executed_lines=2):
-            result = original_parser(tokens, lineNumber, numLines, codingList, num_executed_lines)
-            if compiler_module.maze and compiler_module.maze.is_maze_solved():
-                print("\n*** MAZE SOLVED! ***")
-                return "HALT"
-            return result
-
-        compiler_module.parser = enhanced_parser
+        # Run on the custom maze instead of a generated one
+        print(f"--- Loading Custom Corridor: {test_name} ---")
+        # and stop as soon as it is solved, whether by OPEN_DOOR or by reaching the exit
+        Interpreter(maze=maze).run(program1_code, Limits(stop_when_solved=True))
 
-        compiler(program1_code)
-        
-        # Restore original functions
-        compiler_module.load_program1 = original_load
-        compiler_module.parser = original_parser
-        
         print("-" * 40)
         if maze.is_maze_solved():
             print(f"✅ SUCCESS: {test_name} - Robot escaped!")
@@ -217,12 +192,6 @@ def run_program1_on_corridor(test_name, maze):
             
     except Exception as e:
         print(f"❌ ERROR: {test_name} - {e}")
-        # Attempt to restore on error
-        try:
-            compiler_module.load_program1 = original_load
-            compiler_module.parser = original_parser
-        except Exception:
-            pass
         return False
 
 def main():
@@ -9,7 +9,8 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from robotspeak.maze import Maze
-from robotspeak.compiler import compiler
+from robotspeak.compiler import Interpreter
+from robotspeak.vm import Limits
 
 class RectangularRoomMaze(Maze):
     """Custom maze class for creating rectangular rooms with no obstacles"""
@@ -186,45 +187,15 @@ def run_program2_on_room(test_name, maze):
     print("• No obstacles - pure rectangular room")
     print()
     
-    # Override the load_program2 function to use our custom maze
-    import robotspeak.compiler as compiler_module
-    
-    def custom_load_program2():
-        compiler_module.maze = maze
-        print(f"--- Loading Custom Room: {test_name} ---")
-        print("Initial Room State:")
-        maze.print_map()
-    
-    # Temporarily replace the load function
-    original_load = compiler_module.load_program2
-    compiler_module.load_program2 = custom_load_program2
-    
     print("🎬 EXECUTING PROGRAM 2...")
     print("-" * 40)
     
     try:
-        # Monkey patch the parser to check for maze solved after each action
-        original_parser = compiler_module.parser
-        
-        def enhanced_parser(tokens, lineNumber, numLines, codingList, num_executed_lines=2):
-            result = original_parser(tokens, lineNumber, numLines, codingList, num_executed_lines)
-            
-            # Check if maze is solved after any action (not just OPEN_DOOR)
-            if compiler_module.maze and compiler_module.maze.is_maze_solved():
-                print("\n*** MAZE SOLVED! ***")
-                return "HALT"
-            
-            return result
-        
-        # Temporarily replace the parser
-        compiler_module.parser = enhanced_parser
-        
-        compiler(program2_code)
-        
-        # Restore original functions
-        compiler_module.load_program2 = original_load
-        compiler_module.parser = original_parser
-        
+        # Run on the custom maze instead of a generated one
+        print(f"--- Loading Custom Room: {test_name} ---")
+        # and stop as soon as it is solved, whether by OPEN_DOOR or by reaching the exit
+        Interpreter(maze=maze).run(program2_code, Limits(stop_when_solved=True))
+
         print("-" * 40)
         if maze.is_maze_solved():
             print(f"✅ SUCCESS: {test_name} - Robot escaped!")
@@ -239,10 +210,6 @@ def run_program2_on_room(test_name, maze):
             
     except Exception as e:
         print(f"❌ ERROR: {test_name} - {e}")
-        # Restore original functions even on error
-        compiler_module.load_program2 = original_load
-        if 'enhanced_parser' in locals():
-            compiler_module.parser = original_parser
         return False
 
 def main():
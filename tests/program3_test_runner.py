@@ -10,7 +10,8 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from robotspeak.maze import Maze
-from robotspeak.compiler import compiler
+from robotspeak.compiler import Interpreter
+from robotspeak.vm import Limits
 
 class MultiKeyRoomMaze(Maze):
     """Custom maze class supporting multiple keys where only one is correct"""
@@ -227,40 +228,14 @@ def run_program3_on_room(test_name, maze):
     print("• Escape via exit hatch if encountered")
     print()
 
-    # Override the load_program3 function to use our custom maze
-    import robotspeak.compiler as compiler_module
-
-    def custom_load_program3():
-        compiler_module.maze = maze
-        print(f"--- Loading Custom Multi-Key Room: {test_name} ---")
-        print("Initial Room State:")
-        maze.print_map()
-
-    # Temporarily replace the load function
-    original_load = compiler_module.load_program3
-    compiler_module.load_program3 = custom_load_program3
-
     print("🎬 EXECUTING PROGRAM 3...")
     print("-" * 40)
 
     try:
-        # Monkey patch the parser to check for maze solved after each action
-        original_parser = compiler_module.parser
-
-        def enhanced_parser(tokens, lineNumber, numLines, codingList, num_executed_lines=2):
-            result = original_parser(tokens, lineNumber, numLines, codingList, num_executed_lines)
-            if compiler_module.maze and compiler_module.maze.is_maze_solved():
-                print("\n*** MAZE SOLVED! ***")
-                return "HALT"
-            return result
-
-        compiler_module.parser = enhanced_parser
-
-        compiler(program3_code)
-
-        # Restore original functions
-        compiler_module.load_program3 = original_load
-        compiler_module.parser = original_parser
+        # Run on the custom maze instead of a generated one
+        print(f"--- Loading Custom Multi-Key Room: {test_name} ---")
+        # and stop as soon as it is solved, whether by OPEN_DOOR or by reaching the exit
+        Interpreter(maze=maze).run(program3_code, Limits(stop_when_solved=True))
 
         print("-" * 40)
         if maze.is_maze_solved():
@@ -279,12 +254,6 @@ def run_program3_on_room(test_name, maze):
 
     except Exception as e:
         print(f"❌ ERROR: {test_name} - {e}")
-        # Restore original functions even on error
-        try:
-            compiler_module.load_program3 = original_load
-            compiler_module.parser = original_parser
-        except Exception:
-            pass
         return False
 
 
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Sinks Test Runner: verbosity levels and output sinks
+Runs the three algorithms into every kind of sink and checks that QUIET
+does no rendering at all, that ACTIONS reports the same actions as MAPS
+without the maps, that render_every thins the maps out, that files and
+ring buffers hold what the terminal would have shown, and that --live
+refuses the options it cannot honour.
+"""
+
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.maze import Maze
+from robotspeak.compiler import Interpreter
+from robotspeak.generator import generate_maze
+from robotspeak.sinks import TerminalSink, FileSink, RingBufferSink, QUIET, ACTIONS, MAPS
+from robotspeak.vm import Limits
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEEDS = range(5)
+LIMITS = Limits(max_statements=5000)
+
+class CountingMaze(Maze):
+    """A Maze that counts how often it is rendered."""
+    renders = 0
+
+    def render(self, delimiter=' '):
+        CountingMaze.renders += 1
+        return super().render(delimiter)
+
+def read_program(number):
+    with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+        return f.read()
+
+def run_into(sink, number, seed):
+    """Run algorithm number on its seed maze into sink; return how many maps were rendered and the result."""
+    maze = generate_maze(str(number), CountingMaze, random.Random(seed))
+    maze.create_initial_map()
+    CountingMaze.renders = 0
+    result = Interpreter(maze=maze, sink=sink).run(read_program(number), LIMITS)
+    sink.flush()
+    return CountingMaze.renders, result
+
+def terminal(number, seed, level, render_every=1):
+    output = io.StringIO()
+    renders, result = run_into(TerminalSink(output, level=level, render_every=render_every), number, seed)
+    return renders, result, output.getvalue()
+
+def test_levels():
+    """QUIET renders and prints nothing; ACTIONS prints every line MAPS does except the maps."""
+    failures = []
+    for number in (1, 2, 3):
+        for seed in SEEDS:
+            name = f"program {number}, seed {seed}"
+            renders, quiet, output = terminal(number, seed, QUIET)
+            if renders or output:
+                failures.append(f"{name}: QUIET rendered {renders} maps and printed {len(output)} characters")
+            renders, actions, actions_output = terminal(number, seed, ACTIONS)
+            _, maps, maps_output = terminal(number, seed, MAPS)
+            if renders or "* * *" in actions_output:
+                failures.append(f"{name}: ACTIONS rendered {renders} maps")
+            # MAPS adds the initial map heading and map rows, which all start with the border
+            reported = [line for line in maps_output.splitlines()
+                        if line.strip() and line != "Initial Maze State:" and not line.startswith("* ")]
+            if [line for line in actions_output.splitlines() if line.strip()] != reported:
+                failures.append(f"{name}: ACTIONS reports differ from MAPS")
+            if not (quiet.statements == actions.statements == maps.statements):
+                failures.append(f"{name}: the level changed the run")
+    return failures
+
+def test_render_every():
+    """render_every N draws the initial map and then one map per N moves or turns."""
+    failures = []
+    for number in (1, 2, 3):
+        for seed in SEEDS:
+            every, _, _ = terminal(number, seed, MAPS)
+            for n in (2, 5):
+                renders, _, _ = terminal(number, seed, MAPS, n)
+                if renders != 1 + (every - 1) // n:
+                    failures.append(f"program {number}, seed {seed}: {renders} maps every {n}, {every} in all")
+    return failures
+
+def test_file_and_ring_buffer():
+    """A FileSink holds exactly the terminal output, and a RingBufferSink its last writes."""
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "run.txt")
+        for number in (1, 2, 3):
+            for seed in SEEDS:
+                name = f"program {number}, seed {seed}"
+                _, _, printed = terminal(number, seed, MAPS)
+                with FileSink(path, MAPS) as sink:
+                    run_into(sink, number, seed)
+                with open(path, "r", encoding="utf-8") as f:
+                    if f.read() != printed:
+                        failures.append(f"{name}: the file differs from the terminal output")
+                sink = RingBufferSink(100000, MAPS)
+                run_into(sink, number, seed)
+                if sink.getvalue() != printed:
+                    failures.append(f"{name}: the ring buffer differs from the terminal output")
+                sink = RingBufferSink(3, MAPS)
+                run_into(sink, number, seed)
+                if len(sink.lines()) != 3 or not printed.endswith(sink.getvalue()):
+                    failures.append(f"{name}: the ring buffer did not keep the last 3 writes")
+    return failures
+
+def run_cli(*options):
+    path = os.path.join(REPO_ROOT, 'algorithms', 'program2.txt')
+    completed = subprocess.run([sys.executable, "-m", "robotspeak.main", path, "--seed", "0", *options],
+                               cwd=REPO_ROOT, capture_output=True, text=True)
+    return completed.returncode, completed.stdout, completed.stderr
+
+def test_live_options():
+    """`robotspeak --live` draws in place, and refuses the options it cannot honour."""
+    failures = []
+    code, output, _ = run_cli("--live", "--fps", "0")
+    if code != 0 or "\x1b[" not in output:
+        failures.append(f"--live: exit {code}, no cursor movement drawn")
+    with tempfile.TemporaryDirectory() as directory:
+        for options in (("--output", os.path.join(directory, "run.txt")), ("--render-every", "3")):
+            code, _, error = run_cli("--live", *options)
+            if code != 2 or options[0] not in error:
+                failures.append(f"--live {' '.join(options)}: exit {code}, {error!r}")
+            elif os.path.exists(os.path.join(directory, "run.txt")):
+                failures.append(f"--live {' '.join(options)}: the output file was created")
+    return failures
+
+def main():
+    """Main test runner for sinks"""
+
+    print("🎯 SINKS TEST SUITE")
+    print("=" * 60)
+    print("Each verbosity level must do only the work it shows")
+    print()
+
+    results = []
+    for test_name, test in (("Verbosity levels", test_levels),
+                            ("render_every", test_render_every),
+                            ("File and ring buffer sinks", test_file_and_ring_buffer),
+                            ("robotspeak --live options", test_live_options)):
+        print(f"🚀 RUNNING: {test_name}")
+        failures = test()
+        for failure in failures:
+            print(f"❌ {failure}")
+        results.append((test_name, not failures))
+        print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
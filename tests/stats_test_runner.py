@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Stats Test Runner: RunStats counters, merging and --stats
+Counts a short scripted run by hand and checks every RunStats counter
+against it, checks that collecting stats leaves the three algorithms'
+runs unchanged and that merged stats add up, and checks the JSON that
+`robotspeak --stats-json` writes.
+"""
+
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.maze import Maze
+from robotspeak.grid import GridMaze
+from robotspeak.compiler import Interpreter
+from robotspeak.generator import generate_maze
+from robotspeak.sinks import NullSink, TerminalSink, ACTIONS, MAPS
+from robotspeak.stats import RunStats, PHASES
+from robotspeak.vm import Limits
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEEDS = range(10)
+LIMITS = Limits(max_statements=20000)
+
+# the robot starts at [2, 3] facing north in a 4x4 room, so the pick fails (no key
+# there), two moves succeed and the third hits the wall
+SCRIPT = """LOAD 2
+seen := FALSE
+PICK_KEY
+MOVE_FORWARD
+MOVE_FORWARD
+MOVE_FORWARD
+TURN_LEFT
+IF FRONT_IS_CLEAR
+    seen := TRUE
+END
+END
+"""
+SCRIPT_COUNTS = {
+    "runs": 1,
+    "statements": 8,
+    "actions": {"PICK_KEY": 1, "MOVE_FORWARD": 3, "TURN_LEFT": 1},
+    "failed_actions": 2,
+    "sensor_reads": 1,
+    "variable_writes": 2,
+}
+
+def room(maze_class):
+    maze = maze_class(width=4, length=4, key_locations=[[2, 2]], door_location=[4, 4],
+                      exit_location=[1, 1], robot_location=[2, 3], robot_direction='north')
+    maze.create_initial_map()
+    return maze
+
+def read_program(number):
+    with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+        return f.read()
+
+def test_counters():
+    """Every counter of a scripted run matches a count made by hand."""
+    failures = []
+    for maze_class in (Maze, GridMaze):
+        for level, renders in ((ACTIONS, 0), (MAPS, 3)):
+            stats = RunStats()
+            Interpreter(maze=room(maze_class), sink=TerminalSink(io.StringIO(), level=level)).run(
+                SCRIPT, LIMITS, stats=stats)
+            counts = stats.to_dict()
+            expected = dict(SCRIPT_COUNTS, renders=renders)
+            got = {name: counts[name] for name in expected}
+            if got != expected:
+                failures.append(f"{maze_class.__name__}, level {level}: counted {got}")
+            if any(counts[phase + "_ns"] <= 0 for phase in PHASES):
+                failures.append(f"{maze_class.__name__}, level {level}: a phase took no time, {counts}")
+    return failures
+
+def test_runs_unchanged():
+    """Collecting stats changes nothing about a run, and merged stats add up."""
+    failures = []
+    for number in (1, 2, 3):
+        program = read_program(number)
+        totals = RunStats()
+        statements = 0
+        actions = 0
+        for seed in SEEDS:
+            outcomes = []
+            for stats in (None, RunStats()):
+                maze = generate_maze(str(number), GridMaze, random.Random(seed))
+                maze.create_initial_map()
+                result = Interpreter(maze=maze, sink=NullSink()).run(program, LIMITS, stats=stats)
+                outcomes.append((result.reason, result.statements, result.actions, list(maze.robot_location)))
+            if outcomes[0] != outcomes[1]:
+                failures.append(f"program {number}, seed {seed}: {outcomes[1]} with stats, {outcomes[0]} without")
+            if (stats.statements, sum(stats.actions.values())) != (result.statements, result.actions):
+                failures.append(f"program {number}, seed {seed}: stats {stats} for {result}")
+            totals.merge(stats)
+            statements += result.statements
+            actions += result.actions
+        if (totals.runs, totals.statements, sum(totals.actions.values())) != (len(SEEDS), statements, actions):
+            failures.append(f"program {number}: merged {totals}")
+    return failures
+
+def test_cli_json():
+    """`robotspeak --stats-json` writes every counter and timing as JSON."""
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "stats.json")
+        program = os.path.join(REPO_ROOT, 'algorithms', 'program2.txt')
+        completed = subprocess.run([sys.executable, "-m", "robotspeak.main", program, "--seed", "1",
+                                    "--quiet", "--stats", "--stats-json", path],
+                                   cwd=REPO_ROOT, capture_output=True, text=True)
+        if completed.returncode != 0 or "--- Stats ---" not in completed.stdout:
+            failures.append(f"exit {completed.returncode}: {completed.stdout!r} {completed.stderr!r}")
+            return failures
+        with open(path, "r") as f:
+            written = json.load(f)
+        if set(written) != set(RunStats.__slots__) or written["runs"] != 1 or not written["statements"]:
+            failures.append(f"wrote {written}")
+    return failures
+
+def main():
+    """Main test runner for run stats"""
+
+    print("🎯 STATS TEST SUITE")
+    print("=" * 60)
+    print("Run counters must be exact and must not change the run they count")
+    print()
+
+    results = []
+    for test_name, test in (("Counters of a scripted run", test_counters),
+                            ("Runs unchanged, merges add up", test_runs_unchanged),
+                            ("robotspeak --stats-json", test_cli_json)):
+        print(f"🚀 RUNNING: {test_name}")
+        failures = test()
+        for failure in failures:
+            print(f"❌ {failure}")
+        results.append((test_name, not failures))
+        print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
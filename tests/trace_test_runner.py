@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Trace Test Runner: record and replay
+Records runs of the three algorithms to traces, replays each trace and
+checks that it rebuilds the maze exactly as the run left it, and that
+every action event records the outcome the maze reported for it.
+"""
+
+import io
+import os
+import random
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robotspeak.maze import Maze
+from robotspeak.grid import GridMaze
+from robotspeak.compiler import Interpreter
+from robotspeak.generator import generate_maze
+from robotspeak.sinks import NullSink
+from robotspeak.trace import TraceRecorder, Trace, replay, KIND_NAMES
+from robotspeak.vm import Limits
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEEDS = range(20)
+LIMITS = Limits(max_statements=20000)
+
+class LegacyMaze(Maze):
+    """A subclass that overrides the raising actions only, so runs call them instead of try_*."""
+    def pick_key(self):
+        super().pick_key()
+
+    def open_door(self):
+        super().open_door()
+
+class SwappingMaze(Maze):
+    """PICK_KEY while holding a key swaps it for the one underfoot: it succeeds, but has_key stays True."""
+    def try_pick_key(self):
+        if self.has_key and self.on_key():
+            self.try_throw_away_key()
+        return super().try_pick_key()
+
+def record(maze, program, limits=LIMITS):
+    """Run program on maze with a TraceRecorder; return the result and the trace."""
+    output = io.BytesIO()
+    with TraceRecorder(output) as recorder:
+        result = Interpreter(maze=maze, sink=NullSink()).run(program, limits, recorder=recorder)
+    return result, Trace(output.getvalue())
+
+def state(maze):
+    # Maze and GridMaze may list the symbols in a cell in different orders
+    cells = [[''.join(sorted(cell)) for cell in row] for row in maze.get_map_matrix()]
+    return (list(maze.robot_location), maze.robot_direction, maze.has_key, maze.has_opened_door,
+            maze.is_maze_solved(), cells)
+
+def test_replay_final_state():
+    """Replaying a trace ends in the state the run ended in."""
+    failures = []
+    for number in (1, 2, 3):
+        with open(os.path.join(REPO_ROOT, 'algorithms', f'program{number}.txt'), 'r') as f:
+            program = f.read()
+        for maze_class in (Maze, GridMaze, LegacyMaze):
+            for seed in SEEDS:
+                maze = generate_maze(str(number), maze_class, random.Random(seed))
+                maze.create_initial_map()
+                result, trace = record(maze, program)
+                replayed, applied, _ = replay(trace)
+                name = f"program {number}, {maze_class.__name__}, seed {seed}"
+                if state(replayed) != state(maze):
+                    failures.append(f"{name}: replay ends in a different state")
+                if (trace.termination, trace.statements, trace.actions) != \
+                        (result.reason, result.statements, result.actions):
+                    failures.append(f"{name}: trace end record differs from the result")
+                if applied != result.statements:
+                    failures.append(f"{name}: {applied} events for {result.statements} statements")
+    return failures
+
+# each step, and whether it succeeds, in a 5x5 room with keys at [2, 5] and [3, 5], the door at
+# [5, 5] and the exit at [1, 1]; the robot starts at [2, 4] facing south
+STEPS = [
+    ("PICK_KEY", False),        # not on a key
+    ("THROW_AWAY_KEY", False),  # not holding one
+    ("OPEN_DOOR", False),       # not at the door
+    ("MOVE_FORWARD", True),     # onto the first key, which is not the true one
+    ("PICK_KEY", True),
+    ("PICK_KEY", False),        # already holding a key
+    ("MOVE_FORWARD", False),    # the wall
+    ("TURN_LEFT", True),
+    ("MOVE_FORWARD", True),     # onto the true key
+    ("MOVE_FORWARD", True),
+    ("MOVE_FORWARD", True),     # at the door
+    ("OPEN_DOOR", False),       # wrong key
+    ("THROW_AWAY_KEY", True),
+]
+
+def test_action_outcomes():
+    """Action events record whether the maze accepted each action."""
+    failures = []
+    program = "LOAD 2\n" + "\n".join(name for name, _ in STEPS) + "\nEND\n"
+    for maze_class in (Maze, GridMaze, LegacyMaze):
+        maze = maze_class(width=5, length=5, key_locations=[[2, 5], [3, 5]], door_location=[5, 5],
+                          exit_location=[1, 1], robot_location=[2, 4], robot_direction='south', true_key_idx=2)
+        maze.create_initial_map()
+        _, trace = record(maze, program)
+        outcomes = [(KIND_NAMES[event.kind], event.result) for event in trace.events()]
+        if outcomes != STEPS:
+            failures.append(f"{maze_class.__name__}: recorded {outcomes}")
+
+    # OPEN_DOOR succeeds again at the exit, though it changes nothing the second time
+    program = "LOAD 2\nOPEN_DOOR\nOPEN_DOOR\nEND\n"
+    for maze_class in (Maze, GridMaze, LegacyMaze):
+        maze = maze_class(width=4, length=4, key_locations=[[2, 2]], door_location=[4, 4],
+                          exit_location=[1, 1], robot_location=[1, 1], robot_direction='north')
+        maze.create_initial_map()
+        _, trace = record(maze, program, Limits(max_statements=100))
+        outcomes = [event.result for event in trace.events()]
+        if outcomes != [True]:
+            failures.append(f"{maze_class.__name__}: OPEN_DOOR at the exit recorded {outcomes}")
+
+    # a swap leaves has_key as it was; the event must still show the pick succeeded
+    program = "LOAD 2\nPICK_KEY\nMOVE_FORWARD\nPICK_KEY\nEND\n"
+    maze = SwappingMaze(width=4, length=4, key_locations=[[2, 2], [2, 3]], door_location=[4, 4],
+                        exit_location=[1, 1], robot_location=[2, 2], robot_direction='south')
+    maze.create_initial_map()
+    _, trace = record(maze, program)
+    outcomes = [event.result for event in trace.events()]
+    if outcomes != [True, True, True]:
+        failures.append(f"SwappingMaze: recorded {outcomes} for a pick, a move and a swap")
+    return failures
+
+def main():
+    """Main test runner for traces"""
+
+    print("🎯 TRACE TEST SUITE")
+    print("=" * 60)
+    print("Recorded traces must replay to the state the run ended in")
+    print()
+
+    results = []
+    for test_name, test in (("Replay matches the run", test_replay_final_state),
+                            ("Action outcomes recorded", test_action_outcomes)):
+        print(f"🚀 RUNNING: {test_name}")
+        failures = test()
+        for failure in failures:
+            print(f"❌ {failure}")
+        results.append((test_name, not failures))
+        print()
+
+    # Summary
+    print("📊 TEST RESULTS SUMMARY")
+    print("=" * 30)
+    successful = 0
+    for test_name, success in results:
+        status = "✅ PASSED" if success else "❌ FAILED"
+        print(f"{test_name}: {status}")
+        if success:
+            successful += 1
+
+    print(f"\nOverall: {successful}/{len(results)} tests passed")
+    return successful == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)